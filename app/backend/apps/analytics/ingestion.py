@@ -0,0 +1,257 @@
+"""
+Buffered ingestion of activity events.
+
+ActivityLogViewSet.create only validates an event and hands it to enqueue();
+a background flusher thread takes the queued events in batches (up to
+BATCH_SIZE events, or whatever arrived within FLUSH_INTERVAL seconds of the
+first one) and write() stores each batch in one transaction:
+
+- the ActivityLog rows with a single bulk_create;
+- the ProducerStatistics rows of producers that have none yet;
+- the counter deltas of the batch summed per producer and applied with one
+  UPDATE for all of them (F() expressions, so concurrent flushes from other
+  processes add up instead of overwriting each other). The counters end as
+  if the events had been applied one at a time, including total_favorites
+  never going below zero.
+
+An event whose location, product or producer was deleted while it waited
+would make the database reject the whole batch; the batch is then written
+event by event and only the rejected events are dropped (and logged).
+
+The created_at of a log is the time its batch was written, at most
+FLUSH_INTERVAL seconds after the request. Events live in memory only: the
+queue is drained on a clean shutdown (atexit), but events of a killed process
+are lost, which is acceptable for analytics counters. When the queue is full
+an event is written right away in the request, and with
+settings.ACTIVITY_LOG_ASYNC off every event is.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import ActivityLog, ProducerStatistics
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0
+MAX_QUEUE_SIZE = 50000
+
+ActivityType = ActivityLog.ActivityType
+
+# ProducerStatistics counters incremented by each activity type.
+COUNTERS = {
+    ActivityType.LOCATION_VIEW: ('total_views', 'monthly_views'),
+    ActivityType.FAVORITE_ADD: ('total_favorites', 'monthly_favorites'),
+    ActivityType.PHONE_CLICK: ('total_phone_clicks',),
+    ActivityType.WHATSAPP_CLICK: ('total_whatsapp_clicks',),
+    ActivityType.DIRECTIONS_CLICK: ('total_directions_clicks',),
+}
+
+# Counters decremented by each activity type, never below zero.
+DECREMENTS = {
+    ActivityType.FAVORITE_REMOVE: ('total_favorites',),
+}
+
+
+def event(validated_data, user=None, ip_address=None, user_agent=''):
+    """
+    The queued form of an event: the ActivityLog field values with related
+    rows as ids, so nothing holds on to model instances of the request.
+    """
+    data = {
+        'activity_type': validated_data['activity_type'],
+        'metadata': validated_data.get('metadata') or {},
+        'user_id': user.pk if user is not None else None,
+        'ip_address': ip_address,
+        'user_agent': user_agent or '',
+    }
+    for name in ('location', 'product', 'producer'):
+        related = validated_data.get(name)
+        data[f'{name}_id'] = related.pk if related is not None else None
+    return data
+
+
+def counter_deltas(events):
+    """
+    {producer id: {counter name: (delta, floor)}} of a batch.
+
+    Decremented counters never go below zero while the events are applied
+    one by one, so after the batch such a counter is at least the sum of the
+    events that followed its lowest running total: that is the floor. For
+    the other counters the floor is 0.
+    """
+    totals = defaultdict(Counter)
+    lowest = defaultdict(Counter)
+    for data in events:
+        producer_id = data.get('producer_id')
+        if producer_id is None:
+            continue
+        for name in COUNTERS.get(data['activity_type'], ()):
+            totals[producer_id][name] += 1
+        for name in DECREMENTS.get(data['activity_type'], ()):
+            totals[producer_id][name] -= 1
+            lowest[producer_id][name] = min(lowest[producer_id][name], totals[producer_id][name])
+    return {
+        producer_id: {
+            name: (delta, delta - lowest[producer_id][name] if name in lowest[producer_id] else 0)
+            for name, delta in counter.items()
+        }
+        for producer_id, counter in totals.items()
+    }
+
+
+def _per_producer(deltas, name, position):
+    """CASE producer_id WHEN ... of one element of the (delta, floor) pairs of a counter."""
+    return Case(
+        *[
+            When(producer_id=producer_id, then=Value(counters[name][position]))
+            for producer_id, counters in deltas.items()
+            if counters.get(name, (0, 0))[position]
+        ],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def apply_deltas(deltas):
+    """Apply the counter deltas of counter_deltas() in one UPDATE."""
+    if not deltas:
+        return
+    ProducerStatistics.objects.bulk_create(
+        [ProducerStatistics(producer_id=producer_id) for producer_id in deltas],
+        ignore_conflicts=True,
+    )
+    clamped = {name for names in DECREMENTS.values() for name in names}
+    updates = {}
+    for name in sorted({name for counters in deltas.values() for name in counters}):
+        # A clamped counter can rise with a net delta of 0 (remove, then add).
+        if not any(any(counters.get(name, (0, 0))) for counters in deltas.values()):
+            continue
+        value = F(name) + _per_producer(deltas, name, 0)
+        if name in clamped:
+            value = Greatest(value, _per_producer(deltas, name, 1))
+        updates[name] = value
+    if not updates:
+        return
+    now = timezone.now()
+    ProducerStatistics.objects.filter(producer_id__in=list(deltas)).update(
+        last_calculated=now, updated_at=now, **updates
+    )
+
+
+def _write_batch(events):
+    with transaction.atomic():
+        ActivityLog.objects.bulk_create([ActivityLog(**data) for data in events])
+        apply_deltas(counter_deltas(events))
+
+
+def write(events):
+    """
+    Store a batch of events and their counter deltas. When the batch is
+    rejected, for instance because a location or producer was deleted after
+    its event was queued, the events are written one by one and only those
+    the database refuses are dropped.
+    """
+    if not events:
+        return
+    try:
+        _write_batch(events)
+        return
+    except (IntegrityError, DataError):
+        if len(events) == 1:
+            logger.warning('Dropped activity event %s', events[0], exc_info=True)
+            return
+        logger.warning('Writing %d activity events one by one', len(events), exc_info=True)
+    for data in events:
+        try:
+            _write_batch([data])
+        except (IntegrityError, DataError):
+            logger.warning('Dropped activity event %s', data, exc_info=True)
+
+
+_queue = queue.Queue(maxsize=MAX_QUEUE_SIZE)
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _next_batch():
+    """Block for one event, then gather more until the batch is full or the interval ends."""
+    batch = [_queue.get()]
+    deadline = time.monotonic() + FLUSH_INTERVAL
+    while len(batch) < BATCH_SIZE:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(_queue.get(timeout=timeout))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _work():
+    while True:
+        batch = _next_batch()
+        try:
+            write(batch)
+        except Exception:
+            logger.exception('Could not write %d activity events', len(batch))
+        finally:
+            close_old_connections()
+            for _ in batch:
+                _queue.task_done()
+
+
+def enqueue(data):
+    """
+    Queue an event for the flusher thread, or write it right away when
+    settings.ACTIVITY_LOG_ASYNC is off or the queue is full.
+    """
+    global _worker
+    if not getattr(settings, 'ACTIVITY_LOG_ASYNC', True):
+        write([data])
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='activity-log-flusher', daemon=True)
+            _worker.start()
+    try:
+        _queue.put_nowait(data)
+    except queue.Full:
+        write([data])
+
+
+def flush():
+    """Write every queued event in the calling thread."""
+    batch = []
+    while True:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    try:
+        for start in range(0, len(batch), BATCH_SIZE):
+            write(batch[start:start + BATCH_SIZE])
+    finally:
+        for _ in batch:
+            _queue.task_done()
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception('Could not write the queued activity events at exit')
+
+
+atexit.register(_flush_at_exit)
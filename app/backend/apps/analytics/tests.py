@@ -0,0 +1,130 @@
+import random
+
+from django.test import TestCase, TransactionTestCase
+
+from apps.users.models import User
+from . import ingestion
+from .models import ActivityLog, ProducerStatistics
+
+ActivityType = ActivityLog.ActivityType
+
+
+def make_producer(email='produtor@example.com'):
+    user = User.objects.create_user(
+        email=email, password='senha123',
+        first_name='Ana', last_name='Lima', user_type=User.UserType.PRODUCER
+    )
+    return user.producer_profile
+
+
+def make_event(activity_type, producer_id=None, **ids):
+    return {
+        'activity_type': activity_type,
+        'metadata': {},
+        'user_id': None,
+        'ip_address': None,
+        'user_agent': '',
+        'location_id': ids.get('location_id'),
+        'product_id': ids.get('product_id'),
+        'producer_id': producer_id,
+    }
+
+
+def apply_one_by_one(start, activity_types):
+    """total_favorites after applying the events sequentially, clamped at zero."""
+    total = start
+    for activity_type in activity_types:
+        if activity_type == ActivityType.FAVORITE_ADD:
+            total += 1
+        elif activity_type == ActivityType.FAVORITE_REMOVE:
+            total = max(0, total - 1)
+    return total
+
+
+class CounterDeltasTests(TestCase):
+    """Per-producer (delta, floor) pairs of a batch."""
+
+    def test_floor_of_a_decremented_counter(self):
+        # Running total 1, 0, -1, 0: at least 1 whatever the starting value.
+        deltas = ingestion.counter_deltas([
+            make_event(ActivityType.FAVORITE_ADD, 1),
+            make_event(ActivityType.FAVORITE_REMOVE, 1),
+            make_event(ActivityType.FAVORITE_REMOVE, 1),
+            make_event(ActivityType.FAVORITE_ADD, 1),
+        ])
+
+        self.assertEqual(deltas[1]['total_favorites'], (0, 1))
+        self.assertEqual(deltas[1]['monthly_favorites'], (2, 0))
+
+    def test_counts_per_producer_and_skips_events_without_one(self):
+        deltas = ingestion.counter_deltas([
+            make_event(ActivityType.LOCATION_VIEW, 1),
+            make_event(ActivityType.LOCATION_VIEW, 1),
+            make_event(ActivityType.PHONE_CLICK, 2),
+            make_event(ActivityType.FAVORITE_REMOVE, 2),
+            make_event(ActivityType.LOCATION_VIEW),
+        ])
+
+        self.assertEqual(deltas, {
+            1: {'total_views': (2, 0), 'monthly_views': (2, 0)},
+            2: {'total_phone_clicks': (1, 0), 'total_favorites': (-1, 0)},
+        })
+
+
+class ApplyDeltasTests(TestCase):
+    """apply_deltas must leave the counters as sequential updates would."""
+
+    def setUp(self):
+        self.producer = make_producer()
+
+    def test_creates_missing_statistics(self):
+        ingestion.apply_deltas(ingestion.counter_deltas([
+            make_event(ActivityType.LOCATION_VIEW, self.producer.pk),
+            make_event(ActivityType.WHATSAPP_CLICK, self.producer.pk),
+        ]))
+
+        statistics = ProducerStatistics.objects.get(producer=self.producer)
+        self.assertEqual(statistics.total_views, 1)
+        self.assertEqual(statistics.monthly_views, 1)
+        self.assertEqual(statistics.total_whatsapp_clicks, 1)
+        self.assertEqual(statistics.total_favorites, 0)
+
+    def test_decrements_never_go_below_zero(self):
+        rng = random.Random(7)
+        choices = [ActivityType.FAVORITE_ADD, ActivityType.FAVORITE_REMOVE]
+        for _ in range(50):
+            start = rng.randint(0, 3)
+            activity_types = [rng.choice(choices) for _ in range(rng.randint(1, 8))]
+            ProducerStatistics.objects.update_or_create(
+                producer=self.producer, defaults={'total_favorites': start}
+            )
+
+            ingestion.apply_deltas(ingestion.counter_deltas(
+                [make_event(activity_type, self.producer.pk) for activity_type in activity_types]
+            ))
+
+            statistics = ProducerStatistics.objects.get(producer=self.producer)
+            self.assertEqual(
+                statistics.total_favorites, apply_one_by_one(start, activity_types),
+                (start, activity_types)
+            )
+
+
+class WriteTests(TransactionTestCase):
+    """A batch rejected by the database loses only its offending events."""
+
+    def test_event_with_a_deleted_location_is_dropped_alone(self):
+        producer = make_producer()
+        events = [
+            make_event(ActivityType.LOCATION_VIEW, producer.pk),
+            make_event(ActivityType.LOCATION_VIEW, producer.pk, location_id=999999),
+            make_event(ActivityType.PHONE_CLICK, producer.pk),
+        ]
+
+        with self.assertLogs('apps.analytics.ingestion', 'WARNING'):
+            ingestion.write(events)
+
+        self.assertEqual(ActivityLog.objects.count(), 2)
+        statistics = ProducerStatistics.objects.get(producer=producer)
+        self.assertEqual(statistics.total_views, 1)
+        self.assertEqual(statistics.total_phone_clicks, 1)
@@ -14,6 +14,7 @@ from .serializers import (
     AnalyticsSummarySerializer
 )
 from apps.producers.models import ProducerProfile
+from . import ingestion
 
 
 def get_client_ip(request):
@@ -36,52 +37,25 @@ class ActivityLogViewSet(viewsets.ModelViewSet):
     permission_classes = []  # Allow anonymous logging
     
     def create(self, request, *args, **kwargs):
-        """Create a new activity log entry."""
+        """
+        Validate an activity event and queue it (see apps.analytics.ingestion).
+        The log and the producer statistics are written in batches by a
+        background flusher, so the response is 202 without an id.
+        """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         # Add user if authenticated
         user = request.user if request.user.is_authenticated else None
         
-        # Add IP and user agent
-        ip_address = get_client_ip(request)
-        user_agent = request.META.get('HTTP_USER_AGENT', '')
-        
-        activity_log = serializer.save(
+        ingestion.enqueue(ingestion.event(
+            serializer.validated_data,
             user=user,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        
-        # Update statistics asynchronously if needed
-        if activity_log.producer:
-            self._update_producer_stats(activity_log)
+            ip_address=get_client_ip(request),
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        ))
         
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-    
-    def _update_producer_stats(self, activity_log):
-        """Update producer statistics based on activity."""
-        stats, created = ProducerStatistics.objects.get_or_create(
-            producer=activity_log.producer
-        )
-        
-        # Update counters based on activity type
-        if activity_log.activity_type == ActivityLog.ActivityType.LOCATION_VIEW:
-            stats.total_views += 1
-            stats.monthly_views += 1
-        elif activity_log.activity_type == ActivityLog.ActivityType.FAVORITE_ADD:
-            stats.total_favorites += 1
-            stats.monthly_favorites += 1
-        elif activity_log.activity_type == ActivityLog.ActivityType.FAVORITE_REMOVE:
-            stats.total_favorites = max(0, stats.total_favorites - 1)
-        elif activity_log.activity_type == ActivityLog.ActivityType.PHONE_CLICK:
-            stats.total_phone_clicks += 1
-        elif activity_log.activity_type == ActivityLog.ActivityType.WHATSAPP_CLICK:
-            stats.total_whatsapp_clicks += 1
-        elif activity_log.activity_type == ActivityLog.ActivityType.DIRECTIONS_CLICK:
-            stats.total_directions_clicks += 1
-        
-        stats.save()
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
     
     def get_queryset(self):
         """Filter logs based on user permissions."""
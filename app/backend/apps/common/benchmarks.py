@@ -0,0 +1,222 @@
+"""
+Benchmarks of the hot API endpoints over a seeded synthetic dataset.
+
+run_benchmarks creates a throwaway test database, fills it with
+apps.common.synthetic (so a seed and scale always give the same data) and
+requests each endpoint of endpoints() through the test client: a few warmup
+requests, then a fixed number of timed ones. Each result has the latency
+percentiles in milliseconds, the number of SQL queries of one request and
+the peak Python memory allocated by one request (tracemalloc).
+
+Results are plain JSON. compare() checks them against a previous run of the
+same dataset: an endpoint regresses when it does not answer with the 2xx
+status of the baseline, when its p95 latency or peak memory grow by more than
+the threshold (and by more than a minimum absolute amount, which keeps noise
+on sub-millisecond endpoints out), or when it makes more queries.
+"""
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.chat.models import Conversation
+from apps.favorites.models import Favorite
+from apps.locations.models import Location
+from apps.producers.models import ProducerProfile
+from apps.users.models import User
+from . import synthetic
+
+ITERATIONS = 20
+WARMUP = 2
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Allowed growth of p95 latency and peak memory, in percent.
+REGRESSION_THRESHOLD = 20.0
+
+# Growth below these is never a regression.
+MIN_LATENCY_DELTA_MS = 5.0
+MIN_MEMORY_DELTA_KB = 64.0
+
+SAO_PAULO_VIEWPORT = {'sw_lat': -23.70, 'sw_lng': -46.83, 'ne_lat': -23.45, 'ne_lng': -46.36}
+
+
+def subjects():
+    """
+    The rows the benchmarks ask for: the most favorited active location, the
+    producer with the most locations and the user with the most
+    conversations. Chosen by query so they are the busiest ones of any dataset.
+    """
+    location_id = Favorite.objects.filter(location__is_active=True).values('location_id').annotate(
+        total=Count('pk')
+    ).order_by('-total', 'location_id').values_list('location_id', flat=True).first()
+    location = Location.objects.select_related('address').get(
+        pk=location_id or Location.objects.filter(is_active=True).values_list('pk', flat=True)[0]
+    )
+    producer = ProducerProfile.objects.annotate(total=Count('locations')).order_by(
+        '-total', 'pk'
+    ).select_related('user').first()
+    participant_id = Conversation.participants.through.objects.values('user_id').annotate(
+        total=Count('pk')
+    ).order_by('-total', 'user_id').values_list('user_id', flat=True).first()
+    user = User.objects.get(pk=participant_id) if participant_id else producer.user
+    return {'location': location, 'producer': producer, 'user': user}
+
+
+def endpoints(subjects):
+    """
+    (name, method, path, query params or body, user, settings) of every
+    benchmark, settings being overridden while it runs.
+    """
+    location = subjects['location']
+    point = {'lat': str(location.address.latitude), 'lng': str(location.address.longitude)}
+    producer_user = subjects['producer'].user
+    user = subjects['user']
+    return [
+        ('map_data', 'get', '/api/locations/map_data/', SAO_PAULO_VIEWPORT, None, {}),
+        ('map_data_clustered', 'get', '/api/locations/map_data/', {**SAO_PAULO_VIEWPORT, 'zoom': 11}, None, {}),
+        ('map_data_nearby', 'get', '/api/locations/map_data/',
+         {**point, 'radius_km': 5, 'ordering': 'distance'}, None, {}),
+        ('location_list', 'get', '/api/locations/', {}, None, {}),
+        ('location_list_cursor', 'get', '/api/locations/', {'cursor': ''}, None, {}),
+        ('location_list_by_distance', 'get', '/api/locations/',
+         {**point, 'radius_km': 10, 'ordering': 'distance'}, None, {}),
+        ('location_detail', 'get', f'/api/locations/{location.pk}/', {}, user, {}),
+        ('location_search', 'get', '/api/locations/search/', {'q': 'feira organica'}, None, {}),
+        ('conversation_list', 'get', '/api/chat/conversations/', {}, user, {}),
+        ('notifications_recent', 'get', '/api/notifications/notifications/recent/', {}, user, {}),
+        ('notifications_unread_count', 'get', '/api/notifications/notifications/unread_count/', {}, user, {}),
+        ('statistics_summary', 'get', '/api/analytics/statistics/summary/', {}, producer_user, {}),
+        # Written in the request, so the time includes the INSERT and the
+        # counter UPDATE instead of only putting the event on the queue.
+        ('activity_log_create', 'post', '/api/analytics/logs/', {
+            'activity_type': 'LOCATION_VIEW',
+            'location': location.pk,
+            'producer': location.producer_id,
+        }, user, {'ACTIVITY_LOG_ASYNC': False}),
+    ]
+
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of a sorted list."""
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def measure(client, method, path, params, iterations=ITERATIONS, warmup=WARMUP):
+    """Latency percentiles, query count and peak memory of one endpoint."""
+    def request():
+        if method == 'get':
+            return client.get(path, params)
+        return client.post(path, params, format='json')
+
+    for _ in range(warmup):
+        request()
+
+    # The query log is a bounded deque: once full its length stops growing.
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        response = request()
+
+    tracemalloc.start()
+    request()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        request()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    result = {
+        'status': response.status_code,
+        'queries': len(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'max_ms': round(timings[-1], 3),
+    }
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = round(_percentile(timings, percent), 3)
+    return result
+
+
+def run(names=None, iterations=ITERATIONS, warmup=WARMUP, progress=None):
+    """
+    Measure every endpoint (or those in names) against the current
+    database. progress(name, result) is called after each one.
+    """
+    results = {}
+    clients = {}
+    for name, method, path, params, user, overrides in endpoints(subjects()):
+        if names and name not in names:
+            continue
+        if user not in clients:
+            clients[user] = APIClient()
+            if user is not None:
+                clients[user].force_authenticate(user)
+        with override_settings(**overrides):
+            results[name] = measure(clients[user], method, path, params, iterations, warmup)
+        if progress:
+            progress(name, results[name])
+    return results
+
+
+def dataset(counts, seed):
+    """The description of a synthetic dataset stored with its results."""
+    return {'seed': seed, 'counts': counts}
+
+
+def report(results, counts, seed, iterations):
+    """The JSON document of a run."""
+    return {
+        'created_at': timezone.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'machine': platform.machine(),
+        },
+        'dataset': dataset(counts, seed),
+        'iterations': iterations,
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD,
+            min_latency_ms=MIN_LATENCY_DELTA_MS, min_memory_kb=MIN_MEMORY_DELTA_KB):
+    """
+    Regressions of results against the results of a baseline report, as a
+    list of messages. Any endpoint without a 2xx answer fails; the others
+    are compared when the baseline has them.
+    """
+    regressions = []
+    factor = 1 + threshold / 100
+    for name, result in results.items():
+        if not 200 <= result['status'] < 300:
+            regressions.append(f'{name}: HTTP {result["status"]}')
+            continue
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        if result['status'] != before['status']:
+            regressions.append(f'{name}: HTTP {before["status"]} -> {result["status"]}')
+            continue
+        latency, previous_latency = result['p95_ms'], before['p95_ms']
+        if latency > previous_latency * factor and latency - previous_latency > min_latency_ms:
+            regressions.append(f'{name}: p95 {previous_latency:.2f} ms -> {latency:.2f} ms')
+        memory, previous_memory = result['peak_memory_kb'], before['peak_memory_kb']
+        if memory > previous_memory * factor and memory - previous_memory > min_memory_kb:
+            regressions.append(f'{name}: memória {previous_memory:.0f} KB -> {memory:.0f} KB')
+        if result['queries'] > before['queries']:
+            regressions.append(f'{name}: consultas {before["queries"]} -> {result["queries"]}')
+    return regressions
+
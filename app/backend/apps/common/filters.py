@@ -0,0 +1,39 @@
+import re
+
+from rest_framework.filters import SearchFilter
+
+from .text import normalize_text
+
+
+class NormalizedSearchFilter(SearchFilter):
+    """
+    ?search= over a word index of the model (see apps.products.search).
+
+    The view names the reverse relation to its index rows in
+    search_terms_relation; the rows hold the accent-folded words of the
+    searched fields. Search terms are folded the same way, so "acai" finds
+    "Açaí", and each term must start one of the words: a prefix lookup on the
+    indexed term column, one subquery per term.
+    """
+
+    def get_search_terms(self, request):
+        return [
+            word
+            for term in super().get_search_terms(request)
+            for word in re.findall(r'\w+', normalize_text(term))
+        ]
+
+    def filter_queryset(self, request, queryset, view):
+        relation = getattr(view, 'search_terms_relation', None)
+        search_terms = self.get_search_terms(request)
+        if not relation or not search_terms:
+            return queryset
+
+        field = queryset.model._meta.get_field(relation)
+        terms = field.related_model.objects
+        max_length = field.related_model._meta.get_field('term').max_length
+        for term in search_terms:
+            queryset = queryset.filter(pk__in=terms.filter(
+                term__startswith=term[:max_length]
+            ).values(field.field.name))
+        return queryset
@@ -0,0 +1,220 @@
+"""
+Offline geocoding of addresses from their CEP.
+
+ZipCodeCentroid holds the approximate coordinates of each CEP, loaded from a
+dataset file with the load_zip_code_centroids command; nothing is fetched
+over the network. A CEP missing from the table falls back to the average of
+the CEPs of its sector (same first SECTOR_LENGTH digits).
+
+Addresses saved without coordinates get the centroid of their CEP (see
+apps.common.signals) and remember that CEP in geocoded_zip_code, so a new
+CEP moves them again while coordinates that were typed in are never
+replaced. Lookups go through a per-process LRU cache, which is emptied when
+the table is reloaded: the 'zip_codes' data version is checked at most every
+CHECK_INTERVAL seconds.
+"""
+import csv
+import gzip
+import re
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import Avg, Q
+from django.db.models.functions import Substr
+
+from . import versions
+from .models import ZipCodeCentroid
+
+SCOPE = 'zip_codes'
+
+CACHE_SIZE = 4096
+
+# Seconds between checks of the table version.
+CHECK_INTERVAL = 5.0
+
+LOAD_BATCH_SIZE = 1000
+
+SECTOR_LENGTH = 5
+
+COORDINATE_PLACES = Decimal('0.000001')
+
+# Accepted dataset column names.
+COLUMN_ALIASES = {
+    'zip_code': ('cep', 'zip_code', 'zipcode', 'postal_code'),
+    'latitude': ('latitude', 'lat'),
+    'longitude': ('longitude', 'lng', 'lon'),
+    'city': ('city', 'cidade', 'municipio'),
+    'state': ('state', 'uf', 'estado'),
+}
+
+
+def normalize_zip_code(value):
+    """The 8 digits of a CEP ("01310-100" -> "01310100"), or None."""
+    digits = re.sub(r'\D', '', value or '')
+    return digits if len(digits) == 8 else None
+
+
+def _coordinate(value):
+    return Decimal(value).quantize(COORDINATE_PLACES)
+
+
+def centroids(zip_codes):
+    """
+    {zip code: (latitude, longitude)} for normalized CEPs, with one query for
+    the exact matches and one for the sector averages of the rest.
+    """
+    zip_codes = {zip_code for zip_code in zip_codes if zip_code}
+    found = {
+        zip_code: (latitude, longitude)
+        for zip_code, latitude, longitude in ZipCodeCentroid.objects.filter(
+            zip_code__in=zip_codes
+        ).values_list('zip_code', 'latitude', 'longitude')
+    }
+
+    sectors = {zip_code[:SECTOR_LENGTH] for zip_code in zip_codes - set(found)}
+    if sectors:
+        # startswith keeps each sector a range scan of the unique index.
+        in_sectors = Q()
+        for sector in sectors:
+            in_sectors |= Q(zip_code__startswith=sector)
+        averages = {
+            sector: (_coordinate(latitude), _coordinate(longitude))
+            for sector, latitude, longitude in ZipCodeCentroid.objects.filter(in_sectors).annotate(
+                sector=Substr('zip_code', 1, SECTOR_LENGTH)
+            ).values('sector').annotate(
+                average_latitude=Avg('latitude'), average_longitude=Avg('longitude')
+            ).values_list('sector', 'average_latitude', 'average_longitude').order_by()
+        }
+        for zip_code in zip_codes - set(found):
+            if zip_code[:SECTOR_LENGTH] in averages:
+                found[zip_code] = averages[zip_code[:SECTOR_LENGTH]]
+    return found
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _cached_centroid(zip_code):
+    return centroids([zip_code]).get(zip_code)
+
+
+_table_versions = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _check_table_version():
+    global _table_versions, _checked_at
+
+    if time.monotonic() - _checked_at < CHECK_INTERVAL:
+        return
+    with _lock:
+        if time.monotonic() - _checked_at >= CHECK_INTERVAL:
+            current, _ = versions.current([SCOPE])
+            if current != _table_versions:
+                _cached_centroid.cache_clear()
+                _table_versions = current
+            _checked_at = time.monotonic()
+
+
+def lookup(zip_code):
+    """(latitude, longitude) for a CEP in any format, or None."""
+    zip_code = normalize_zip_code(zip_code)
+    if zip_code is None:
+        return None
+    _check_table_version()
+    return _cached_centroid(zip_code)
+
+
+def geocode(address):
+    """
+    Fill in the coordinates of an address about to be saved from its CEP,
+    or move them when its CEP changed. Coordinates that did not come from a
+    CEP are left alone.
+    """
+    zip_code = normalize_zip_code(address.zip_code)
+    if address.geocoded_zip_code:
+        if (address.latitude, address.longitude) != lookup(address.geocoded_zip_code):
+            # Edited since they were filled in: they are no longer ours.
+            address.geocoded_zip_code = ''
+        elif zip_code != address.geocoded_zip_code:
+            address.latitude = address.longitude = None
+            address.geocoded_zip_code = ''
+
+    if address.latitude is None or address.longitude is None:
+        centroid = lookup(zip_code)
+        if centroid:
+            address.latitude, address.longitude = centroid
+            address.geocoded_zip_code = zip_code
+
+
+def open_dataset(path):
+    """Open a CSV dataset, gzip-compressed when its name ends in .gz."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8-sig', newline='')
+    return open(path, encoding='utf-8-sig', newline='')
+
+
+def read_dataset(stream, delimiter=','):
+    """
+    Yield a ZipCodeCentroid per valid CSV row, or None for rows without a
+    valid CEP and coordinates. Columns are matched by COLUMN_ALIASES.
+    """
+    reader = csv.reader(stream, delimiter=delimiter)
+    header = [name.strip().lower() for name in next(reader, [])]
+    positions = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in header:
+                positions[column] = header.index(alias)
+                break
+    missing = {'zip_code', 'latitude', 'longitude'} - set(positions)
+    if missing:
+        raise ValueError(f'Colunas obrigatórias ausentes: {", ".join(sorted(missing))}')
+
+    for row in reader:
+        values = {
+            column: row[position].strip() if position < len(row) else ''
+            for column, position in positions.items()
+        }
+        zip_code = normalize_zip_code(values['zip_code'])
+        try:
+            latitude = _coordinate(values['latitude'].replace(',', '.'))
+            longitude = _coordinate(values['longitude'].replace(',', '.'))
+            # Comparisons also reject NaN.
+            valid = -90 <= latitude <= 90 and -180 <= longitude <= 180
+        except InvalidOperation:
+            valid = False
+        if zip_code is None or not valid:
+            yield None
+            continue
+        yield ZipCodeCentroid(
+            zip_code=zip_code, latitude=latitude, longitude=longitude,
+            city=values.get('city', '')[:100], state=values.get('state', '')[:2].upper(),
+        )
+
+
+def load(rows, batch_size=LOAD_BATCH_SIZE):
+    """
+    Replace the table with the given ZipCodeCentroid rows (None entries are
+    counted as skipped). Repeated CEPs keep their first row. Returns
+    (CEPs loaded, rows skipped).
+    """
+    skipped = 0
+    with transaction.atomic():
+        ZipCodeCentroid.objects.all().delete()
+        batch = []
+        for centroid in rows:
+            if centroid is None:
+                skipped += 1
+                continue
+            batch.append(centroid)
+            if len(batch) >= batch_size:
+                ZipCodeCentroid.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        ZipCodeCentroid.objects.bulk_create(batch, ignore_conflicts=True)
+        loaded = ZipCodeCentroid.objects.count()
+        versions.bump(SCOPE)
+    _cached_centroid.cache_clear()
+    return loaded, skipped
@@ -0,0 +1,197 @@
+"""
+Resized renditions of uploaded images.
+
+Image fields are registered with register(model, 'field'); the model needs a
+'<field>_renditions' JSONField next to the image field. After an instance is
+saved with a new image, a background worker thread makes a copy of it per
+size in RENDITIONS, in the source format (JPEG, or PNG for images with
+transparency) and in WebP, stores them under RENDITION_ROOT and writes their
+paths and dimensions to the JSON field:
+
+    {
+        "source": "locations/feira.jpg", "width": 4032, "height": 3024,
+        "renditions": {
+            "thumb": {"path": "renditions/locations/feira.jpg.thumb.jpg",
+                      "webp": "renditions/locations/feira.jpg.thumb.webp",
+                      "width": 160, "height": 120},
+            "medium": {...}
+        }
+    }
+
+Serializers render it with ImageRenditionsField. Until the worker is done
+(or if the file cannot be read) the field holds no renditions and clients
+fall back to the original image. Jobs live in memory only; the
+generate_image_renditions command catches up on anything a restart lost.
+"""
+import io
+import logging
+import queue
+import threading
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Bounding boxes: images are scaled down to fit, keeping their proportions,
+# and never scaled up.
+RENDITIONS = {
+    'thumb': (160, 160),
+    'medium': (800, 800),
+}
+
+RENDITION_ROOT = 'renditions'
+
+QUALITY = 80
+
+EXIF_ORIENTATION = 0x0112
+
+# (model, field name) pairs registered so far.
+registry = []
+
+
+def renditions_field(field_name):
+    return f'{field_name}_renditions'
+
+
+def register(model, field_name):
+    """Generate renditions for model.field_name whenever its image changes."""
+    registry.append((model, field_name))
+    post_save.connect(
+        partial(_schedule, field_name=field_name),
+        sender=model,
+        weak=False,
+        dispatch_uid=f'image_renditions:{model._meta.label}.{field_name}',
+    )
+
+
+def is_current(instance, field_name):
+    """Whether the stored renditions belong to the current image, if any."""
+    name = getattr(instance, field_name).name or ''
+    data = getattr(instance, renditions_field(field_name)) or {}
+    return data.get('source', '') == name
+
+
+def _schedule(sender, instance, field_name, **kwargs):
+    if not is_current(instance, field_name):
+        transaction.on_commit(partial(enqueue, sender._meta.label, instance.pk, field_name))
+
+
+def _image_format(image):
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    return ('PNG', 'png') if has_alpha else ('JPEG', 'jpg')
+
+
+def _save(path, image, image_format):
+    buffer = io.BytesIO()
+    options = {'optimize': True} if image_format == 'PNG' else {'quality': QUALITY}
+    image.save(buffer, image_format, **options)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    return default_storage.save(path, ContentFile(buffer.getvalue()))
+
+
+def generate(file):
+    """Write the renditions of an image file and return its data dict."""
+    file.open('rb')
+    try:
+        image = Image.open(file)
+        width, height = image.size
+        if image.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+            # Stored sideways; report the size it is displayed at.
+            width, height = height, width
+        # JPEGs can be decoded straight at a fraction of their size.
+        image.draft('RGB', max(RENDITIONS.values()))
+        image = ImageOps.exif_transpose(image)
+        image_format, extension = _image_format(image)
+        image = image.convert('RGBA' if image_format == 'PNG' else 'RGB')
+    finally:
+        file.close()
+
+    # The whole source name, extension included: storage keeps it unique, so
+    # feira.jpg and feira.png never share renditions.
+    stem = file.name
+    renditions = {}
+    # Largest first, so each size is scaled down from the previous one.
+    for name, size in sorted(RENDITIONS.items(), key=lambda item: item[1], reverse=True):
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        renditions[name] = {
+            'path': _save(f'{RENDITION_ROOT}/{stem}.{name}.{extension}', image, image_format),
+            'webp': _save(f'{RENDITION_ROOT}/{stem}.{name}.webp', image, 'WEBP'),
+            'width': image.width,
+            'height': image.height,
+        }
+    return {'source': file.name, 'width': width, 'height': height, 'renditions': renditions}
+
+
+def _paths(data):
+    return {
+        path
+        for rendition in (data or {}).get('renditions', {}).values()
+        for path in (rendition['path'], rendition['webp'])
+    }
+
+
+def process(label, pk, field_name, force=False):
+    """Bring the renditions of one instance's image up to date."""
+    model = apps.get_model(label)
+    instance = model._base_manager.filter(pk=pk).first()
+    if instance is None or (is_current(instance, field_name) and not force):
+        return
+
+    file = getattr(instance, field_name)
+    previous = getattr(instance, renditions_field(field_name))
+    data = {}
+    if file:
+        try:
+            data = generate(file)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.warning('Could not create renditions of %s', file.name, exc_info=True)
+            # Recorded so the same file is not retried on every save.
+            data = {'source': file.name}
+
+    # Files of an older image, or written under an older naming scheme.
+    for path in _paths(previous) - _paths(data):
+        default_storage.delete(path)
+    setattr(instance, renditions_field(field_name), data)
+    # A regular save, so the signals that refresh derived data see the change.
+    instance.save(update_fields=[renditions_field(field_name)])
+
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _work():
+    while True:
+        job = _queue.get()
+        try:
+            process(*job)
+        except Exception:
+            logger.exception('Image rendition job %s failed', job)
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def enqueue(label, pk, field_name):
+    """
+    Queue a rendition job for the worker thread, or run it right away when
+    settings.IMAGE_RENDITIONS_ASYNC is off.
+    """
+    global _worker
+    if not getattr(settings, 'IMAGE_RENDITIONS_ASYNC', True):
+        process(label, pk, field_name)
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='image-renditions', daemon=True)
+            _worker.start()
+    _queue.put((label, pk, field_name))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from apps.common import images
+
+
+class Command(BaseCommand):
+    help = 'Gera as versões redimensionadas (miniatura, média e WebP) das imagens enviadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Gera novamente as versões de todas as imagens, mesmo as já atualizadas'
+        )
+
+    def handle(self, *args, **options):
+        for model, field_name in images.registry:
+            rows = model._base_manager.only(
+                'pk', field_name, images.renditions_field(field_name)
+            ).order_by('pk')
+            total = 0
+            for instance in rows.iterator(chunk_size=500):
+                has_image = bool(getattr(instance, field_name))
+                if not images.is_current(instance, field_name) or (options['force'] and has_image):
+                    images.process(model._meta.label, instance.pk, field_name, force=options['force'])
+                    total += 1
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {model._meta.verbose_name_plural} ({field_name}): {total} imagens processadas'
+            ))
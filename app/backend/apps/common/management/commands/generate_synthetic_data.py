@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.common import synthetic
+
+
+class Command(BaseCommand):
+    help = 'Gera dados sintéticos em grande volume (usuários, produtores, localizações, favoritos, conversas, mensagens, atividades e notificações) para testes de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(synthetic.SCALES),
+            default='small',
+            help='Volumes pré-definidos (padrão: small; production = 1M localizações, 100k produtores, '
+                 '10M atividades, 50M mensagens e favoritos)'
+        )
+        for name in synthetic.PHASES:
+            parser.add_argument(
+                f'--{name.replace("_", "-")}',
+                type=int,
+                help=f'Quantidade de {name} (substitui o valor de --scale)'
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=synthetic.DEFAULT_SEED,
+            help=f'Semente aleatória; a mesma semente e o mesmo --chunk-size geram os mesmos dados '
+                 f'(padrão: {synthetic.DEFAULT_SEED})'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processos em paralelo (padrão: 1; SQLite usa sempre 1)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=synthetic.CHUNK_SIZE,
+            help=f'Linhas por lote de inserção (padrão: {synthetic.CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--skip-derived',
+            action='store_true',
+            help='Não reconstrói clusters, marcadores, índice de busca, postings e horários ao final'
+        )
+
+    def handle(self, *args, **options):
+        counts = dict(synthetic.SCALES[options['scale']])
+        for name in synthetic.PHASES:
+            if options[name] is not None:
+                counts[name] = options[name]
+        if any(count < 0 for count in counts.values()) or options['chunk_size'] < 1 or options['workers'] < 1:
+            raise CommandError('Quantidades devem ser positivas.')
+
+        def progress(phase, done, total):
+            if done == total or done % (options['chunk_size'] * 20) == 0:
+                self.stdout.write(f'  {phase}: {done}/{total}')
+
+        try:
+            synthetic.generate(
+                counts,
+                seed=options['seed'],
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                derived=not options['skip_derived'],
+                progress=progress,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS('✓ Dados sintéticos gerados'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.common import geocoding
+
+
+class Command(BaseCommand):
+    help = 'Carrega a tabela de coordenadas aproximadas por CEP a partir de um arquivo CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Arquivo CSV (ou .csv.gz) com as colunas cep, latitude e longitude'
+        )
+        parser.add_argument(
+            '--delimiter',
+            default=',',
+            help='Separador de colunas (padrão: ",")'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=geocoding.LOAD_BATCH_SIZE,
+            help=f'Tamanho dos lotes de inserção (padrão: {geocoding.LOAD_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with geocoding.open_dataset(options['path']) as stream:
+                loaded, skipped = geocoding.load(
+                    geocoding.read_dataset(stream, options['delimiter']),
+                    batch_size=options['batch_size']
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {loaded} CEPs carregados'))
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'⚠ {skipped} linhas ignoradas (CEP ou coordenadas inválidos)'))
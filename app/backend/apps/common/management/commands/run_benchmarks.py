@@ -0,0 +1,122 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.common import benchmarks, synthetic
+from apps.locations.models import Location
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede latência (percentis), consultas SQL e pico de memória dos endpoints mais usados '
+        'sobre um banco de teste com dados sintéticos e compara com uma execução anterior'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(synthetic.SCALES),
+            default='small',
+            help='Volume dos dados sintéticos (padrão: small)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=synthetic.DEFAULT_SEED,
+            help=f'Semente dos dados sintéticos (padrão: {synthetic.DEFAULT_SEED})'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processos usados para gerar os dados (padrão: 1)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=benchmarks.ITERATIONS,
+            help=f'Requisições medidas por endpoint (padrão: {benchmarks.ITERATIONS})'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=benchmarks.WARMUP,
+            help=f'Requisições de aquecimento por endpoint (padrão: {benchmarks.WARMUP})'
+        )
+        parser.add_argument(
+            '--only',
+            help='Endpoints a medir, separados por vírgula (padrão: todos)'
+        )
+        parser.add_argument(
+            '--output',
+            default='benchmark-results.json',
+            help='Arquivo JSON com os resultados (padrão: benchmark-results.json)'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Resultados JSON de uma execução anterior para detectar regressões'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=benchmarks.REGRESSION_THRESHOLD,
+            help=f'Aumento máximo tolerado de p95 e memória, em % (padrão: {benchmarks.REGRESSION_THRESHOLD:g})'
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Mantém o banco de teste (e seus dados) entre execuções (MySQL/PostgreSQL; o SQLite de teste fica em memória)'
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations deve ser maior que zero.')
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Não foi possível ler {options["baseline"]}: {exc}')
+        names = {name.strip() for name in (options['only'] or '').split(',') if name.strip()}
+        counts = dict(synthetic.SCALES[options['scale']])
+        if baseline is not None and baseline.get('dataset') != benchmarks.dataset(counts, options['seed']):
+            raise CommandError(
+                f'{options["baseline"]} foi medido com outros dados sintéticos '
+                f'({baseline.get("dataset")}); use os mesmos --scale e --seed.'
+            )
+
+        def progress(name, result):
+            self.stdout.write(
+                f'  {name}: p50 {result["p50_ms"]:.2f} ms, p95 {result["p95_ms"]:.2f} ms, '
+                f'{result["queries"]} consultas, {result["peak_memory_kb"]:.0f} KB (HTTP {result["status"]})'
+            )
+
+        runner = DiscoverRunner(interactive=False, keepdb=options['keepdb'], verbosity=0)
+        setup_test_environment()
+        old_config = runner.setup_databases()
+        try:
+            if not (options['keepdb'] and Location.objects.exists()):
+                self.stdout.write(f'Gerando dados sintéticos ({options["scale"]})...')
+                synthetic.generate(counts, seed=options['seed'], workers=options['workers'])
+            results = benchmarks.run(
+                names, iterations=options['iterations'], warmup=options['warmup'], progress=progress
+            )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(
+                benchmarks.report(results, counts, options['seed'], options['iterations']),
+                file, indent=2
+            )
+        self.stdout.write(self.style.SUCCESS(f'✓ Resultados em {options["output"]}'))
+
+        if baseline is not None:
+            regressions = benchmarks.compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError('Regressões de desempenho:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('✓ Nenhuma regressão em relação à linha de base'))
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['latitude', 'longitude'], name='common_addr_latitud_a5c826_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_address_coordinates_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=100, unique=True, verbose_name='Escopo')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Versão')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Versão de Dados',
+                'verbose_name_plural': 'Versões de Dados',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:30
+
+from django.db import migrations, models
+
+from apps.common.text import normalize_text
+
+
+def fill_normalized(apps, schema_editor):
+    Address = apps.get_model('common', 'Address')
+    batch = []
+    for row in Address.objects.only('pk', 'neighborhood', 'city').iterator(chunk_size=1000):
+        row.neighborhood_normalized = normalize_text(row.neighborhood)
+        row.city_normalized = normalize_text(row.city)
+        batch.append(row)
+        if len(batch) >= 1000:
+            Address.objects.bulk_update(batch, ['neighborhood_normalized', 'city_normalized'])
+            batch = []
+    Address.objects.bulk_update(batch, ['neighborhood_normalized', 'city_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_data_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='address',
+            name='city_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='address',
+            name='neighborhood_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_normalized, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0004_normalized_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZipCodeCentroid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zip_code', models.CharField(max_length=8, unique=True, verbose_name='CEP')),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('city', models.CharField(blank=True, max_length=100, verbose_name='Cidade')),
+                ('state', models.CharField(blank=True, max_length=2, verbose_name='Estado')),
+            ],
+            options={
+                'verbose_name': 'Centroide de CEP',
+                'verbose_name_plural': 'Centroides de CEP',
+            },
+        ),
+        migrations.AddField(
+            model_name='address',
+            name='geocoded_zip_code',
+            field=models.CharField(blank=True, editable=False, max_length=8),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from .text import normalize_text
 
 
 class TimeStampedModel(models.Model):
@@ -26,13 +27,64 @@ class Address(models.Model):
     
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    # CEP whose centroid the coordinates were filled in from, blank when they
+    # were given (see apps.common.geocoding).
+    geocoded_zip_code = models.CharField(max_length=8, blank=True, editable=False)
     
+    # Accent-folded copies for search and filters (see apps.common.text).
+    neighborhood_normalized = models.CharField(max_length=100, blank=True, editable=False, db_index=True)
+    city_normalized = models.CharField(max_length=100, blank=True, editable=False, db_index=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Endereço'
         verbose_name_plural = 'Endereços'
+        indexes = [
+            models.Index(fields=['latitude', 'longitude']),
+        ]
 
     def __str__(self):
         return f"{self.street}, {self.number} - {self.city}/{self.state}"
+
+    def save(self, *args, **kwargs):
+        self.neighborhood_normalized = normalize_text(self.neighborhood)
+        self.city_normalized = normalize_text(self.city)
+        super().save(*args, **kwargs)
+
+
+class DataVersion(models.Model):
+    """
+    Change counter for a scope of data (a table, or one user's favorites).
+    Bumped by signals and used to build HTTP validators (ETag/Last-Modified).
+    """
+    scope = models.CharField(max_length=100, unique=True, verbose_name='Escopo')
+    version = models.PositiveBigIntegerField(default=0, verbose_name='Versão')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Versão de Dados'
+        verbose_name_plural = 'Versões de Dados'
+
+    def __str__(self):
+        return f"{self.scope} v{self.version}"
+
+
+class ZipCodeCentroid(models.Model):
+    """
+    Approximate coordinates of a CEP, loaded from an offline dataset with the
+    load_zip_code_centroids command and used to geocode addresses.
+    """
+    zip_code = models.CharField(max_length=8, unique=True, verbose_name='CEP')
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    city = models.CharField(max_length=100, blank=True, verbose_name='Cidade')
+    state = models.CharField(max_length=2, blank=True, verbose_name='Estado')
+
+    class Meta:
+        verbose_name = 'Centroide de CEP'
+        verbose_name_plural = 'Centroides de CEP'
+
+    def __str__(self):
+        return f"{self.zip_code} ({self.latitude}, {self.longitude})"
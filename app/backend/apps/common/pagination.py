@@ -0,0 +1,188 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import Q
+from django.db.models.query import FlatValuesListIterable, ModelIterable
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page numbers by default; keyset (cursor) pages on request.
+
+    Sending ?cursor= (empty for the first page) switches to keyset pages: the
+    cursor holds the ordering values of the last row sent, and the next page
+    is read with a WHERE on those values instead of COUNT(*) + OFFSET, so page
+    5,000 costs the same as page 1 given an index on the ordering columns.
+    The queryset ordering (from the view or the model) gets the primary key
+    appended as a tie-breaker so rows with equal values are never skipped or
+    repeated. Keyset responses have next/previous links but no count.
+    """
+    cursor_query_param = 'cursor'
+    keyset_page_size_query_param = 'page_size'
+    keyset_max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self._keyset_page_size(request)
+        self.ordering = self._ordering(queryset)
+        reverse, position = self._decode(request.query_params[self.cursor_query_param])
+
+        ordering = [(name, not descending if reverse else descending) for name, descending in self.ordering]
+        queryset = queryset.order_by(*(f'-{name}' if descending else name for name, descending in ordering))
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Reading backwards, the page we came from is always after this one;
+        # reading forwards, the one we came from is always before it.
+        has_next = True if reverse else has_more
+        has_previous = has_more if reverse else position is not None
+
+        self.next_position = self.previous_position = None
+        if rows:
+            first, last = self._positions(queryset, [rows[0], rows[-1]])
+            self.next_position = last if has_next else None
+            self.previous_position = first if has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self._link(self.next_position, reverse=False),
+            'previous': self._link(self.previous_position, reverse=True),
+            'results': data,
+        })
+
+    def _keyset_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.keyset_page_size_query_param, self.page_size))
+        except ValueError:
+            raise serializers.ValidationError({'page_size': 'page_size inválido.'})
+        if not 1 <= page_size <= self.keyset_max_page_size:
+            raise serializers.ValidationError(
+                {'page_size': f'page_size deve estar entre 1 e {self.keyset_max_page_size}.'}
+            )
+        return page_size
+
+    @staticmethod
+    def _ordering(queryset):
+        """[(attname, descending)] of the queryset ordering plus the pk."""
+        opts = queryset.model._meta
+        ordering = []
+        for item in queryset.query.order_by or opts.ordering:
+            if not isinstance(item, str):
+                raise serializers.ValidationError({'cursor': 'Ordenação não suportada com cursor.'})
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            if name == 'pk':
+                name = opts.pk.name
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                field = None
+            if field is None or not field.concrete or field.null:
+                raise serializers.ValidationError({'cursor': 'Ordenação não suportada com cursor.'})
+            ordering.append((field.attname, descending))
+            if field.primary_key:
+                return ordering
+        ordering.append((opts.pk.attname, ordering[0][1] if ordering else False))
+        return ordering
+
+    @staticmethod
+    def _after(ordering, position):
+        """Rows strictly after position in the given ordering."""
+        q = Q()
+        for index, (name, descending) in enumerate(ordering):
+            step = Q(**{f'{name}__lt' if descending else f'{name}__gt': position[index]})
+            for previous_index in range(index):
+                step &= Q(**{ordering[previous_index][0]: position[previous_index]})
+            q |= step
+        return q
+
+    def _positions(self, queryset, rows):
+        """
+        Ordering values of the given rows: instances of queryset.model or its
+        primary keys from values_list('pk', flat=True). Any other rows, e.g.
+        the foreign keys of another model, would be looked up as the wrong
+        rows and send the cursor backwards, so they are refused.
+        """
+        names = [name for name, _ in self.ordering]
+        if queryset._iterable_class is ModelIterable:
+            return [[getattr(row, name) for name in names] for row in rows]
+        opts = queryset.model._meta
+        if not (
+            queryset._iterable_class is FlatValuesListIterable
+            and queryset._fields[0] in ('pk', opts.pk.name, opts.pk.attname)
+        ):
+            raise ImproperlyConfigured(
+                f'KeysetPagination needs {opts.label} instances or their primary keys, '
+                f'not values_list{queryset._fields}.'
+            )
+        values = {
+            row[-1]: list(row[:-1])
+            for row in queryset.model._base_manager.filter(pk__in=rows).values_list(*names, 'pk')
+        }
+        return [values[row] for row in rows]
+
+    def _encode(self, position, reverse):
+        payload = json.dumps({'r': reverse, 'p': [_dump(value) for value in position]})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def _decode(self, cursor):
+        if not cursor:
+            return False, None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(payload['p']) != len(self.ordering):
+                raise ValueError(cursor)
+            return bool(payload['r']), [_load(value) for value in payload['p']]
+        except (ValueError, TypeError, KeyError, InvalidOperation):
+            raise serializers.ValidationError({'cursor': 'Cursor inválido.'})
+
+    def _link(self, position, reverse):
+        if position is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self._encode(position, reverse))
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'n': str(value)}
+    return value
+
+
+def _load(value):
+    if not isinstance(value, dict):
+        return value
+    if 'dt' in value:
+        parsed = parse_datetime(value['dt'])
+    elif 'd' in value:
+        parsed = parse_date(value['d'])
+    else:
+        parsed = Decimal(value['n'])
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
@@ -0,0 +1,168 @@
+import copy
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+
+class ImageRenditionsField(serializers.ReadOnlyField):
+    """
+    URLs and sizes of the resized copies of an image, read from its
+    '<field>_renditions' data (see apps.common.images):
+
+        {"thumb": {"url": ..., "webp": ..., "width": 160, "height": 120}, "medium": {...}}
+
+    None until they have been generated.
+    """
+
+    def to_representation(self, value):
+        renditions = (value or {}).get('renditions')
+        if not renditions:
+            return None
+        request = self.context.get('request')
+
+        def url(path):
+            url = default_storage.url(path)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        return {
+            name: {
+                'url': url(rendition['path']),
+                'webp': url(rendition['webp']),
+                'width': rendition['width'],
+                'height': rendition['height'],
+            }
+            for name, rendition in renditions.items()
+        }
+
+
+def _split(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    ?fields= and ?expand= support for read-only serializer output.
+
+    ?fields=id,name,city lists the fields to return; without it every field
+    is returned. Fields named in Meta.expandable_fields (nested relations)
+    are returned when listed in fields or expand, and once either param is
+    sent, expandable fields that were not named are left out:
+
+        ?expand=                       every plain field, no nested relation
+        ?fields=id,name&expand=products
+
+    Only the top-level serializer of a response is trimmed. sparse_queryset()
+    derives the select_related, prefetch_related and only() calls a queryset
+    needs for the fields that will actually be rendered; Meta.prefetch_fields
+    maps the many-valued fields to their prefetch lookups.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    @classmethod
+    def requested_fields(cls, request):
+        """Names of the fields to render, or None to render them all."""
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None
+        params = request.query_params
+        if cls.fields_query_param not in params and cls.expand_query_param not in params:
+            return None
+
+        declared = cls.Meta.fields
+        expandable = set(getattr(cls.Meta, 'expandable_fields', ()))
+        fields = _split(params.get(cls.fields_query_param))
+        expand = _split(params.get(cls.expand_query_param))
+
+        plain = fields if fields else set(declared)
+        return {
+            name for name in declared
+            if (name in expandable and name in fields | expand) or
+               (name not in expandable and name in plain)
+        }
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root():
+            return fields
+        requested = self.requested_fields(self.context.get('request'))
+        if requested is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in requested}
+
+    @classmethod
+    def sparse_queryset(cls, queryset, request):
+        """
+        Replace the queryset's related loading with what the fields rendered
+        for this request need. Columns are only restricted when the request
+        asked for a field subset and every field maps to model columns.
+        """
+        fields = cls(context={'request': request}).fields
+        only, select, complete = set(), set(), True
+        prefetch = []
+        prefetch_fields = getattr(cls.Meta, 'prefetch_fields', {})
+
+        for name, field in fields.items():
+            if name in prefetch_fields:
+                # Prefetch objects are shared by every request; copy them.
+                prefetch.extend(copy.copy(lookup) for lookup in prefetch_fields[name])
+            elif not _collect(field, queryset.model, '', only, select):
+                complete = False
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if complete and cls.requested_fields(request) is not None:
+            queryset = queryset.only(*only, *select)
+        return queryset
+
+
+def _collect(field, model, prefix, only, select):
+    """
+    Add the column paths and select_related paths a serializer field reads
+    from model. Returns False when they cannot be worked out (method fields
+    without sources, properties, many-valued fields without a prefetch).
+    """
+    if isinstance(field, serializers.SerializerMethodField):
+        # Method fields declare nothing; they are expected to read the pk,
+        # annotations or prefetched data.
+        return True
+    if isinstance(field, serializers.ListSerializer) or field.source == '*':
+        return False
+
+    parts = field.source.split('.')
+    path = prefix
+    for index, attribute in enumerate(parts):
+        try:
+            model_field = model._meta.get_field(attribute)
+        except FieldDoesNotExist:
+            return False
+        if model_field.many_to_many or model_field.one_to_many:
+            return False
+
+        path = f'{path}__{attribute}' if path else attribute
+        remaining = parts[index + 1:]
+        if not model_field.is_relation:
+            only.add(path)
+            return not remaining
+
+        if not remaining and not isinstance(field, serializers.BaseSerializer):
+            # A related field rendered as its primary key only needs the
+            # foreign key column of this model.
+            only.add(path)
+            return True
+        select.add(path)
+        model = model_field.related_model
+
+    # A nested serializer: collect its own fields against the related model.
+    # Every child is visited so their select_related paths are all kept.
+    results = [_collect(child, model, path, only, select) for child in field.fields.values()]
+    return all(results)
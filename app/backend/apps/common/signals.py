@@ -0,0 +1,11 @@
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from . import geocoding
+from .models import Address
+
+
+@receiver(pre_save, sender=Address)
+def geocode_address(sender, instance, raw=False, **kwargs):
+    """Fill in missing coordinates from the CEP (see apps.common.geocoding)."""
+    if not raw:
+        geocoding.geocode(instance)
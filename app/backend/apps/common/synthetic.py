@@ -0,0 +1,656 @@
+"""
+Synthetic data at production scale, for load tests.
+
+generate() writes users (with their notification preferences), producer
+profiles, addresses, locations with their products, favorites, conversations
+with their participants, messages, activity logs and notifications, using the
+product catalogue of seed_sao_paulo_locations.
+
+Every phase is split in chunks of chunk_size rows written with one
+bulk_create per model and transaction. Primary keys are assigned up front
+from the current maximum of each table, so chunks never depend on each
+other: they can run in any order, in several processes, and every foreign
+key is computed from the index of the row it points to (the producer of
+location j, the participants of conversation k) instead of being read back.
+Each chunk draws from its own random generator seeded with (seed, phase,
+first row), so the same seed and chunk size give the same data whatever the
+number of workers.
+
+Locations are spread over the largest Brazilian metropolitan areas, weighted
+by population, with São Paulo around the neighbourhoods of the seed command.
+Favorites, activity logs and messages follow a long-tailed popularity, so a
+few locations and conversations get most of the traffic.
+
+bulk_create skips Model.save() and signals: normalized columns are filled in
+here, and the derived location tables are rebuilt once at the end.
+"""
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import DateTimeField, Max
+from django.utils import timezone
+
+from apps.analytics.models import ActivityLog
+from apps.chat.models import Conversation, Message
+from apps.favorites.models import Favorite
+from apps.locations import clustering, opening_hours, postings, search, snapshot
+from apps.locations.models import Location
+from apps.notifications.models import Notification, NotificationPreference
+from apps.producers.models import ProducerProfile
+from apps.products import search as product_search
+from apps.products.models import Category, Product
+from apps.users.models import User
+from . import versions
+from .models import Address
+from .text import normalize_text
+
+CHUNK_SIZE = 5000
+
+DEFAULT_SEED = 42
+
+EMAIL_DOMAIN = 'sintetico.acheseuorganico.dev'
+
+PASSWORD = 'senha123'
+
+# Timestamps are spread over this many days before the run.
+HISTORY_DAYS = 365
+
+CATEGORIES = [
+    {'name': 'Verduras', 'slug': 'verduras', 'icon': '🥬', 'description': 'Alface, couve, rúcula, etc'},
+    {'name': 'Legumes', 'slug': 'legumes', 'icon': '🥕', 'description': 'Cenoura, beterraba, abobrinha, etc'},
+    {'name': 'Frutas', 'slug': 'frutas', 'icon': '🍎', 'description': 'Maçã, banana, laranja, etc'},
+    {'name': 'Hortaliças', 'slug': 'hortalicas', 'icon': '🌿', 'description': 'Tomate, pimentão, pepino, etc'},
+    {'name': 'Grãos e Cereais', 'slug': 'graos-cereais', 'icon': '🌾', 'description': 'Arroz, feijão, milho, etc'},
+    {'name': 'Temperos', 'slug': 'temperos', 'icon': '🌶️', 'description': 'Alho, cebola, manjericão, etc'},
+    {'name': 'Ovos e Laticínios', 'slug': 'ovos-laticinios', 'icon': '🥚', 'description': 'Ovos caipiras, queijos artesanais'},
+]
+
+PRODUCTS = {
+    'verduras': ['Alface Crespa', 'Alface Americana', 'Couve', 'Rúcula', 'Agrião', 'Escarola'],
+    'legumes': ['Cenoura', 'Beterraba', 'Abobrinha', 'Berinjela', 'Chuchu', 'Batata Doce'],
+    'frutas': ['Banana Prata', 'Laranja Lima', 'Limão Taiti', 'Maçã Gala', 'Mamão Papaya', 'Goiaba'],
+    'hortalicas': ['Tomate Italiano', 'Pimentão Verde', 'Pepino Japonês', 'Jiló', 'Quiabo', 'Vagem'],
+    'graos-cereais': ['Feijão Carioca', 'Arroz Integral', 'Milho Verde', 'Ervilha', 'Grão de Bico'],
+    'temperos': ['Cebolinha', 'Salsa', 'Coentro', 'Manjericão', 'Alecrim', 'Hortelã'],
+    'ovos-laticinios': ['Ovos Caipira', 'Queijo Minas', 'Requeijão Artesanal', 'Iogurte Natural'],
+}
+
+SAO_PAULO_NEIGHBORHOODS = [
+    {'name': 'Vila Madalena', 'lat': -23.5505, 'lng': -46.6875, 'street_prefix': 'Rua'},
+    {'name': 'Pinheiros', 'lat': -23.5689, 'lng': -46.6903, 'street_prefix': 'Avenida'},
+    {'name': 'Moema', 'lat': -23.5966, 'lng': -46.6612, 'street_prefix': 'Rua'},
+    {'name': 'Itaim Bibi', 'lat': -23.5844, 'lng': -46.6773, 'street_prefix': 'Rua'},
+    {'name': 'Vila Mariana', 'lat': -23.5880, 'lng': -46.6354, 'street_prefix': 'Rua'},
+    {'name': 'Jardins', 'lat': -23.5675, 'lng': -46.6561, 'street_prefix': 'Alameda'},
+    {'name': 'Perdizes', 'lat': -23.5362, 'lng': -46.6748, 'street_prefix': 'Rua'},
+    {'name': 'Santana', 'lat': -23.5055, 'lng': -46.6291, 'street_prefix': 'Rua'},
+    {'name': 'Tatuapé', 'lat': -23.5388, 'lng': -46.5772, 'street_prefix': 'Rua'},
+    {'name': 'Brooklin', 'lat': -23.6137, 'lng': -46.6970, 'street_prefix': 'Avenida'},
+    {'name': 'Ipiranga', 'lat': -23.5925, 'lng': -46.5998, 'street_prefix': 'Rua'},
+    {'name': 'Lapa', 'lat': -23.5280, 'lng': -46.7016, 'street_prefix': 'Rua'},
+    {'name': 'Butantã', 'lat': -23.5680, 'lng': -46.7280, 'street_prefix': 'Avenida'},
+    {'name': 'Saúde', 'lat': -23.6172, 'lng': -46.6393, 'street_prefix': 'Rua'},
+    {'name': 'Penha', 'lat': -23.5280, 'lng': -46.5381, 'street_prefix': 'Rua'},
+]
+
+STREET_NAMES = [
+    'das Flores', 'dos Orgânicos', 'da Agricultura', 'Verde', 'da Natureza',
+    'dos Produtores', 'da Colheita', 'do Campo', 'da Horta', 'Sustentável',
+    'Ecológica', 'da Terra Boa', 'do Plantio', 'da Semente'
+]
+
+PRODUCER_NAMES = [
+    'Sítio Verde Vida', 'Fazenda Orgânica Paulista', 'Horta da Terra',
+    'Rancho da Natureza', 'Chácara Boa Colheita', 'Fazenda São José',
+    'Sítio Caminho Verde', 'Horta Sustentável', 'Fazenda Raízes',
+    'Chácara Bela Vista', 'Sítio Flor do Campo', 'Horta Natural',
+    'Fazenda Vale Verde', 'Rancho do Sol', 'Chácara Campo Feliz',
+]
+
+FIRST_NAMES = ['João', 'Maria', 'Pedro', 'Ana', 'Carlos', 'Juliana', 'Roberto', 'Fernanda', 'Paulo', 'Beatriz']
+LAST_NAMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Costa', 'Pereira', 'Rodrigues', 'Almeida', 'Lima', 'Ferreira']
+
+OPERATION_DAYS = [
+    'Sábado', 'Quarta e Sábado', 'Segunda a Sábado',
+    'Terça a Domingo', 'Domingo', 'Segunda a Sexta'
+]
+OPERATION_HOURS = [
+    '7h às 13h', '6h às 12h', '8h às 14h',
+    '7h às 12h', '9h às 15h', '6h30 às 13h30'
+]
+
+NEIGHBORHOODS = [
+    'Centro', 'Jardim América', 'Vila Nova', 'Boa Vista', 'Santa Cruz',
+    'Bela Vista', 'São José', 'Jardim das Flores', 'Vila Operária', 'Alto da Serra',
+]
+
+# (city, state, latitude, longitude, weight, spread in km, CEP prefix range).
+# The weights follow the metropolitan populations; spread is the standard
+# deviation of the distance to the centre.
+REGIONS = [
+    ('São Paulo', 'SP', -23.5505, -46.6333, 30, 2.5, (1000, 5999)),
+    ('Guarulhos', 'SP', -23.4538, -46.5333, 3, 4.0, (7000, 7399)),
+    ('Santo André', 'SP', -23.6639, -46.5383, 2, 3.0, (9000, 9299)),
+    ('Campinas', 'SP', -22.9099, -47.0626, 3, 5.0, (13000, 13149)),
+    ('Rio de Janeiro', 'RJ', -22.9068, -43.1729, 16, 9.0, (20000, 23799)),
+    ('Belo Horizonte', 'MG', -19.9167, -43.9345, 7, 6.0, (30000, 31999)),
+    ('Brasília', 'DF', -15.7939, -47.8828, 6, 10.0, (70000, 72799)),
+    ('Curitiba', 'PR', -25.4284, -49.2733, 5, 6.0, (80000, 82999)),
+    ('Porto Alegre', 'RS', -30.0346, -51.2177, 5, 6.0, (90000, 91999)),
+    ('Salvador', 'BA', -12.9777, -38.5016, 5, 7.0, (40000, 42599)),
+    ('Recife', 'PE', -8.0476, -34.8770, 5, 5.0, (50000, 52999)),
+    ('Fortaleza', 'CE', -3.7319, -38.5267, 5, 6.0, (60000, 61599)),
+    ('Goiânia', 'GO', -16.6869, -49.2648, 3, 6.0, (74000, 74899)),
+    ('Florianópolis', 'SC', -27.5954, -48.5480, 2, 6.0, (88000, 88099)),
+    ('Manaus', 'AM', -3.1190, -60.0217, 3, 7.0, (69000, 69099)),
+    ('Belém', 'PA', -1.4558, -48.4902, 3, 5.0, (66000, 66999)),
+]
+_REGION_WEIGHTS = [region[4] for region in REGIONS]
+
+LOCATION_TYPES = [('FAIR', 5), ('STORE', 3), ('DELIVERY', 2)]
+
+ACTIVITY_TYPES = [
+    (ActivityLog.ActivityType.LOCATION_VIEW, 40),
+    (ActivityLog.ActivityType.LOCATION_CLICK, 15),
+    (ActivityLog.ActivityType.PRODUCT_VIEW, 12),
+    (ActivityLog.ActivityType.PRODUCER_VIEW, 8),
+    (ActivityLog.ActivityType.SEARCH, 12),
+    (ActivityLog.ActivityType.FAVORITE_ADD, 3),
+    (ActivityLog.ActivityType.FAVORITE_REMOVE, 1),
+    (ActivityLog.ActivityType.PHONE_CLICK, 3),
+    (ActivityLog.ActivityType.WHATSAPP_CLICK, 4),
+    (ActivityLog.ActivityType.DIRECTIONS_CLICK, 2),
+]
+
+NOTIFICATION_TYPES = [
+    (Notification.NotificationType.MESSAGE, 60, 'Nova mensagem', 'Você recebeu uma nova mensagem.'),
+    (Notification.NotificationType.FAVORITE, 25, 'Novo favorito', 'Alguém favoritou sua localização.'),
+    (Notification.NotificationType.SYSTEM, 8, 'Novidades', 'Confira as novidades do Ache Seu Orgânico.'),
+    (Notification.NotificationType.LOCATION_VERIFIED, 4, 'Localização verificada', 'Sua localização foi verificada.'),
+    (Notification.NotificationType.WELCOME, 3, 'Bem-vindo(a)!', 'Que bom ter você no Ache Seu Orgânico.'),
+]
+
+MESSAGES = [
+    'Olá! Vocês têm {product} hoje?',
+    'Qual o horário da feira neste sábado?',
+    'Fazem entrega no meu bairro?',
+    'Obrigado, chegou tudo certinho!',
+    'Ainda tem {product}? Quero reservar.',
+    'Sim, temos! Pode passar a partir das 7h.',
+    'Aceitam Pix?',
+    'Qual o valor da cesta semanal?',
+]
+
+SEARCHES = ['feira', 'orgânico', 'tomate', 'alface', 'ovos caipira', 'entrega', 'pinheiros', 'banana']
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Linux; Android 13) AppleWebKit/537.36 Chrome/120.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36',
+]
+
+KM_PER_DEGREE = 111.32
+
+COORDINATE_PLACES = Decimal('0.000001')
+
+# Phases in the order they are written; 'users' are consumers (every
+# producer gets its own user as well).
+PHASES = ('users', 'producers', 'locations', 'favorites', 'conversations',
+          'messages', 'activity_logs', 'notifications')
+
+# Row counts per phase of the named dataset sizes.
+SCALES = {
+    'small': dict(zip(PHASES, (1000, 100, 1000, 5000, 500, 5000, 20000, 5000))),
+    'medium': dict(zip(PHASES, (100000, 10000, 100000, 500000, 50000, 500000, 1000000, 500000))),
+    'production': dict(zip(PHASES, (
+        1000000, 100000, 1000000, 50000000, 5000000, 50000000, 10000000, 10000000
+    ))),
+}
+
+_MULTIPLIER = 2654435761
+
+
+def ensure_catalog():
+    """Create the categories and products of the seed catalogue; returns the products."""
+    categories = {}
+    for data in CATEGORIES:
+        categories[data['slug']], _ = Category.objects.get_or_create(slug=data['slug'], defaults=data)
+    products = []
+    for slug, names in PRODUCTS.items():
+        for name in names:
+            product, _ = Product.objects.get_or_create(
+                name=name,
+                category=categories[slug],
+                defaults={'description': f'{name} orgânico(a) de qualidade superior'}
+            )
+            products.append(product)
+    return products
+
+
+def _spread(index, count, salt):
+    """A fixed pseudo-random integer in [0, count) for index."""
+    return ((index + salt) * _MULTIPLIER >> 7) % count
+
+
+def _popular(rng, count):
+    """An index in [0, count) with a long-tailed popularity, shuffled over the range."""
+    raw = int(count * rng.random() ** 3)
+    return _spread(raw, count, 17)
+
+
+def _weighted(rng, choices):
+    return rng.choices([choice for choice, *_ in choices], weights=[choice[1] for choice in choices])[0]
+
+
+@contextmanager
+def _manual_timestamps(*models):
+    """Let bulk_create keep the given created_at/updated_at values."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if isinstance(field, DateTimeField) and (field.auto_now or field.auto_now_add)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Plan:
+    """
+    Row counts, seed and first primary key of every generated table, shared
+    by all the chunks of a run.
+    """
+
+    def __init__(self, counts, seed=DEFAULT_SEED, chunk_size=CHUNK_SIZE):
+        self.counts = {phase: counts.get(phase, 0) for phase in PHASES}
+        if self.counts['locations'] and not self.counts['producers']:
+            raise ValueError('Localizações precisam de produtores.')
+        if self.counts['favorites'] or self.counts['conversations'] or self.counts['activity_logs']:
+            if not self.counts['locations']:
+                raise ValueError('Favoritos, conversas e atividades precisam de localizações.')
+        if self.counts['messages'] and not self.counts['conversations']:
+            raise ValueError('Mensagens precisam de conversas.')
+
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.now = timezone.now()
+        self.password = make_password(PASSWORD)
+        self.product_ids = [product.pk for product in ensure_catalog()]
+
+        def first_pk(model):
+            return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+        self.user_base = first_pk(User)
+        self.producer_base = first_pk(ProducerProfile)
+        self.address_base = first_pk(Address)
+        self.location_base = first_pk(Location)
+        self.conversation_base = first_pk(Conversation)
+
+    @property
+    def producers(self):
+        return self.counts['producers']
+
+    @property
+    def consumers(self):
+        return self.counts['users']
+
+    def producer_user_id(self, producer_index):
+        return self.user_base + producer_index
+
+    def consumer_user_id(self, consumer_index):
+        return self.user_base + self.producers + consumer_index
+
+    def producer_of_location(self, location_index):
+        """Every producer gets a location before any gets a second one."""
+        if location_index < self.producers:
+            return location_index
+        return _spread(location_index, self.producers, 1)
+
+    def conversation_users(self, conversation_index):
+        """(consumer user id, producer user id) of a conversation."""
+        consumer = _spread(conversation_index, max(self.consumers, 1), 3)
+        producer = _spread(conversation_index, self.producers, 5)
+        consumer_id = self.consumer_user_id(consumer) if self.consumers else self.producer_user_id(
+            _spread(conversation_index, self.producers, 7)
+        )
+        return consumer_id, self.producer_user_id(producer)
+
+    def conversation_started_at(self, conversation_index):
+        seconds = _spread(conversation_index, HISTORY_DAYS * 86400, 11)
+        return self.now - timedelta(seconds=seconds)
+
+    def moment(self, rng):
+        """A time in the history window, with more recent times more likely."""
+        return self.now - timedelta(seconds=HISTORY_DAYS * 86400 * rng.random() ** 1.5)
+
+    def tasks(self, phase):
+        """(phase, start, stop) chunks of a phase."""
+        total = self.counts[phase]
+        if phase == 'users':
+            total += self.producers
+        return [
+            (phase, start, min(start + self.chunk_size, total))
+            for start in range(0, total, self.chunk_size)
+        ]
+
+
+def _point(rng):
+    """(city, state, neighbourhood, street prefix, latitude, longitude, CEP)."""
+    city, state, latitude, longitude, _, spread_km, (cep_low, cep_high) = rng.choices(
+        REGIONS, weights=_REGION_WEIGHTS
+    )[0]
+    if city == 'São Paulo':
+        neighborhood = rng.choice(SAO_PAULO_NEIGHBORHOODS)
+        name, prefix = neighborhood['name'], neighborhood['street_prefix']
+        latitude, longitude = neighborhood['lat'], neighborhood['lng']
+    else:
+        name, prefix = rng.choice(NEIGHBORHOODS), rng.choice(('Rua', 'Rua', 'Avenida'))
+    latitude += rng.gauss(0, spread_km) / KM_PER_DEGREE
+    longitude += rng.gauss(0, spread_km) / (KM_PER_DEGREE * math.cos(math.radians(latitude)))
+    zip_code = f'{rng.randint(cep_low, cep_high):05d}-{rng.randint(0, 999):03d}'
+    return (
+        city, state, name, prefix,
+        Decimal(latitude).quantize(COORDINATE_PLACES),
+        Decimal(longitude).quantize(COORDINATE_PLACES),
+        zip_code,
+    )
+
+
+def _users(plan, rng, start, stop):
+    users, preferences = [], []
+    for index in range(start, stop):
+        pk = plan.user_base + index
+        producer = index < plan.producers
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        joined = plan.moment(rng)
+        users.append(User(
+            pk=pk,
+            email=f'usuario{pk}@{EMAIL_DOMAIN}',
+            password=plan.password,
+            first_name=first_name,
+            last_name=last_name,
+            user_type=User.UserType.PRODUCER if producer else User.UserType.CONSUMER,
+            phone=f'(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}',
+            date_joined=joined,
+            created_at=joined,
+            updated_at=joined,
+        ))
+        preferences.append(NotificationPreference(user_id=pk, created_at=joined, updated_at=joined))
+    User.objects.bulk_create(users)
+    NotificationPreference.objects.bulk_create(preferences)
+
+
+def _producers(plan, rng, start, stop):
+    profiles = []
+    for index in range(start, stop):
+        created = plan.moment(rng)
+        name = f'{rng.choice(PRODUCER_NAMES)} {index + 1}'
+        profiles.append(ProducerProfile(
+            pk=plan.producer_base + index,
+            user_id=plan.producer_user_id(index),
+            business_name=name,
+            description=(
+                'Produção orgânica certificada de hortaliças, frutas e verduras frescas. '
+                f'Cultivamos com amor e respeito à natureza há mais de {rng.randint(5, 20)} anos.'
+            ),
+            has_organic_certification=rng.random() < 0.75,
+            certification_details=rng.choice(('IBD - Instituto Biodinâmico', 'Orgânico Brasil')),
+            whatsapp=f'11 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}',
+            instagram='@' + normalize_text(name).replace(' ', ''),
+            is_verified=rng.random() < 0.66,
+            created_at=created,
+            updated_at=created,
+        ))
+    ProducerProfile.objects.bulk_create(profiles)
+
+
+def _locations(plan, rng, start, stop):
+    addresses, locations, products = [], [], []
+    for index in range(start, stop):
+        city, state, neighborhood, prefix, latitude, longitude, zip_code = _point(rng)
+        producer_index = plan.producer_of_location(index)
+        location_type = _weighted(rng, LOCATION_TYPES)
+        name = {
+            'FAIR': f'Feira Orgânica {neighborhood}',
+            'STORE': f'Loja Orgânica {neighborhood}',
+            'DELIVERY': f'Delivery Orgânico {city}',
+        }[location_type]
+        created = plan.moment(rng)
+        address_pk = plan.address_base + index
+        location_pk = plan.location_base + index
+        addresses.append(Address(
+            pk=address_pk,
+            street=f'{prefix} {rng.choice(STREET_NAMES)}',
+            number=str(rng.randint(10, 9999)),
+            complement=rng.choice(('', '', '', 'Loja 1', 'Box 12', 'Barraca 5')),
+            neighborhood=neighborhood,
+            city=city,
+            state=state,
+            zip_code=zip_code,
+            latitude=latitude,
+            longitude=longitude,
+            neighborhood_normalized=normalize_text(neighborhood),
+            city_normalized=normalize_text(city),
+            created_at=created,
+            updated_at=created,
+        ))
+        locations.append(Location(
+            pk=location_pk,
+            producer_id=plan.producer_base + producer_index,
+            name=name,
+            location_type=location_type,
+            description=f'{name}. Direto do produtor para sua mesa.',
+            address_id=address_pk,
+            operation_days=rng.choice(OPERATION_DAYS),
+            operation_hours=rng.choice(OPERATION_HOURS),
+            phone=f'(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}',
+            is_active=rng.random() < 0.97,
+            is_verified=rng.random() < 0.6,
+            created_at=created,
+            updated_at=created,
+        ))
+        for product_id in rng.sample(plan.product_ids, min(rng.randint(3, 8), len(plan.product_ids))):
+            products.append(Location.products.through(location_id=location_pk, product_id=product_id))
+    Address.objects.bulk_create(addresses)
+    Location.objects.bulk_create(locations)
+    Location.products.through.objects.bulk_create(products)
+
+
+def _favorites(plan, rng, start, stop):
+    favorites = []
+    users = plan.consumers or plan.producers
+    user_id = plan.consumer_user_id if plan.consumers else plan.producer_user_id
+    for _ in range(start, stop):
+        created = plan.moment(rng)
+        favorites.append(Favorite(
+            user_id=user_id(rng.randrange(users)),
+            location_id=plan.location_base + _popular(rng, plan.counts['locations']),
+            created_at=created,
+            updated_at=created,
+        ))
+    # A repeated (user, location) pair is skipped.
+    Favorite.objects.bulk_create(favorites, ignore_conflicts=True)
+
+
+def _conversations(plan, rng, start, stop):
+    conversations, participants = [], []
+    through = Conversation.participants.through
+    for index in range(start, stop):
+        pk = plan.conversation_base + index
+        started = plan.conversation_started_at(index)
+        conversations.append(Conversation(pk=pk, created_at=started, updated_at=started))
+        for user_id in dict.fromkeys(plan.conversation_users(index)):
+            participants.append(through(conversation_id=pk, user_id=user_id))
+    Conversation.objects.bulk_create(conversations)
+    through.objects.bulk_create(participants)
+
+
+def _messages(plan, rng, start, stop):
+    messages = []
+    for _ in range(start, stop):
+        conversation = _popular(rng, plan.counts['conversations'])
+        started = plan.conversation_started_at(conversation)
+        sent = min(started + timedelta(seconds=rng.randint(0, 30 * 86400)), plan.now)
+        product = rng.choice(PRODUCTS[rng.choice(list(PRODUCTS))])
+        messages.append(Message(
+            conversation_id=plan.conversation_base + conversation,
+            sender_id=rng.choice(plan.conversation_users(conversation)),
+            content=rng.choice(MESSAGES).format(product=product.lower()),
+            is_read=sent < plan.now - timedelta(days=2) or rng.random() < 0.5,
+            created_at=sent,
+        ))
+    Message.objects.bulk_create(messages)
+
+
+def _activity_logs(plan, rng, start, stop):
+    logs = []
+    for _ in range(start, stop):
+        activity_type = _weighted(rng, ACTIVITY_TYPES)
+        location_index = _popular(rng, plan.counts['locations'])
+        user_id = None
+        if plan.consumers and rng.random() < 0.6:
+            user_id = plan.consumer_user_id(rng.randrange(plan.consumers))
+        log = ActivityLog(
+            activity_type=activity_type,
+            user_id=user_id,
+            ip_address=f'177.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+            user_agent=rng.choice(USER_AGENTS),
+            created_at=plan.moment(rng),
+        )
+        log.updated_at = log.created_at
+        if activity_type == ActivityLog.ActivityType.SEARCH:
+            log.metadata = {'query': rng.choice(SEARCHES)}
+        elif activity_type == ActivityLog.ActivityType.PRODUCT_VIEW:
+            log.product_id = rng.choice(plan.product_ids)
+        else:
+            log.location_id = plan.location_base + location_index
+            log.producer_id = plan.producer_base + plan.producer_of_location(location_index)
+        logs.append(log)
+    ActivityLog.objects.bulk_create(logs)
+
+
+def _notifications(plan, rng, start, stop):
+    notifications = []
+    users = plan.producers + plan.consumers
+    for _ in range(start, stop):
+        notification_type, weight, title, message = rng.choices(
+            NOTIFICATION_TYPES, weights=[choice[1] for choice in NOTIFICATION_TYPES]
+        )[0]
+        created = plan.moment(rng)
+        is_read = rng.random() < 0.7
+        notifications.append(Notification(
+            recipient_id=plan.user_base + rng.randrange(users),
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            is_read=is_read,
+            read_at=created + timedelta(hours=rng.randint(1, 72)) if is_read else None,
+            created_at=created,
+            updated_at=created,
+        ))
+    Notification.objects.bulk_create(notifications)
+
+
+_WRITERS = {
+    'users': (_users, (User, NotificationPreference)),
+    'producers': (_producers, (ProducerProfile,)),
+    'locations': (_locations, (Address, Location)),
+    'favorites': (_favorites, (Favorite,)),
+    'conversations': (_conversations, (Conversation,)),
+    'messages': (_messages, (Message,)),
+    'activity_logs': (_activity_logs, (ActivityLog,)),
+    'notifications': (_notifications, (Notification,)),
+}
+
+
+def write_chunk(plan, task):
+    """Write one (phase, start, stop) chunk. Returns its number of rows."""
+    phase, start, stop = task
+    writer, models = _WRITERS[phase]
+    rng = random.Random(f'{plan.seed}:{phase}:{start}')
+    with _manual_timestamps(*models), transaction.atomic():
+        writer(plan, rng, start, stop)
+    return stop - start
+
+
+_worker_plan = None
+
+
+def _init_worker(plan):
+    global _worker_plan
+    import django
+    django.setup()
+    _worker_plan = plan
+
+
+def _write_in_worker(task):
+    return write_chunk(_worker_plan, task)
+
+
+def rebuild_derived():
+    """Rebuild the derived location tables and bump the versions of the generated data."""
+    clustering.rebuild()
+    opening_hours.rebuild()
+    snapshot.rebuild()
+    search.rebuild()
+    postings.rebuild()
+    product_search.rebuild()
+    versions.bump('locations', 'addresses', 'producers', 'products', 'categories')
+
+
+def generate(counts, seed=DEFAULT_SEED, chunk_size=CHUNK_SIZE, workers=1, derived=True, progress=None):
+    """
+    Generate counts[phase] rows for each of PHASES ('users' being consumers;
+    every producer also gets its own user). With workers > 1 the chunks of
+    each phase are written by that many processes; SQLite always uses one.
+    progress(phase, rows written, rows in phase) is called after each chunk.
+    Returns the Plan.
+    """
+    plan = Plan(counts, seed=seed, chunk_size=chunk_size)
+    if connection.vendor == 'sqlite':
+        workers = 1
+
+    pool = None
+    if workers > 1:
+        import multiprocessing
+        # Children must open their own connections.
+        connections.close_all()
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(plan,))
+    try:
+        for phase in PHASES:
+            tasks = plan.tasks(phase)
+            total = sum(stop - start for _, start, stop in tasks)
+            done = 0
+            results = (
+                pool.imap_unordered(_write_in_worker, tasks) if pool
+                else (write_chunk(plan, task) for task in tasks)
+            )
+            for rows in results:
+                done += rows
+                if progress:
+                    progress(phase, done, total)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    # Rows were written with explicit primary keys.
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [
+            User, ProducerProfile, Address, Location, Conversation
+        ]):
+            cursor.execute(sql)
+
+    if derived and plan.counts['locations']:
+        rebuild_derived()
+    return plan
@@ -0,0 +1,130 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from apps.products.models import Product
+from . import images
+from .serializers import ImageRenditionsField
+
+
+def image_bytes(size, mode='RGB', image_format='JPEG', orientation=None):
+    image = Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30))
+    options = {}
+    if orientation is not None:
+        exif = Image.Exif()
+        exif[images.EXIF_ORIENTATION] = orientation
+        options['exif'] = exif
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+class RenditionsSerializer(serializers.Serializer):
+    image_renditions = ImageRenditionsField()
+
+
+class ImageRenditionsTests(TestCase):
+    """Renditions written by apps.common.images and how they are served."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, IMAGE_RENDITIONS_ASYNC=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _stored(self, name, content):
+        """A stored image as generate() gets it: the FieldFile of a model."""
+        return Product.objects.create(name='Feira', image=SimpleUploadedFile(name, content)).image
+
+    def _open(self, path):
+        with default_storage.open(path) as file:
+            image = Image.open(file)
+            image.load()
+        return image
+
+    def test_sideways_jpeg_is_rotated_upright(self):
+        # Stored 400x200 but displayed 200x400.
+        file = self._stored('feira.jpg', image_bytes((400, 200), orientation=6))
+
+        data = images.generate(file)
+
+        self.assertEqual((data['width'], data['height']), (200, 400))
+        thumb = data['renditions']['thumb']
+        self.assertEqual((thumb['width'], thumb['height']), (80, 160))
+        self.assertEqual(thumb['path'], 'renditions/products/feira.jpg.thumb.jpg')
+        self.assertEqual(self._open(thumb['path']).size, (80, 160))
+        self.assertEqual(self._open(thumb['webp']).format, 'WEBP')
+
+    def test_transparent_png_keeps_its_alpha(self):
+        file = self._stored('feira.png', image_bytes((300, 300), 'RGBA', 'PNG'))
+
+        data = images.generate(file)
+
+        medium = data['renditions']['medium']
+        self.assertTrue(medium['path'].endswith('.png'))
+        self.assertEqual(self._open(medium['path']).mode, 'RGBA')
+
+    def test_same_name_with_other_extension_does_not_collide(self):
+        jpeg = images.generate(self._stored('feira.jpg', image_bytes((300, 200))))
+        png = images.generate(self._stored('feira.png', image_bytes((200, 300), 'RGBA', 'PNG')))
+
+        jpeg_paths = images._paths(jpeg)
+        self.assertFalse(jpeg_paths & images._paths(png))
+        for path in jpeg_paths:
+            self.assertTrue(default_storage.exists(path))
+        self.assertEqual(self._open(jpeg['renditions']['thumb']['webp']).size, (160, 107))
+
+    def test_process_records_unreadable_images(self):
+        product = Product.objects.create(
+            name='Banana', image=SimpleUploadedFile('banana.jpg', b'not an image')
+        )
+
+        with self.assertLogs('apps.common.images', 'WARNING'):
+            images.process('products.Product', product.pk, 'image')
+
+        product.refresh_from_db()
+        self.assertEqual(product.image_renditions, {'source': product.image.name})
+        self.assertTrue(images.is_current(product, 'image'))
+
+    def test_process_replaces_the_files_of_the_previous_image(self):
+        product = Product.objects.create(
+            name='Banana', image=SimpleUploadedFile('banana.jpg', image_bytes((300, 200)))
+        )
+        images.process('products.Product', product.pk, 'image')
+        product.refresh_from_db()
+        previous = images._paths(product.image_renditions)
+
+        product.image = SimpleUploadedFile('banana.png', image_bytes((300, 200), 'RGBA', 'PNG'))
+        product.save()
+        images.process('products.Product', product.pk, 'image')
+        product.refresh_from_db()
+
+        self.assertEqual(product.image_renditions['source'], product.image.name)
+        for path in previous:
+            self.assertFalse(default_storage.exists(path))
+        for path in images._paths(product.image_renditions):
+            self.assertTrue(default_storage.exists(path))
+
+    def test_field_renders_absolute_urls(self):
+        data = images.generate(self._stored('feira.jpg', image_bytes((300, 200))))
+        context = {'request': APIRequestFactory().get('/')}
+
+        rendered = RenditionsSerializer({'image_renditions': data}, context=context).data['image_renditions']
+
+        self.assertEqual(set(rendered), set(images.RENDITIONS))
+        self.assertEqual(
+            rendered['thumb']['url'],
+            'http://testserver/media/renditions/products/feira.jpg.thumb.jpg'
+        )
+        self.assertTrue(rendered['thumb']['webp'].endswith('feira.jpg.thumb.webp'))
+        self.assertEqual((rendered['thumb']['width'], rendered['thumb']['height']), (160, 107))
+        for pending in ({'source': 'products/feira.jpg'}, {}):
+            self.assertIsNone(RenditionsSerializer({'image_renditions': pending}).data['image_renditions'])
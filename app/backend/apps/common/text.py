@@ -0,0 +1,20 @@
+"""
+Text normalization shared by every search and filter path.
+
+Values are folded once, at write time, into *_normalized shadow columns, and
+query input goes through the same function, so "sao paulo" matches
+"São Paulo" with a plain indexed comparison.
+"""
+import unicodedata
+
+
+def normalize_text(value):
+    """
+    Accent-fold, lower-case and collapse whitespace:
+    "  Feira Orgânica  São Paulo" -> "feira organica sao paulo".
+    """
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    folded = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(folded.casefold().split())
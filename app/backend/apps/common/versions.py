@@ -0,0 +1,160 @@
+"""
+Per-scope data versions and conditional GET support.
+
+Models are tracked with track(); every save or delete bumps the version of
+their scope once its transaction commits, each in a short statement of its
+own. Data that is cached per row, such as one location, can have a version
+per row instead (see bump_rows), so a write only outdates its own rows. Views decorated with condition_on_versions() answer If-None-Match /
+If-Modified-Since with 304 using only the version rows, before any queryset
+is evaluated.
+"""
+import hashlib
+from functools import partial, wraps
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .models import DataVersion
+
+
+# Per-row versions incremented per statement by bump_rows.
+ROW_BATCH_SIZE = 500
+
+
+def user_scope(scope, user_id):
+    """Scope name for data that belongs to a single user."""
+    return f'{scope}:{user_id}'
+
+
+def row_scope(scope, pk):
+    """Scope name for the data of a single row, e.g. one location."""
+    return f'{scope}:{pk}'
+
+
+def bump(*scopes):
+    """
+    Increment the version of each scope once the current transaction commits
+    (right away outside of one), so validators never describe uncommitted
+    data and the version rows are not locked for the whole write.
+    """
+    transaction.on_commit(partial(_increment, scopes))
+
+
+def _increment(scopes):
+    now = timezone.now()
+    for scope in scopes:
+        versions = DataVersion.objects.filter(scope=scope)
+        if versions.update(version=F('version') + 1, updated_at=now):
+            continue
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(scope=scope, version=1)
+        except IntegrityError:
+            versions.update(version=F('version') + 1, updated_at=now)
+
+
+def bump_rows(scope, pks):
+    """
+    Increment the row_scope() version of each given row once the current
+    transaction commits, like bump(), ROW_BATCH_SIZE rows at a time: missing
+    version rows are inserted at 0 and the whole batch is incremented by one
+    UPDATE, so a change to thousands of rows stays a few statements.
+    """
+    scopes = sorted({row_scope(scope, pk) for pk in pks})
+    if scopes:
+        transaction.on_commit(partial(_increment_rows, scopes))
+
+
+def _increment_rows(scopes):
+    now = timezone.now()
+    for start in range(0, len(scopes), ROW_BATCH_SIZE):
+        batch = scopes[start:start + ROW_BATCH_SIZE]
+        DataVersion.objects.bulk_create(
+            [DataVersion(scope=scope, version=0) for scope in batch], ignore_conflicts=True
+        )
+        DataVersion.objects.filter(scope__in=batch).update(version=F('version') + 1, updated_at=now)
+
+
+def track(model, scope):
+    """Bump scope whenever an instance of model is saved or deleted."""
+    def handler(sender, **kwargs):
+        bump(scope)
+
+    uid = f'versions:{model._meta.label}:{scope}'
+    post_save.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+    if model._meta.auto_created:
+        # M2M through tables change through m2m_changed, not save/delete.
+        def m2m_handler(sender, action, **kwargs):
+            if action.startswith('post_'):
+                bump(scope)
+
+        m2m_changed.connect(m2m_handler, sender=model, weak=False, dispatch_uid=uid)
+
+
+def current(scopes):
+    """Return ({scope: version}, last modification time or None) in one query."""
+    rows = DataVersion.objects.filter(scope__in=scopes).values_list('scope', 'version', 'updated_at')
+    versions = {}
+    last_modified = None
+    for scope, version, updated_at in rows:
+        versions[scope] = version
+        last_modified = max(last_modified or updated_at, updated_at)
+    return versions, last_modified
+
+
+def condition_on_versions(*scopes, user_scopes=(), extra_key=None):
+    """
+    Decorator for viewset GET handlers. The ETag combines the versions of the
+    given scopes (plus the per-user scopes of the authenticated user), the
+    full path and the Accept header; Last-Modified is the latest change in any
+    scope. Matching validators get a 304 without running the view.
+
+    extra_key(request) may return a string for responses that also change
+    without any write, such as those that depend on the current time. It is
+    added to the ETag, and those responses get no Last-Modified.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_method(self, request, *args, **kwargs)
+
+            all_scopes = list(scopes)
+            if request.user.is_authenticated:
+                all_scopes += [user_scope(scope, request.user.pk) for scope in user_scopes]
+            versions, last_modified = current(all_scopes)
+            extra = extra_key(request) if extra_key else None
+            if extra is not None:
+                last_modified = None
+
+            key = '|'.join([
+                request.get_full_path(),
+                request.META.get('HTTP_ACCEPT', ''),
+                str(request.user.pk or ''),
+                *(f'{scope}={versions.get(scope, 0)}' for scope in all_scopes),
+                extra or '',
+            ])
+            etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(
+                request._request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response['ETag'] = etag
+            if timestamp:
+                response['Last-Modified'] = http_date(timestamp)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Accept', 'Authorization'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.common import versions
+from .models import Favorite
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def bump_user_favorites_version(sender, instance, **kwargs):
+    """Favorites change the is_favorited flags of a single user."""
+    versions.bump(versions.user_scope('favorites', instance.user_id))
@@ -2,10 +2,12 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from .models import Favorite
 from .serializers import FavoriteSerializer, FavoriteCreateSerializer
 from apps.locations.models import Location
+from apps.products.models import Product
 
 
 class FavoriteViewSet(viewsets.ModelViewSet):
@@ -21,7 +23,9 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         Only show current user's favorites.
         """
         return Favorite.objects.filter(user=self.request.user).select_related(
-            'location', 'location__address', 'location__producer'
+            'location', 'location__address', 'location__producer', 'location__producer__user'
+        ).prefetch_related(
+            Prefetch('location__products', queryset=Product.objects.select_related('category'))
         )
 
     def get_serializer_class(self):
@@ -0,0 +1,175 @@
+"""
+In-memory prefix autocomplete for the search box.
+
+Every process keeps a PrefixIndex of the suggestion vocabulary: cities,
+neighborhoods, producer names, product names and category names. Each
+suggestion carries a weight, which is how many active locations (or, for
+categories, products) it leads to. The index is a sorted array of
+accent-folded keys, one per word start, so a lookup is a binary search.
+The best completions of the shortest prefixes are precomputed, because
+those are the ones that match most of the vocabulary.
+
+The index is rebuilt when the DataVersion counters of its source tables
+move. Each process checks them at most every CHECK_INTERVAL seconds, so
+typeahead requests in between never touch the database.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+
+from django.db.models import Count, Q
+
+from apps.common import versions
+from apps.common.models import Address
+from apps.common.text import normalize_text
+from apps.producers.models import ProducerProfile
+from apps.products.models import Category, Product
+
+SCOPES = ('locations', 'addresses', 'producers', 'products', 'categories')
+
+# Seconds between checks of the data versions.
+CHECK_INTERVAL = 5.0
+
+MAX_LIMIT = 20
+
+# Prefixes up to this length answer from precomputed top-k lists.
+PRECOMPUTED_PREFIX_LENGTH = 2
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index over suggestions.
+
+    suggestions are dicts with at least 'type', 'value' and 'weight'; any
+    other keys (such as 'id') are returned as they are. Each suggestion can
+    be reached by a prefix of any of its words.
+    """
+
+    def __init__(self, suggestions):
+        self.suggestions = suggestions
+        keyed = sorted(
+            (normalized[start:], position)
+            for position, suggestion in enumerate(suggestions)
+            for normalized in [normalize_text(suggestion['value'])]
+            for start in self._word_starts(normalized)
+        )
+        self.keys = [key for key, _ in keyed]
+        self.positions = [position for _, position in keyed]
+
+        self.top = {}
+        for key, position in keyed:
+            for length in range(1, min(len(key), PRECOMPUTED_PREFIX_LENGTH) + 1):
+                self.top.setdefault(key[:length], set()).add(position)
+        self.top = {
+            prefix: self._best(positions, MAX_LIMIT) for prefix, positions in self.top.items()
+        }
+
+    @staticmethod
+    def _word_starts(normalized):
+        return [0] + [index + 1 for index, char in enumerate(normalized) if char == ' ']
+
+    def _best(self, positions, limit):
+        # Heaviest first; shorter values first among equals.
+        return heapq.nsmallest(
+            limit,
+            positions,
+            key=lambda position: (
+                -self.suggestions[position]['weight'],
+                len(self.suggestions[position]['value']),
+                position,
+            )
+        )
+
+    def complete(self, prefix, limit=10):
+        prefix = normalize_text(prefix)
+        if not prefix:
+            return []
+        if len(prefix) <= PRECOMPUTED_PREFIX_LENGTH:
+            positions = self.top.get(prefix, [])[:limit]
+        else:
+            start = bisect_left(self.keys, prefix)
+            end = bisect_left(self.keys, prefix + '\uffff', start)
+            positions = self._best(set(self.positions[start:end]), limit)
+        return [self.suggestions[position] for position in positions]
+
+
+def _merge(rows, suggestion_type):
+    """Collapse rows whose values only differ in accents or case."""
+    merged = {}
+    for value, weight in rows:
+        normalized = normalize_text(value)
+        if not normalized:
+            continue
+        current = merged.get(normalized)
+        if current is None:
+            merged[normalized] = {'type': suggestion_type, 'value': value, 'weight': weight}
+        else:
+            current['weight'] += weight
+    return list(merged.values())
+
+
+def load_suggestions():
+    """
+    Read the suggestion vocabulary with one grouped query per source.
+    Suggestions that lead to no active location are left out.
+    """
+    active_locations = Count('locations', filter=Q(locations__is_active=True))
+    addresses = Address.objects.filter(locations__is_active=True).order_by()
+
+    suggestions = _merge(
+        addresses.values_list('city').annotate(weight=Count('locations')), 'city'
+    )
+    suggestions += _merge(
+        addresses.values_list('neighborhood').annotate(weight=Count('locations')), 'neighborhood'
+    )
+    suggestions += [
+        {'type': 'producer', 'id': pk, 'value': name, 'weight': weight}
+        for pk, name, weight in ProducerProfile.objects.filter(is_active=True).annotate(
+            weight=active_locations
+        ).values_list('pk', 'business_name', 'weight')
+    ]
+    suggestions += [
+        {'type': 'product', 'id': pk, 'value': name, 'weight': weight}
+        for pk, name, weight in Product.objects.filter(is_active=True).annotate(
+            weight=active_locations
+        ).values_list('pk', 'name', 'weight')
+    ]
+    suggestions += [
+        {'type': 'category', 'id': pk, 'value': name, 'weight': weight}
+        for pk, name, weight in Category.objects.annotate(
+            weight=Count('products', filter=Q(products__is_active=True))
+        ).values_list('pk', 'name', 'weight')
+    ]
+    return [suggestion for suggestion in suggestions if suggestion['weight']]
+
+
+_index = None
+_index_versions = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_index():
+    """Return this process's index, rebuilding it if the data changed."""
+    global _index, _index_versions, _checked_at
+
+    if _index is not None and time.monotonic() - _checked_at < CHECK_INTERVAL:
+        return _index
+
+    with _lock:
+        if _index is None or time.monotonic() - _checked_at >= CHECK_INTERVAL:
+            current, _ = versions.current(SCOPES)
+            if _index is None or current != _index_versions:
+                _index = PrefixIndex(load_suggestions())
+                _index_versions = current
+            _checked_at = time.monotonic()
+    return _index
+
+
+def complete(prefix, limit=10):
+    """Return up to limit suggestions for a prefix, without their weights."""
+    return [
+        {key: value for key, value in suggestion.items() if key != 'weight'}
+        for suggestion in get_index().complete(prefix, min(limit, MAX_LIMIT))
+    ]
@@ -0,0 +1,292 @@
+"""
+Bulk import of locations from CSV or NDJSON.
+
+Creating locations one by one through LocationCreateUpdateSerializer costs an
+Address INSERT, a Location INSERT, a products.set() and a full refresh of the
+derived tables per row. Here the file is read as a stream, each row is
+validated by one reused LocationCreateUpdateSerializer, and the valid rows
+are written in chunks: one bulk_create each for addresses, locations and
+location products, followed by one bulk refresh of the derived tables, all
+in a transaction per chunk. A failing row never stops the import; it is
+reported with its line number and errors.
+
+CSV files have one column per field, with the address fields unprefixed
+(street, number, ..., latitude, longitude) and product_ids separated by ";".
+NDJSON rows are objects shaped like the create endpoint payload, with either
+a nested "address" object or the same flat address keys.
+"""
+import csv
+import io
+import json
+import re
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Max
+from rest_framework import serializers
+
+from apps.common import geocoding, versions
+from apps.common.models import Address
+from apps.common.text import normalize_text
+from apps.products.models import Product
+from . import clustering, opening_hours
+from .models import Location
+from .serializers import AddressSerializer, LocationCreateUpdateSerializer
+from .signals import refresh_read_models
+
+FORMATS = ('csv', 'ndjson')
+
+IMPORT_BATCH_SIZE = 1000
+
+# Errors listed in a report; the rest are only counted.
+MAX_REPORTED_ERRORS = 1000
+
+ADDRESS_FIELDS = tuple(name for name in AddressSerializer.Meta.fields if name != 'id')
+LOCATION_FIELDS = tuple(
+    name for name in LocationCreateUpdateSerializer.Meta.fields
+    if name not in ('address', 'product_ids', 'main_image')
+)
+
+_PRODUCT_ID_SEPARATOR = re.compile(r'[;,|\s]+')
+
+
+def detect_format(filename, requested=None):
+    """Format named by requested, or by the file extension."""
+    if requested:
+        requested = requested.lower()
+        return requested if requested in FORMATS else None
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return {'csv': 'csv', 'ndjson': 'ndjson', 'jsonl': 'ndjson'}.get(extension)
+
+
+def _payload(row):
+    """Shape a flat or nested row like a LocationCreateUpdateSerializer payload."""
+    payload = {name: row[name] for name in LOCATION_FIELDS if name in row}
+    address = row.get('address')
+    if not isinstance(address, dict):
+        address = {name: row[name] for name in ADDRESS_FIELDS if name in row}
+    payload['address'] = address
+
+    product_ids = row.get('product_ids')
+    if isinstance(product_ids, str):
+        product_ids = [value for value in _PRODUCT_ID_SEPARATOR.split(product_ids) if value]
+    if product_ids is not None:
+        payload['product_ids'] = product_ids
+    return payload
+
+
+def read_csv(stream):
+    """Yield (line number, payload) for each row of a text stream."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        # Empty cells are missing values, not empty strings.
+        row = {
+            name.strip(): value.strip() for name, value in row.items()
+            if name and isinstance(value, str) and value.strip()
+        }
+        yield reader.line_num, _payload(row)
+
+
+def read_ndjson(stream):
+    """Yield (line number, payload or error message) for each line of a text stream."""
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            yield line_number, 'JSON inválido.'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, 'Cada linha deve ser um objeto JSON.'
+            continue
+        yield line_number, _payload(row)
+
+
+def read_rows(stream, file_format):
+    """Rows of a binary or text stream in the given format."""
+    if isinstance(stream, io.TextIOBase):
+        text = stream
+    else:
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    return read_csv(text) if file_format == 'csv' else read_ndjson(text)
+
+
+# Columns that tell the addresses of one chunk apart when their ids have to
+# be read back: created_at is set per row with microsecond precision.
+ADDRESS_KEY_FIELDS = ('created_at', 'street', 'number', 'zip_code', 'neighborhood')
+
+
+def insert_addresses(addresses, batch_size=IMPORT_BATCH_SIZE):
+    """
+    bulk_create that always sets the primary keys of the addresses. MySQL
+    does not return them, and with interleaved auto-increment locking the
+    rows of one INSERT need not get consecutive ids, so they are read back
+    inside the transaction by ADDRESS_KEY_FIELDS among the ids above the
+    previous highest one.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return Address.objects.bulk_create(addresses, batch_size=batch_size)
+    last_id = Address.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+    Address.objects.bulk_create(addresses, batch_size=batch_size)
+    for start in range(0, len(addresses), batch_size):
+        batch = addresses[start:start + batch_size]
+        ids = defaultdict(list)
+        rows = Address.objects.filter(
+            pk__gt=last_id, created_at__in={address.created_at for address in batch}
+        ).order_by('pk').values_list('pk', *ADDRESS_KEY_FIELDS)
+        for pk, *key in rows:
+            ids[tuple(key)].append(pk)
+        for address in batch:
+            address.pk = ids[tuple(getattr(address, name) for name in ADDRESS_KEY_FIELDS)].pop(0)
+    return addresses
+
+
+def insert_locations(locations, batch_size=IMPORT_BATCH_SIZE):
+    """
+    bulk_create that always sets the primary keys of the locations. Without
+    RETURNING they are read back by address, each new location having an
+    address of its own.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return Location.objects.bulk_create(locations, batch_size=batch_size)
+    Location.objects.bulk_create(locations, batch_size=batch_size)
+    ids = {}
+    for start in range(0, len(locations), batch_size):
+        ids.update(Location.objects.filter(
+            address_id__in=[location.address_id for location in locations[start:start + batch_size]]
+        ).values_list('address_id', 'pk'))
+    for location in locations:
+        location.pk = ids[location.address_id]
+    return locations
+
+
+class LocationImporter:
+    """
+    Validates and writes location rows for a producer.
+
+        importer = LocationImporter(producer)
+        report = importer.run(read_rows(stream, 'csv'))
+
+    With dry_run the rows are only validated.
+    """
+
+    def __init__(self, producer, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+        self.producer = producer
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        # Bound once: building a ModelSerializer's fields is the slow part.
+        self.validator = LocationCreateUpdateSerializer()
+        self.product_ids = set(Product.objects.values_list('pk', flat=True))
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, rows):
+        pending = []
+        for line_number, payload in rows:
+            validated = self._validate(line_number, payload)
+            if validated is None:
+                continue
+            pending.append(validated)
+            if len(pending) >= self.batch_size:
+                self._write(pending)
+                pending = []
+        self._write(pending)
+        return self.report()
+
+    def report(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'dry_run': self.dry_run,
+        }
+
+    def _fail(self, line_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': line_number, 'errors': errors})
+
+    def _validate(self, line_number, payload):
+        if isinstance(payload, str):
+            self._fail(line_number, {'non_field_errors': [payload]})
+            return None
+        try:
+            validated = self.validator.run_validation(payload)
+        except serializers.ValidationError as exc:
+            self._fail(line_number, exc.detail)
+            return None
+
+        unknown = sorted(set(validated.get('product_ids', ())) - self.product_ids)
+        if unknown:
+            self._fail(line_number, {
+                'product_ids': [f'Produtos inexistentes: {", ".join(map(str, unknown))}.']
+            })
+            return None
+        return validated
+
+    def _write(self, rows):
+        if not rows:
+            return
+        if self.dry_run:
+            self.created += len(rows)
+            return
+
+        # bulk_create skips Model.save(), which fills the normalized columns,
+        # the geocoding hook and the signals that keep the derived tables in sync.
+        addresses = [
+            Address(
+                **row['address'],
+                neighborhood_normalized=normalize_text(row['address']['neighborhood']),
+                city_normalized=normalize_text(row['address']['city']),
+            )
+            for row in rows
+        ]
+        self._geocode(addresses)
+        with transaction.atomic():
+            insert_addresses(addresses, batch_size=self.batch_size)
+            locations = insert_locations(
+                [
+                    Location(
+                        **{name: value for name, value in row.items() if name not in ('address', 'product_ids')},
+                        producer=self.producer,
+                        address=address,
+                    )
+                    for row, address in zip(rows, addresses)
+                ],
+                batch_size=self.batch_size
+            )
+            Location.products.through.objects.bulk_create(
+                [
+                    Location.products.through(location_id=location.pk, product_id=product_id)
+                    for row, location in zip(rows, locations)
+                    for product_id in dict.fromkeys(row.get('product_ids', ()))
+                ],
+                batch_size=self.batch_size
+            )
+
+            location_ids = [location.pk for location in locations]
+            clustering.add_locations(location_ids, batch_size=self.batch_size)
+            opening_hours.refresh(location_ids, batch_size=self.batch_size)
+            refresh_read_models(location_ids)
+            versions.bump('locations', 'addresses')
+
+        self.created += len(rows)
+
+    @staticmethod
+    def _geocode(addresses):
+        """Fill in missing coordinates from the CEPs, one lookup per chunk."""
+        missing = [
+            address for address in addresses
+            if address.latitude is None or address.longitude is None
+        ]
+        found = geocoding.centroids(
+            geocoding.normalize_zip_code(address.zip_code) for address in missing
+        )
+        for address in missing:
+            zip_code = geocoding.normalize_zip_code(address.zip_code)
+            if zip_code in found:
+                address.latitude, address.longitude = found[zip_code]
+                address.geocoded_zip_code = zip_code
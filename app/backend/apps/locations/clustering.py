@@ -0,0 +1,394 @@
+"""
+Server-side marker clustering for the map.
+
+Locations are bucketed into a Web Mercator grid for every zoom level in
+CLUSTER_ZOOM_LEVELS. Each cell keeps a count and the coordinate sums per
+location type, so a zoomed-out map request only reads the cells inside the
+viewport, no matter how many locations exist.
+"""
+import math
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Location, MapClusterCell, MapClusterMember
+
+# Zoom levels with a precomputed grid. Above the last level maps show
+# individual markers only.
+CLUSTER_ZOOM_LEVELS = range(0, 16)
+MAX_CLUSTER_ZOOM = CLUSTER_ZOOM_LEVELS[-1]
+
+# Each 256px map tile is split into CELLS_PER_TILE x CELLS_PER_TILE cells.
+CELLS_PER_TILE = 4
+
+# Cells holding this many points or fewer are sent as individual markers.
+CLUSTER_EXPAND_THRESHOLD = 3
+
+MAX_MERCATOR_LATITUDE = 85.05112878
+
+# Cells written per statement, and location ids read per query: keeps the
+# SQL and its parameter count bounded however many cells are touched.
+KEY_BATCH_SIZE = 100
+ID_BATCH_SIZE = 500
+
+# The columns of the unique_map_cluster_cell constraint.
+KEY_FIELDS = ('zoom', 'cell_x', 'cell_y', 'location_type')
+
+
+def _grid_size(zoom):
+    return (2 ** zoom) * CELLS_PER_TILE
+
+
+# Bits of a cell column or row at MAX_CLUSTER_ZOOM.
+QUADKEY_BITS = _grid_size(MAX_CLUSTER_ZOOM).bit_length() - 1
+
+
+def cell_for(latitude, longitude, zoom):
+    """Return the (cell_x, cell_y) grid cell holding a point at this zoom."""
+    size = _grid_size(zoom)
+    latitude = max(-MAX_MERCATOR_LATITUDE, min(MAX_MERCATOR_LATITUDE, latitude))
+    sin_lat = math.sin(math.radians(latitude))
+
+    x = (longitude + 180.0) / 360.0
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+
+    cell_x = min(size - 1, max(0, int(x * size)))
+    cell_y = min(size - 1, max(0, int(y * size)))
+    return cell_x, cell_y
+
+
+def quadkey(cell_x, cell_y):
+    """Interleave the bits of a cell's column and row (Z-order)."""
+    key = 0
+    for bit in range(QUADKEY_BITS):
+        key |= ((cell_x >> bit) & 1) << (2 * bit) | ((cell_y >> bit) & 1) << (2 * bit + 1)
+    return key
+
+
+def point_quadkey(latitude, longitude):
+    """Quadkey of the MAX_CLUSTER_ZOOM cell holding a point."""
+    return quadkey(*cell_for(latitude, longitude, MAX_CLUSTER_ZOOM))
+
+
+def quadkey_range(cell_x, cell_y, zoom):
+    """
+    [low, high) of the point quadkeys inside a cell at this zoom. Each zoom
+    level halves the cells of the next one, so a cell holds exactly the
+    finer cells whose column and row start with its own bits.
+    """
+    shift = 2 * (MAX_CLUSTER_ZOOM - zoom)
+    low = quadkey(cell_x, cell_y) << shift
+    return low, low + (1 << shift)
+
+
+def _contribution(location):
+    """The (type, latitude, longitude) a location adds to the grid, if any."""
+    address = location.address
+    if not location.is_active or address.latitude is None or address.longitude is None:
+        return None
+    return location.location_type, float(address.latitude), float(address.longitude)
+
+
+def _add(deltas, location_type, latitude, longitude, sign):
+    """Add what a point contributes to every zoom level to deltas, times sign."""
+    for zoom in CLUSTER_ZOOM_LEVELS:
+        delta = deltas[(zoom, *cell_for(latitude, longitude, zoom), location_type)]
+        delta[0] += sign
+        delta[1] += sign * latitude
+        delta[2] += sign * longitude
+
+
+def _keys_q(keys):
+    q = Q()
+    for zoom, cell_x, cell_y, location_type in keys:
+        q |= Q(zoom=zoom, cell_x=cell_x, cell_y=cell_y, location_type=location_type)
+    return q
+
+
+def _apply(deltas):
+    """
+    Add {(zoom, cell_x, cell_y, type): [count, latitude_sum, longitude_sum]}
+    deltas to the grid, KEY_BATCH_SIZE cells at a time: cells that gain
+    points are inserted empty if missing, the rows of exactly these keys are
+    locked and read, the new totals are written with one upsert and cells
+    left without points are deleted. Call inside a transaction.
+    """
+    items = [(key, delta) for key, delta in deltas.items() if any(delta)]
+    for start in range(0, len(items), KEY_BATCH_SIZE):
+        batch = dict(items[start:start + KEY_BATCH_SIZE])
+        MapClusterCell.objects.bulk_create(
+            [
+                MapClusterCell(
+                    zoom=zoom, cell_x=cell_x, cell_y=cell_y, location_type=location_type
+                )
+                for (zoom, cell_x, cell_y, location_type), delta in batch.items() if delta[0] > 0
+            ],
+            ignore_conflicts=True
+        )
+        locked = MapClusterCell.objects.select_for_update().filter(_keys_q(batch)).values_list(
+            'pk', *KEY_FIELDS, 'count', 'latitude_sum', 'longitude_sum'
+        )
+        cells, empty = [], []
+        for pk, zoom, cell_x, cell_y, location_type, *totals in locked:
+            delta = batch[(zoom, cell_x, cell_y, location_type)]
+            if totals[0] + delta[0] <= 0:
+                empty.append(pk)
+                continue
+            cells.append(MapClusterCell(
+                zoom=zoom, cell_x=cell_x, cell_y=cell_y, location_type=location_type,
+                count=totals[0] + delta[0],
+                latitude_sum=totals[1] + delta[1],
+                longitude_sum=totals[2] + delta[2],
+            ))
+        MapClusterCell.objects.bulk_create(
+            cells,
+            update_conflicts=True,
+            # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target.
+            unique_fields=KEY_FIELDS if connection.features.supports_update_conflicts_with_target else None,
+            update_fields=('count', 'latitude_sum', 'longitude_sum'),
+        )
+        if empty:
+            MapClusterCell.objects.filter(pk__in=empty).delete()
+
+
+def sync_location(location):
+    """
+    Bring the cluster grid in line with the current state of a location,
+    subtracting whatever it contributed before.
+    """
+    with transaction.atomic():
+        member = MapClusterMember.objects.select_for_update().filter(
+            location_id=location.pk
+        ).first()
+        previous = (
+            (member.location_type, member.latitude, member.longitude) if member else None
+        )
+        current = _contribution(location)
+
+        if previous == current:
+            return
+        deltas = defaultdict(lambda: [0, 0.0, 0.0])
+        if previous:
+            _add(deltas, *previous, sign=-1)
+        if current:
+            _add(deltas, *current, sign=1)
+        _apply(deltas)
+        if current:
+            location_type, latitude, longitude = current
+            MapClusterMember.objects.update_or_create(
+                location_id=location.pk,
+                defaults={
+                    'location_type': location_type,
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'quadkey': point_quadkey(latitude, longitude),
+                }
+            )
+        elif member:
+            member.delete()
+
+
+def remove_location(location_id):
+    """Subtract a location from the grid, e.g. right before it is deleted."""
+    with transaction.atomic():
+        member = MapClusterMember.objects.select_for_update().filter(
+            location_id=location_id
+        ).first()
+        if member:
+            deltas = defaultdict(lambda: [0, 0.0, 0.0])
+            _add(deltas, member.location_type, member.latitude, member.longitude, sign=-1)
+            _apply(deltas)
+            member.delete()
+
+
+def _grid_rows(locations):
+    return locations.filter(
+        is_active=True,
+        address__latitude__isnull=False,
+        address__longitude__isnull=False
+    ).values_list('id', 'location_type', 'address__latitude', 'address__longitude')
+
+
+def _accumulate(rows):
+    """
+    Sum (id, type, latitude, longitude) rows into per-cell
+    [count, latitude_sum, longitude_sum] totals and member rows.
+    """
+    cells = defaultdict(lambda: [0, 0.0, 0.0])
+    members = []
+    for location_id, location_type, latitude, longitude in rows:
+        latitude, longitude = float(latitude), float(longitude)
+        members.append(MapClusterMember(
+            location_id=location_id,
+            location_type=location_type,
+            latitude=latitude,
+            longitude=longitude,
+            quadkey=point_quadkey(latitude, longitude)
+        ))
+        for zoom in CLUSTER_ZOOM_LEVELS:
+            cell = cells[(zoom, *cell_for(latitude, longitude, zoom), location_type)]
+            cell[0] += 1
+            cell[1] += latitude
+            cell[2] += longitude
+    return cells, members
+
+
+def add_locations(location_ids, batch_size=1000):
+    """
+    Add locations that are not on the grid yet, such as rows written with
+    bulk_create, summing their contributions per cell first so every
+    affected cell is written once instead of once per location and zoom
+    level. Returns the number of locations added.
+    """
+    cells, members = _accumulate(_grid_rows(Location.objects.filter(pk__in=location_ids)))
+    if not members:
+        return 0
+
+    with transaction.atomic():
+        MapClusterMember.objects.bulk_create(members, batch_size=batch_size)
+        _apply(cells)
+    return len(members)
+
+
+def rebuild(batch_size=1000):
+    """
+    Recompute the whole grid from the active locations.
+    Returns the number of locations added.
+    """
+    cells, members = _accumulate(_grid_rows(Location.objects.all()).iterator(chunk_size=batch_size))
+
+    with transaction.atomic():
+        MapClusterCell.objects.all().delete()
+        MapClusterMember.objects.all().delete()
+        MapClusterMember.objects.bulk_create(members, batch_size=batch_size)
+        MapClusterCell.objects.bulk_create(
+            (
+                MapClusterCell(
+                    zoom=zoom, cell_x=cell_x, cell_y=cell_y, location_type=location_type,
+                    count=count, latitude_sum=latitude_sum, longitude_sum=longitude_sum
+                )
+                for (zoom, cell_x, cell_y, location_type), (count, latitude_sum, longitude_sum)
+                in cells.items()
+            ),
+            batch_size=batch_size
+        )
+
+    return len(members)
+
+
+def _cell_range_q(zoom, viewport):
+    south, west, north, east = viewport
+    west_x, north_y = cell_for(north, west, zoom)
+    east_x, south_y = cell_for(south, east, zoom)
+
+    q = Q(cell_y__gte=north_y, cell_y__lte=south_y)
+    if west <= east:
+        return q & Q(cell_x__gte=west_x, cell_x__lte=east_x)
+    return q & (Q(cell_x__gte=west_x) | Q(cell_x__lte=east_x))
+
+
+def _group(rows):
+    """Merge per-type rows into one entry per cell."""
+    grouped = {}
+    for cell_x, cell_y, location_type, count, latitude_sum, longitude_sum in rows:
+        cell = grouped.setdefault((cell_x, cell_y), {
+            'count': 0, 'latitude_sum': 0.0, 'longitude_sum': 0.0, 'location_types': {}
+        })
+        cell['count'] += count
+        cell['latitude_sum'] += latitude_sum
+        cell['longitude_sum'] += longitude_sum
+        cell['location_types'][location_type] = (
+            cell['location_types'].get(location_type, 0) + count
+        )
+    return grouped
+
+
+def precomputed_cells(zoom, viewport=None, location_type=None):
+    """Read the precomputed cells for a zoom level, optionally in a viewport."""
+    cells = MapClusterCell.objects.filter(zoom=zoom, count__gt=0)
+    if viewport:
+        cells = cells.filter(_cell_range_q(zoom, viewport))
+    if location_type:
+        cells = cells.filter(location_type=location_type)
+    return _group(cells.values_list(
+        'cell_x', 'cell_y', 'location_type', 'count', 'latitude_sum', 'longitude_sum'
+    ))
+
+
+def cells_from_queryset(queryset, zoom, within=None):
+    """
+    Aggregate an already filtered location queryset into cells on the fly.
+    Used when the request has filters the precomputed grid does not cover.
+    within is an optional (latitude, longitude) predicate, such as
+    geo.within, applied to the points as they are read.
+    """
+    rows = defaultdict(lambda: [0, 0.0, 0.0])
+    points = queryset.prefetch_related(None).filter(
+        address__latitude__isnull=False,
+        address__longitude__isnull=False
+    ).values_list('location_type', 'address__latitude', 'address__longitude')
+
+    for location_type, latitude, longitude in points.iterator(chunk_size=2000):
+        if within is not None and not within(latitude, longitude):
+            continue
+        latitude, longitude = float(latitude), float(longitude)
+        row = rows[(*cell_for(latitude, longitude, zoom), location_type)]
+        row[0] += 1
+        row[1] += latitude
+        row[2] += longitude
+
+    return _group(
+        (cell_x, cell_y, location_type, count, latitude_sum, longitude_sum)
+        for (cell_x, cell_y, location_type), (count, latitude_sum, longitude_sum) in rows.items()
+    )
+
+
+def split_cells(cells, zoom, threshold=CLUSTER_EXPAND_THRESHOLD):
+    """
+    Split grouped cells into cluster entries and the set of cells small
+    enough to be sent as individual markers.
+    """
+    clusters = []
+    small_cells = set()
+    for (cell_x, cell_y), cell in cells.items():
+        if cell['count'] <= threshold:
+            small_cells.add((cell_x, cell_y))
+            continue
+        clusters.append({
+            'latitude': round(cell['latitude_sum'] / cell['count'], 6),
+            'longitude': round(cell['longitude_sum'] / cell['count'], 6),
+            'count': cell['count'],
+            'location_types': cell['location_types'],
+        })
+    return clusters, small_cells
+
+
+def location_ids_in_cells(cells, zoom, within=None):
+    """
+    Ids of the grid members inside the given cells (that pass the optional
+    within predicate, see cells_from_queryset). Callers load them through
+    their queryset, which drops the ones its filters exclude.
+
+    Every cell is one range of the indexed MapClusterMember.quadkey, so only
+    the members of these cells are read however far apart the cells are.
+    Adjacent ranges are merged and KEY_BATCH_SIZE ranges go in each query.
+    """
+    ranges = []
+    for low, high in sorted(quadkey_range(cell_x, cell_y, zoom) for cell_x, cell_y in cells):
+        if ranges and ranges[-1][1] == low:
+            ranges[-1][1] = high
+        else:
+            ranges.append([low, high])
+
+    location_ids = []
+    for start in range(0, len(ranges), KEY_BATCH_SIZE):
+        q = Q()
+        for low, high in ranges[start:start + KEY_BATCH_SIZE]:
+            q |= Q(quadkey__gte=low, quadkey__lt=high)
+        members = MapClusterMember.objects.filter(q).values_list('location_id', 'latitude', 'longitude')
+        location_ids.extend(
+            location_id for location_id, latitude, longitude in members
+            if within is None or within(latitude, longitude)
+        )
+    return location_ids
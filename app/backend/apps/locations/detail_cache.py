@@ -0,0 +1,110 @@
+"""
+Cache of the location detail payload.
+
+The LocationSerializer representation of an active location (address,
+products with their categories, images and producer) is stored in the
+LOCATION_DETAIL_CACHE cache alias under one key per location, with relative
+media URLs and without the per-user is_favorited flag; both are filled in
+for each request by render().
+
+Keys carry a data version of their own location (see
+apps.common.versions.bump_rows), read with one query per request.
+refresh_read_models() bumps it for exactly the locations a committed change
+to a location, its address, images, products, their categories or its
+producer affects, from whichever process or management command made it,
+so later requests for those locations look up fresh keys and their outdated
+entries are never read again; they expire after
+LOCATION_DETAIL_CACHE_TIMEOUT. Entries of other locations stay valid. A
+version is only bumped once its transaction has committed, so a payload
+stored under the new version was built from committed rows.
+
+Any Django cache backend works. The default local-memory cache is private
+to each process, so deployments with several workers share its hits only
+when LOCATION_DETAIL_CACHE points at a file or Redis cache.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.common import versions
+from .models import Location
+from .serializers import LocationSerializer, is_favorited, products_prefetch
+from .snapshot import _absolute_product, _absolute_renditions
+
+KEY_PREFIX = 'locations:detail'
+
+
+def _cache():
+    return caches[getattr(settings, 'LOCATION_DETAIL_CACHE', 'default')]
+
+
+def bump(location_ids):
+    """Outdate the cached payloads of these locations once the transaction commits."""
+    versions.bump_rows(KEY_PREFIX, location_ids)
+
+
+def _key(location_id):
+    scope = versions.row_scope(KEY_PREFIX, location_id)
+    current, last_modified = versions.current([scope])
+    # The time of the last change too, so counters that start over (a
+    # restored database) never match the entries of their first life.
+    version = f'{current.get(scope, 0)}.{last_modified.timestamp() if last_modified else 0}'
+    return f'{KEY_PREFIX}:{version}:{location_id}'
+
+
+def _build(location_id):
+    location = Location.objects.filter(is_active=True, pk=location_id).select_related(
+        'producer', 'producer__user', 'address'
+    ).prefetch_related(products_prefetch(), 'images').first()
+    if location is None:
+        return None
+    payload = LocationSerializer(location).data
+    payload.pop('is_favorited', None)
+    return payload
+
+
+def get(location_id):
+    """The cached payload of an active location, or None if there is none."""
+    cache = _cache()
+    key = _key(location_id)
+    payload = cache.get(key)
+    if payload is None:
+        payload = _build(location_id)
+        if payload is not None:
+            cache.set(
+                key, payload,
+                getattr(settings, 'LOCATION_DETAIL_CACHE_TIMEOUT', 3600)
+            )
+    return payload
+
+
+def render(payload, request):
+    """
+    Finish a cached payload for the current request: absolute media URLs,
+    the user's is_favorited flag and only the fields asked for with
+    ?fields=/?expand=.
+    """
+    fields = LocationSerializer.requested_fields(request)
+    item = dict(payload)
+    if fields is not None:
+        item = {name: value for name, value in item.items() if name in fields}
+    if item.get('main_image'):
+        item['main_image'] = request.build_absolute_uri(item['main_image'])
+    if item.get('main_image_renditions'):
+        item['main_image_renditions'] = _absolute_renditions(request, item['main_image_renditions'])
+    if 'images' in item:
+        item['images'] = [_absolute_image(request, image) for image in item['images']]
+    if 'products' in item:
+        item['products'] = [_absolute_product(request, product) for product in item['products']]
+    if fields is None or 'is_favorited' in fields:
+        item['is_favorited'] = is_favorited(request.user, payload['id'])
+    return item
+
+
+def _absolute_image(request, image):
+    image = dict(image)
+    if image.get('image'):
+        image['image'] = request.build_absolute_uri(image['image'])
+    if image.get('image_renditions'):
+        image['image_renditions'] = _absolute_renditions(request, image['image_renditions'])
+    return image
+
@@ -0,0 +1,140 @@
+"""
+Streaming export of the public location catalogue as NDJSON or CSV.
+
+Active locations are read in primary key order, CHUNK_SIZE rows per query
+(WHERE id > last id, so every query is an index range scan and no cursor or
+transaction stays open while a slow client downloads), and encoded and
+optionally gzip-compressed as they are read. Memory use depends on the chunk
+size only, never on the size of the catalogue.
+
+Rows are flat and use the column names of apps.locations.bulk_import, so an
+export can be imported again; product_ids is a list in NDJSON and
+";"-separated in CSV.
+"""
+import csv
+import io
+import json
+import zlib
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Location
+
+FORMATS = ('ndjson', 'csv')
+
+EXPORT_CHUNK_SIZE = 1000
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Output is handed to the response in pieces of about this many characters.
+FLUSH_SIZE = 64 * 1024
+
+# (output column, lookup)
+_COLUMNS = (
+    ('id', 'pk'),
+    ('name', 'name'),
+    ('location_type', 'location_type'),
+    ('description', 'description'),
+    ('producer_id', 'producer_id'),
+    ('producer_name', 'producer__business_name'),
+    ('street', 'address__street'),
+    ('number', 'address__number'),
+    ('complement', 'address__complement'),
+    ('neighborhood', 'address__neighborhood'),
+    ('city', 'address__city'),
+    ('state', 'address__state'),
+    ('zip_code', 'address__zip_code'),
+    ('latitude', 'address__latitude'),
+    ('longitude', 'address__longitude'),
+    ('operation_days', 'operation_days'),
+    ('operation_hours', 'operation_hours'),
+    ('phone', 'phone'),
+    ('whatsapp', 'whatsapp'),
+    ('is_verified', 'is_verified'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+COLUMNS = tuple(name for name, _ in _COLUMNS) + ('product_ids',)
+
+
+def iter_rows(chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a dict per active location, reading chunk_size rows per query."""
+    queryset = Location.objects.filter(is_active=True).order_by('pk').values_list(
+        *(lookup for _, lookup in _COLUMNS)
+    )
+    products = Location.products.through.objects.order_by('location_id', 'product_id')
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        last_pk = chunk[-1][0]
+
+        product_ids = defaultdict(list)
+        for location_id, product_id in products.filter(
+            location_id__in=[row[0] for row in chunk]
+        ).values_list('location_id', 'product_id'):
+            product_ids[location_id].append(product_id)
+
+        for values in chunk:
+            row = dict(zip(COLUMNS, values))
+            row['product_ids'] = product_ids.get(values[0], [])
+            yield row
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        row['product_ids'] = ';'.join(map(str, row['product_ids']))
+        if row['created_at']:
+            row['created_at'] = row['created_at'].isoformat()
+        if row['updated_at']:
+            row['updated_at'] = row['updated_at'].isoformat()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream(file_format='ndjson', compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the encoded export in pieces of about FLUSH_SIZE characters,
+    gzip-compressed when compress is true.
+    """
+    encode = csv_lines if file_format == 'csv' else ndjson_lines
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+
+    def output(text):
+        data = text.encode('utf-8')
+        return compressor.compress(data) if compressor else data
+
+    pending, size = [], 0
+    for line in encode(iter_rows(chunk_size)):
+        pending.append(line)
+        size += len(line)
+        if size >= FLUSH_SIZE:
+            data = output(''.join(pending))
+            pending, size = [], 0
+            if data:
+                yield data
+    data = output(''.join(pending))
+    if compressor:
+        data += compressor.flush()
+    if data:
+        yield data
+
+
+def filename(file_format, compress=False):
+    return f'locations.{file_format}' + ('.gz' if compress else '')
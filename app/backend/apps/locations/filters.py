@@ -0,0 +1,202 @@
+import django_filters
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+from apps.common.text import normalize_text
+from . import opening_hours, search
+from .models import Location
+
+
+class LocationFilter(django_filters.FilterSet):
+    """
+    Location list filters. City and neighborhood are compared on their
+    accent-folded columns, so ?address__city=sao paulo finds "São Paulo".
+    category keeps the locations selling any product of that category.
+    """
+    address__city = django_filters.CharFilter(
+        field_name='address__city_normalized', method='filter_normalized'
+    )
+    address__neighborhood = django_filters.CharFilter(
+        field_name='address__neighborhood_normalized', method='filter_normalized'
+    )
+    category = django_filters.NumberFilter(field_name='products__category', distinct=True)
+
+    class Meta:
+        model = Location
+        fields = [
+            'location_type', 'is_verified', 'address__city', 'address__neighborhood',
+            'address__state', 'category'
+        ]
+
+    def filter_normalized(self, queryset, name, value):
+        return queryset.filter(**{name: normalize_text(value)})
+
+
+class LocationSearchFilter(SearchFilter):
+    """
+    ?search= for locations, answered by the search index (see
+    apps.locations.search) instead of LIKE scans over joined text columns.
+    Ordering is left to the other backends; the search action ranks by
+    relevance instead.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = ' '.join(self.get_search_terms(request))
+        ranked = search.ranked(query)
+        if ranked is None:
+            return queryset
+        return queryset.filter(pk__in=ranked.values('location_id'))
+
+
+class ViewportFilter(BaseFilterBackend):
+    """
+    Restrict locations to a map viewport given by its south-west and
+    north-east corners:
+
+        ?sw_lat=-23.70&sw_lng=-46.83&ne_lat=-23.45&ne_lng=-46.36
+
+    The lookup is a range scan on the (latitude, longitude) index of Address,
+    so its cost depends on the number of markers in view instead of on the
+    size of the table. Requests without a viewport are left untouched.
+    """
+    params = ('sw_lat', 'sw_lng', 'ne_lat', 'ne_lng')
+
+    def filter_queryset(self, request, queryset, view):
+        viewport = parse_viewport(request.query_params)
+        if viewport is None:
+            return queryset
+        return queryset.filter(viewport_q(*viewport, prefix='address__'))
+
+
+class OpenAtFilter(BaseFilterBackend):
+    """
+    Keep the locations open at a moment, according to their parsed weekly
+    schedule (see apps.locations.opening_hours):
+
+        ?open_at=now
+        ?open_at=2026-10-17T09:30          (local time, America/Sao_Paulo)
+        ?open_at=2026-10-17T12:30:00Z
+
+    Locations whose opening hours could not be parsed never match.
+    """
+    param = 'open_at'
+
+    def filter_queryset(self, request, queryset, view):
+        moment = requested_moment(request)
+        if moment is None:
+            return queryset
+        return queryset.filter(pk__in=opening_hours.open_location_ids(moment))
+
+
+def requested_moment(request):
+    """
+    The open_at moment of a request, or None. Resolved once per request, so
+    that "now" is the same minute for the filter and the ETag.
+    """
+    if not hasattr(request, '_open_at_moment'):
+        value = request.query_params.get(OpenAtFilter.param)
+        request._open_at_moment = parse_moment(value) if value else None
+    return request._open_at_moment
+
+
+def open_at_now_key(request):
+    """
+    Extra ETag key for condition_on_versions: with ?open_at=now the response
+    changes as time passes, so it is keyed on the minute "now" resolved to.
+    """
+    if request.query_params.get(OpenAtFilter.param) != 'now':
+        return None
+    return requested_moment(request).isoformat()
+
+
+def parse_moment(value):
+    """
+    Parse an open_at value: "now" (to the minute, the resolution of the
+    schedules) or an ISO 8601 datetime.
+    """
+    if value == 'now':
+        return timezone.now().replace(second=0, microsecond=0)
+    try:
+        # A "+" in an unencoded offset arrives as a space.
+        moment = parse_datetime(value) or parse_datetime(value.replace(' ', '+'))
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise serializers.ValidationError({'open_at': 'Data e hora inválidas.'})
+    return moment
+
+
+def parse_viewport(query_params):
+    """
+    Return (south, west, north, east) from the query params, or None when no
+    viewport was sent. Raises ValidationError for incomplete or invalid corners.
+    """
+    values = [query_params.get(param) for param in ViewportFilter.params]
+    if not any(values):
+        return None
+    if not all(values):
+        raise serializers.ValidationError(
+            {'viewport': 'Informe sw_lat, sw_lng, ne_lat e ne_lng.'}
+        )
+
+    try:
+        south, west, north, east = (float(value) for value in values)
+    except ValueError:
+        raise serializers.ValidationError(
+            {'viewport': 'Coordenadas do viewport inválidas.'}
+        )
+
+    if not (-90 <= south <= 90 and -90 <= north <= 90):
+        raise serializers.ValidationError({'viewport': 'Latitude fora do intervalo.'})
+    if not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise serializers.ValidationError({'viewport': 'Longitude fora do intervalo.'})
+    if south > north:
+        raise serializers.ValidationError(
+            {'viewport': 'sw_lat deve ser menor ou igual a ne_lat.'}
+        )
+
+    return south, west, north, east
+
+
+def viewport_q(south, west, north, east, prefix=''):
+    """
+    Build the Q object matching points inside the viewport. A viewport whose
+    west edge is greater than its east edge crosses the antimeridian.
+    """
+    q = Q(**{
+        f'{prefix}latitude__gte': south,
+        f'{prefix}latitude__lte': north,
+    })
+    if west <= east:
+        return q & Q(**{
+            f'{prefix}longitude__gte': west,
+            f'{prefix}longitude__lte': east,
+        })
+    return q & (
+        Q(**{f'{prefix}longitude__gte': west}) |
+        Q(**{f'{prefix}longitude__lte': east})
+    )
+
+
+def parse_point(query_params, required=False):
+    """
+    Return (latitude, longitude) from the lat/lng query params, or None when
+    they were not sent and are not required.
+    """
+    latitude = query_params.get('lat')
+    longitude = query_params.get('lng')
+    if latitude is None and longitude is None and not required:
+        return None
+    if latitude is None or longitude is None:
+        raise serializers.ValidationError({'point': 'Informe lat e lng.'})
+
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except ValueError:
+        raise serializers.ValidationError({'point': 'Coordenadas inválidas.'})
+
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise serializers.ValidationError({'point': 'Coordenadas fora do intervalo.'})
+    return latitude, longitude
@@ -0,0 +1,130 @@
+"""
+Great-circle helpers, the k-nearest-neighbour search over the
+(latitude, longitude) index of Address and the vectorized distance sort used
+by ordering=distance and radius_km on location lists.
+"""
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# First search radius and the largest radius the search grows to.
+NEAREST_INITIAL_RADIUS_KM = 2.0
+NEAREST_MAX_RADIUS_KM = 200.0
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points, in kilometres."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2 +
+        math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def within(latitude, longitude, radius_km):
+    """
+    Predicate telling whether a (latitude, longitude) point lies within
+    radius_km of the given centre, for filtering rows as they are read.
+    """
+    def test(point_latitude, point_longitude):
+        return haversine_km(
+            latitude, longitude, float(point_latitude), float(point_longitude)
+        ) <= radius_km
+    return test
+
+
+def distances_km(latitude, longitude, latitudes, longitudes):
+    """haversine_km from one point to arrays of points, as an array."""
+    lat1, lng1 = math.radians(latitude), math.radians(longitude)
+    lat2, lng2 = np.radians(latitudes), np.radians(longitudes)
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2 +
+        math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+POINT_DTYPE = np.dtype([('id', 'i8'), ('latitude', 'f8'), ('longitude', 'f8')])
+
+
+def by_distance(latitude, longitude, points, radius_km=None, sort=True):
+    """
+    Distances from (latitude, longitude) to (id, latitude, longitude) rows,
+    computed for all of them at once.
+
+    Rows farther than radius_km are dropped and, with sort, the rest are
+    sorted by distance; equal distances keep the order of the rows. Returns
+    (ids, distances in km) arrays.
+    """
+    points = np.fromiter(points, dtype=POINT_DTYPE)
+    distances = distances_km(latitude, longitude, points['latitude'], points['longitude'])
+    ids = points['id']
+    if radius_km is not None:
+        inside = distances <= radius_km
+        ids, distances = ids[inside], distances[inside]
+    if sort:
+        order = np.argsort(distances, kind='stable')
+        ids, distances = ids[order], distances[order]
+    return ids, distances
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Return the (south, west, north, east) box containing every point within
+    radius_km of the centre. West is greater than east when the box crosses
+    the antimeridian.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    lat = math.radians(latitude)
+    south = lat - angular
+    north = lat + angular
+
+    if south <= -math.pi / 2 or north >= math.pi / 2:
+        # The circle contains a pole: every longitude is in range.
+        return (
+            max(math.degrees(south), -90.0), -180.0,
+            min(math.degrees(north), 90.0), 180.0
+        )
+
+    delta = math.degrees(math.asin(min(1.0, math.sin(angular) / math.cos(lat))))
+    west = longitude - delta
+    east = longitude + delta
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return math.degrees(south), west, math.degrees(north), east
+
+
+def nearest(latitude, longitude, k, candidates_in_box, max_radius_km=NEAREST_MAX_RADIUS_KM):
+    """
+    Find the k points closest to (latitude, longitude).
+
+    candidates_in_box(box) must return (id, latitude, longitude) tuples for the
+    points inside a bounding box, typically through an indexed range query.
+    The box grows until it holds k points within its inscribed circle (which
+    makes the result exact) or reaches max_radius_km, so distances are only
+    computed for points near the centre.
+
+    Returns a list of (id, distance_km) sorted by distance.
+    """
+    radius = min(NEAREST_INITIAL_RADIUS_KM, max_radius_km)
+
+    while True:
+        found = []
+        for point_id, point_lat, point_lng in candidates_in_box(
+            bounding_box(latitude, longitude, radius)
+        ):
+            distance = haversine_km(latitude, longitude, float(point_lat), float(point_lng))
+            if distance <= radius:
+                found.append((point_id, distance))
+
+        if len(found) >= k or radius >= max_radius_km:
+            break
+        radius = min(radius * 2, max_radius_km)
+
+    found.sort(key=lambda item: item[1])
+    return found[:k]
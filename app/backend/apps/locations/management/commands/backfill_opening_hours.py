@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from apps.locations import opening_hours
+
+
+class Command(BaseCommand):
+    help = 'Interpreta os dias e horários de funcionamento de todas as localizações'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=opening_hours.REBUILD_BATCH_SIZE,
+            help=f'Tamanho dos lotes de leitura e inserção (padrão: {opening_hours.REBUILD_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        total, unparsed = opening_hours.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ {total - unparsed} horários interpretados'))
+        if unparsed:
+            self.stdout.write(self.style.WARNING(
+                f'⚠ {unparsed} localizações com dias/horários não reconhecidos'
+            ))
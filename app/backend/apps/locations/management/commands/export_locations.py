@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from apps.locations import export
+
+
+class Command(BaseCommand):
+    help = 'Exporta as localizações ativas em NDJSON ou CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Arquivo de saída (padrão: saída padrão)'
+        )
+        parser.add_argument(
+            '--format',
+            choices=export.FORMATS,
+            default='ndjson',
+            help='Formato do arquivo (padrão: ndjson)'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Comprime a saída com gzip'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=export.EXPORT_CHUNK_SIZE,
+            help=f'Localizações lidas por consulta (padrão: {export.EXPORT_CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        pieces = export.stream(options['format'], options['gzip'], options['chunk_size'])
+        if options['path'] == '-':
+            output = sys.stdout.buffer
+            for piece in pieces:
+                output.write(piece)
+            output.flush()
+            return
+
+        with open(options['path'], 'wb') as output:
+            for piece in pieces:
+                output.write(piece)
+        self.stderr.write(self.style.SUCCESS(f'✓ Exportação gravada em {options["path"]}'))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from apps.common import geocoding, versions
+from apps.common.models import Address
+from apps.locations import clustering
+from apps.locations.models import Location
+from apps.locations.signals import refresh_read_models
+
+
+class Command(BaseCommand):
+    help = 'Preenche as coordenadas dos endereços sem latitude/longitude a partir do CEP'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Endereços lidos e atualizados por lote (padrão: 500)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        missing = Address.objects.filter(
+            Q(latitude__isnull=True) | Q(longitude__isnull=True)
+        ).order_by('pk').only('pk', 'zip_code')
+
+        geocoded = not_found = 0
+        last_pk = 0
+        while True:
+            batch = list(missing.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            found = geocoding.centroids(
+                geocoding.normalize_zip_code(address.zip_code) for address in batch
+            )
+            updated = []
+            for address in batch:
+                zip_code = geocoding.normalize_zip_code(address.zip_code)
+                if zip_code in found:
+                    address.latitude, address.longitude = found[zip_code]
+                    address.geocoded_zip_code = zip_code
+                    updated.append(address)
+            not_found += len(batch) - len(updated)
+            if not updated:
+                continue
+
+            # bulk_update skips the signals that place locations on the map.
+            with transaction.atomic():
+                Address.objects.bulk_update(updated, ['latitude', 'longitude', 'geocoded_zip_code'])
+                location_ids = list(
+                    Location.objects.filter(address__in=updated).values_list('pk', flat=True)
+                )
+                clustering.add_locations(location_ids)
+                refresh_read_models(location_ids)
+            geocoded += len(updated)
+
+        if geocoded:
+            versions.bump('addresses', 'locations')
+        self.stdout.write(self.style.SUCCESS(f'✓ {geocoded} endereços geocodificados'))
+        if not_found:
+            self.stdout.write(self.style.WARNING(f'⚠ {not_found} endereços com CEP sem coordenadas conhecidas'))
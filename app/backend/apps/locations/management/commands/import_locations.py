@@ -0,0 +1,69 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.locations.bulk_import import (
+    FORMATS, IMPORT_BATCH_SIZE, LocationImporter, detect_format, read_rows
+)
+from apps.producers.models import ProducerProfile
+
+
+class Command(BaseCommand):
+    help = 'Importa localizações de um arquivo CSV ou NDJSON para um produtor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo a importar ("-" para a entrada padrão)')
+        parser.add_argument(
+            '--producer',
+            type=int,
+            required=True,
+            help='ID do perfil de produtor dono das localizações'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Formato do arquivo (padrão: pela extensão)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help=f'Linhas gravadas por transação (padrão: {IMPORT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas valida o arquivo, sem gravar nada'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            producer = ProducerProfile.objects.get(pk=options['producer'])
+        except ProducerProfile.DoesNotExist:
+            raise CommandError(f'Produtor {options["producer"]} não encontrado')
+
+        path = options['path']
+        file_format = detect_format(path, options['format'])
+        if file_format is None:
+            raise CommandError('Formato não reconhecido; use --format=csv ou --format=ndjson')
+
+        importer = LocationImporter(
+            producer, batch_size=options['batch_size'], dry_run=options['dry_run']
+        )
+        if path == '-':
+            report = importer.run(read_rows(sys.stdin, file_format))
+        else:
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                report = importer.run(read_rows(stream, file_format))
+
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f'Linha {error["row"]}: {json.dumps(error["errors"], ensure_ascii=False)}'))
+        if report['errors_truncated']:
+            self.stdout.write(self.style.WARNING(
+                f'... e mais {report["failed"] - len(report["errors"])} linhas com erro'
+            ))
+
+        action = 'validadas' if report['dry_run'] else 'importadas'
+        self.stdout.write(self.style.SUCCESS(f'✓ {report["created"]} localizações {action}'))
+        if report['failed']:
+            self.stdout.write(self.style.WARNING(f'⚠ {report["failed"]} linhas rejeitadas'))
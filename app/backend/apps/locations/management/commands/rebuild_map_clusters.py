@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from apps.locations import clustering
+
+
+class Command(BaseCommand):
+    help = 'Recalcula a grade de agrupamento de marcadores do mapa'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tamanho dos lotes de leitura e inserção (padrão: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        total = clustering.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Grade de agrupamento recalculada com {total} localizações')
+        )
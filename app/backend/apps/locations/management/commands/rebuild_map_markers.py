@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from apps.locations import snapshot
+
+
+class Command(BaseCommand):
+    help = 'Recria a tabela desnormalizada de marcadores do mapa'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=snapshot.REFRESH_BATCH_SIZE,
+            help=f'Tamanho dos lotes de leitura e inserção (padrão: {snapshot.REFRESH_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        total = snapshot.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ {total} marcadores do mapa recriados'))
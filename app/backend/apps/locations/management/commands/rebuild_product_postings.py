@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from apps.locations import postings
+
+
+class Command(BaseCommand):
+    help = 'Recria o índice de produtos por localização usado em "onde comprar"'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=postings.REFRESH_BATCH_SIZE,
+            help=f'Tamanho dos lotes de leitura e inserção (padrão: {postings.REFRESH_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        total = postings.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ {total} postings de produtos recriados'))
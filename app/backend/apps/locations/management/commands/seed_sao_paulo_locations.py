@@ -11,6 +11,17 @@ from apps.producers.models import ProducerProfile
 from apps.locations.models import Location
 from apps.products.models import Product, Category
 from apps.common.models import Address
+from apps.common.synthetic import (
+    CATEGORIES,
+    FIRST_NAMES,
+    LAST_NAMES,
+    OPERATION_DAYS,
+    OPERATION_HOURS,
+    PRODUCER_NAMES,
+    PRODUCTS,
+    SAO_PAULO_NEIGHBORHOODS,
+    STREET_NAMES
+)
 
 
 class Command(BaseCommand):
@@ -76,15 +87,7 @@ class Command(BaseCommand):
         """Create product categories"""
         self.stdout.write('📦 Criando categorias de produtos...')
         
-        categories_data = [
-            {'name': 'Verduras', 'slug': 'verduras', 'icon': '🥬', 'description': 'Alface, couve, rúcula, etc'},
-            {'name': 'Legumes', 'slug': 'legumes', 'icon': '🥕', 'description': 'Cenoura, beterraba, abobrinha, etc'},
-            {'name': 'Frutas', 'slug': 'frutas', 'icon': '🍎', 'description': 'Maçã, banana, laranja, etc'},
-            {'name': 'Hortaliças', 'slug': 'hortalicas', 'icon': '🌿', 'description': 'Tomate, pimentão, pepino, etc'},
-            {'name': 'Grãos e Cereais', 'slug': 'graos-cereais', 'icon': '🌾', 'description': 'Arroz, feijão, milho, etc'},
-            {'name': 'Temperos', 'slug': 'temperos', 'icon': '🌶️', 'description': 'Alho, cebola, manjericão, etc'},
-            {'name': 'Ovos e Laticínios', 'slug': 'ovos-laticinios', 'icon': '🥚', 'description': 'Ovos caipiras, queijos artesanais'},
-        ]
+        categories_data = CATEGORIES
         
         categories = {}
         for cat_data in categories_data:
@@ -102,15 +105,7 @@ class Command(BaseCommand):
         """Create products for each category"""
         self.stdout.write('\n🥬 Criando produtos...')
         
-        products_data = {
-            'verduras': ['Alface Crespa', 'Alface Americana', 'Couve', 'Rúcula', 'Agrião', 'Escarola'],
-            'legumes': ['Cenoura', 'Beterraba', 'Abobrinha', 'Berinjela', 'Chuchu', 'Batata Doce'],
-            'frutas': ['Banana Prata', 'Laranja Lima', 'Limão Taiti', 'Maçã Gala', 'Mamão Papaya', 'Goiaba'],
-            'hortalicas': ['Tomate Italiano', 'Pimentão Verde', 'Pepino Japonês', 'Jiló', 'Quiabo', 'Vagem'],
-            'graos-cereais': ['Feijão Carioca', 'Arroz Integral', 'Milho Verde', 'Ervilha', 'Grão de Bico'],
-            'temperos': ['Cebolinha', 'Salsa', 'Coentro', 'Manjericão', 'Alecrim', 'Hortelã'],
-            'ovos-laticinios': ['Ovos Caipira', 'Queijo Minas', 'Requeijão Artesanal', 'Iogurte Natural'],
-        }
+        products_data = PRODUCTS
         
         all_products = []
         for slug, product_names in products_data.items():
@@ -137,51 +132,19 @@ class Command(BaseCommand):
         created_count = 0
         locations_created = 0
         
-        producer_names = [
-            'Sítio Verde Vida', 'Fazenda Orgânica Paulista', 'Horta da Terra',
-            'Rancho da Natureza', 'Chácara Boa Colheita', 'Fazenda São José',
-            'Sítio Caminho Verde', 'Horta Sustentável', 'Fazenda Raízes',
-            'Chácara Bela Vista', 'Sítio Flor do Campo', 'Horta Natural',
-            'Fazenda Vale Verde', 'Rancho do Sol', 'Chácara Campo Feliz',
-        ]
+        producer_names = PRODUCER_NAMES
         
-        first_names = ['João', 'Maria', 'Pedro', 'Ana', 'Carlos', 'Juliana', 'Roberto', 'Fernanda', 'Paulo', 'Beatriz']
-        last_names = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Costa', 'Pereira', 'Rodrigues', 'Almeida', 'Lima', 'Ferreira']
+        first_names = FIRST_NAMES
+        last_names = LAST_NAMES
         
         # São Paulo neighborhoods with approximate coordinates
-        neighborhoods = [
-            {'name': 'Vila Madalena', 'lat': -23.5505, 'lng': -46.6875, 'street_prefix': 'Rua'},
-            {'name': 'Pinheiros', 'lat': -23.5689, 'lng': -46.6903, 'street_prefix': 'Avenida'},
-            {'name': 'Moema', 'lat': -23.5966, 'lng': -46.6612, 'street_prefix': 'Rua'},
-            {'name': 'Itaim Bibi', 'lat': -23.5844, 'lng': -46.6773, 'street_prefix': 'Rua'},
-            {'name': 'Vila Mariana', 'lat': -23.5880, 'lng': -46.6354, 'street_prefix': 'Rua'},
-            {'name': 'Jardins', 'lat': -23.5675, 'lng': -46.6561, 'street_prefix': 'Alameda'},
-            {'name': 'Perdizes', 'lat': -23.5362, 'lng': -46.6748, 'street_prefix': 'Rua'},
-            {'name': 'Santana', 'lat': -23.5055, 'lng': -46.6291, 'street_prefix': 'Rua'},
-            {'name': 'Tatuapé', 'lat': -23.5388, 'lng': -46.5772, 'street_prefix': 'Rua'},
-            {'name': 'Brooklin', 'lat': -23.6137, 'lng': -46.6970, 'street_prefix': 'Avenida'},
-            {'name': 'Ipiranga', 'lat': -23.5925, 'lng': -46.5998, 'street_prefix': 'Rua'},
-            {'name': 'Lapa', 'lat': -23.5280, 'lng': -46.7016, 'street_prefix': 'Rua'},
-            {'name': 'Butantã', 'lat': -23.5680, 'lng': -46.7280, 'street_prefix': 'Avenida'},
-            {'name': 'Saúde', 'lat': -23.6172, 'lng': -46.6393, 'street_prefix': 'Rua'},
-            {'name': 'Penha', 'lat': -23.5280, 'lng': -46.5381, 'street_prefix': 'Rua'},
-        ]
+        neighborhoods = SAO_PAULO_NEIGHBORHOODS
         
-        street_names = [
-            'das Flores', 'dos Orgânicos', 'da Agricultura', 'Verde', 'da Natureza',
-            'dos Produtores', 'da Colheita', 'do Campo', 'da Horta', 'Sustentável',
-            'Ecológica', 'da Terra Boa', 'do Plantio', 'da Semente'
-        ]
+        street_names = STREET_NAMES
         
         location_types = ['FAIR', 'STORE', 'DELIVERY']
-        operation_days_options = [
-            'Sábado', 'Quarta e Sábado', 'Segunda a Sábado', 
-            'Terça a Domingo', 'Domingo', 'Segunda a Sexta'
-        ]
-        operation_hours_options = [
-            '7h às 13h', '6h às 12h', '8h às 14h', 
-            '7h às 12h', '9h às 15h', '6h30 às 13h30'
-        ]
+        operation_days_options = OPERATION_DAYS
+        operation_hours_options = OPERATION_HOURS
         
         for i in range(num_producers):
             # Create user with timestamp to ensure uniqueness
@@ -0,0 +1,94 @@
+"""
+Compact columnar encoding of map markers.
+
+Instead of one JSON object per location the feed holds parallel arrays of
+ids, coordinates scaled to integers, type codes and verified flags. The
+scaling is done by the database and the arrays are built column by column,
+so no model instances or serializer fields are involved.
+"""
+import struct
+import sys
+from array import array
+
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast, Round
+
+from .models import Location
+
+COORDINATE_SCALE = 1_000_000
+
+# Position of each type in this list is its code in the feed.
+LOCATION_TYPE_CODES = list(Location.LocationType.values)
+
+BINARY_MAGIC = b'ASOM'
+BINARY_VERSION = 1
+# magic, version, type count, marker count, coordinate scale
+BINARY_HEADER = struct.Struct('<4sHHII')
+
+
+def _scaled(field):
+    return Cast(Round(F(field) * COORDINATE_SCALE), IntegerField())
+
+
+def encode(queryset, within=None):
+    """
+    Encode the locations of a queryset as columns. Locations without
+    coordinates, or whose scaled coordinates fail the optional within
+    predicate (see geo.within), are skipped.
+    """
+    rows = queryset.prefetch_related(None).filter(
+        address__latitude__isnull=False,
+        address__longitude__isnull=False
+    ).annotate(
+        latitude_e6=_scaled('address__latitude'),
+        longitude_e6=_scaled('address__longitude'),
+    ).order_by('pk').values_list(
+        'pk', 'latitude_e6', 'longitude_e6', 'location_type', 'is_verified'
+    )
+
+    if within is not None:
+        rows = [
+            row for row in rows
+            if within(row[1] / COORDINATE_SCALE, row[2] / COORDINATE_SCALE)
+        ]
+    ids, latitudes, longitudes, types, verified = zip(*rows) if rows else ((),) * 5
+    type_codes = {location_type: code for code, location_type in enumerate(LOCATION_TYPE_CODES)}
+
+    return {
+        'count': len(ids),
+        'scale': COORDINATE_SCALE,
+        'types': LOCATION_TYPE_CODES,
+        'ids': array('q', ids),
+        'lat': array('i', latitudes),
+        'lng': array('i', longitudes),
+        'type': array('B', map(type_codes.__getitem__, types)),
+        'verified': array('B', verified),
+    }
+
+
+def to_json(columns):
+    """Plain lists for the JSON representation."""
+    return {
+        key: value.tolist() if isinstance(value, array) else value
+        for key, value in columns.items()
+    }
+
+
+def to_binary(columns):
+    """
+    Pack the columns as little-endian bytes: the header followed by
+    ids (int64), lat and lng (int32), type codes and verified flags (uint8).
+    Type codes index LOCATION_TYPE_CODES.
+    """
+    header = BINARY_HEADER.pack(
+        BINARY_MAGIC, BINARY_VERSION, len(columns['types']),
+        columns['count'], columns['scale']
+    )
+    parts = [header]
+    for key in ('ids', 'lat', 'lng', 'type', 'verified'):
+        values = columns[key]
+        if sys.byteorder == 'big' and values.itemsize > 1:
+            values = array(values.typecode, values)
+            values.byteswap()
+        parts.append(values.tobytes())
+    return b''.join(parts)
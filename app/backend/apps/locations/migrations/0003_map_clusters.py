@@ -0,0 +1,49 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapClusterCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField(verbose_name='Zoom')),
+                ('cell_x', models.PositiveIntegerField(verbose_name='Coluna')),
+                ('cell_y', models.PositiveIntegerField(verbose_name='Linha')),
+                ('location_type', models.CharField(choices=[('FAIR', 'Feira'), ('STORE', 'Loja'), ('FARM', 'Propriedade Rural'), ('DELIVERY', 'Entrega/Delivery'), ('OTHER', 'Outro')], max_length=10, verbose_name='Tipo de local')),
+                ('count', models.IntegerField(default=0, verbose_name='Quantidade')),
+                ('latitude_sum', models.FloatField(default=0)),
+                ('longitude_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Célula de Agrupamento',
+                'verbose_name_plural': 'Células de Agrupamento',
+            },
+        ),
+        migrations.CreateModel(
+            name='MapClusterMember',
+            fields=[
+                ('location', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cluster_member', serialize=False, to='locations.location')),
+                ('location_type', models.CharField(choices=[('FAIR', 'Feira'), ('STORE', 'Loja'), ('FARM', 'Propriedade Rural'), ('DELIVERY', 'Entrega/Delivery'), ('OTHER', 'Outro')], max_length=10)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('quadkey', models.BigIntegerField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Membro de Agrupamento',
+                'verbose_name_plural': 'Membros de Agrupamento',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mapclustercell',
+            constraint=models.UniqueConstraint(fields=('zoom', 'cell_x', 'cell_y', 'location_type'), name='unique_map_cluster_cell'),
+        ),
+    ]
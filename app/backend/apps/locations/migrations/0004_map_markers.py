@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0003_map_clusters'),
+        ('producers', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapMarker',
+            fields=[
+                ('location', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='map_marker', serialize=False, to='locations.location')),
+                ('producer_name', models.CharField(max_length=200)),
+                ('name', models.CharField(max_length=200)),
+                ('location_type', models.CharField(choices=[('FAIR', 'Feira'), ('STORE', 'Loja'), ('FARM', 'Propriedade Rural'), ('DELIVERY', 'Entrega/Delivery'), ('OTHER', 'Outro')], max_length=10)),
+                ('is_verified', models.BooleanField(default=False)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('product_ids', models.JSONField(blank=True, default=list)),
+                ('payload', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('producer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='map_markers', to='producers.producerprofile')),
+            ],
+            options={
+                'verbose_name': 'Marcador do Mapa',
+                'verbose_name_plural': 'Marcadores do Mapa',
+                'indexes': [models.Index(fields=['latitude', 'longitude'], name='locations_m_latitud_70a7ba_idx')],
+            },
+        ),
+    ]
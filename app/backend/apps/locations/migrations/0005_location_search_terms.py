@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0004_map_markers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('weight', models.FloatField()),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='locations.location')),
+            ],
+            options={
+                'verbose_name': 'Termo de Busca',
+                'verbose_name_plural': 'Termos de Busca',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='locationsearchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'location'), name='unique_location_search_term'),
+        ),
+    ]
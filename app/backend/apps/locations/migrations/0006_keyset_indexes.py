@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0004_normalized_names'),
+        ('locations', '0005_location_search_terms'),
+        ('producers', '0003_keyset_indexes'),
+        ('products', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='locations_l_is_acti_72accb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['is_active', 'name', 'id'], name='locations_l_is_acti_d7b114_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0006_keyset_indexes'),
+        ('products', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='postings', to='products.category')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_postings', to='locations.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Posting de Produto',
+                'verbose_name_plural': 'Postings de Produtos',
+                'indexes': [models.Index(fields=['product', 'latitude', 'longitude'], name='locations_p_product_e18a9a_idx'), models.Index(fields=['category', 'latitude', 'longitude'], name='locations_p_categor_164edf_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productposting',
+            constraint=models.UniqueConstraint(fields=('product', 'location'), name='unique_product_posting'),
+        ),
+    ]
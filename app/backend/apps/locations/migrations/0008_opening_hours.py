@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0007_product_postings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationOpeningHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(help_text='0 = segunda-feira, 6 = domingo')),
+                ('opens_at', models.PositiveSmallIntegerField(help_text='Minutos após a meia-noite')),
+                ('closes_at', models.PositiveSmallIntegerField(help_text='Minutos após a meia-noite (até 1440)')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_hours', to='locations.location')),
+            ],
+            options={
+                'verbose_name': 'Horário de Funcionamento',
+                'verbose_name_plural': 'Horários de Funcionamento',
+                'ordering': ['weekday', 'opens_at'],
+                'indexes': [models.Index(fields=['weekday', 'opens_at', 'closes_at'], name='locations_l_weekday_7ff5c6_idx')],
+            },
+        ),
+    ]
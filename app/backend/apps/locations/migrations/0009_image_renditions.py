@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0008_opening_hours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='main_image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='locationimage',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
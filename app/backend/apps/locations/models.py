@@ -2,7 +2,7 @@ from django.db import models
 from django.conf import settings
 from apps.common.models import TimeStampedModel, Address
 from apps.producers.models import ProducerProfile
-from apps.products.models import Product
+from apps.products.models import Category, Product
 
 
 class Location(TimeStampedModel):
@@ -52,6 +52,8 @@ class Location(TimeStampedModel):
         null=True,
         verbose_name='Imagem principal'
     )
+    # Resized copies of main_image (see apps.common.images).
+    main_image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     
     operation_days = models.CharField(
         max_length=200,
@@ -76,6 +78,11 @@ class Location(TimeStampedModel):
         verbose_name = 'Localização'
         verbose_name_plural = 'Localizações'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination over active locations (see KeysetPagination).
+            models.Index(fields=['is_active', 'created_at', 'id']),
+            models.Index(fields=['is_active', 'name', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.producer.business_name}"
@@ -92,6 +99,8 @@ class LocationImage(TimeStampedModel):
         verbose_name='Localização'
     )
     image = models.ImageField(upload_to='locations/gallery/', verbose_name='Imagem')
+    # Resized copies of image (see apps.common.images).
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     caption = models.CharField(max_length=200, blank=True, verbose_name='Legenda')
     order = models.PositiveIntegerField(default=0, verbose_name='Ordem')
 
@@ -102,3 +111,197 @@ class LocationImage(TimeStampedModel):
 
     def __str__(self):
         return f"{self.location.name} - Imagem {self.order}"
+
+
+class MapClusterCell(models.Model):
+    """
+    Precomputed marker counts per map grid cell, zoom level and location type.
+    Maintained incrementally by signals (see apps.locations.clustering).
+    """
+    zoom = models.PositiveSmallIntegerField(verbose_name='Zoom')
+    cell_x = models.PositiveIntegerField(verbose_name='Coluna')
+    cell_y = models.PositiveIntegerField(verbose_name='Linha')
+    location_type = models.CharField(
+        max_length=10,
+        choices=Location.LocationType.choices,
+        verbose_name='Tipo de local'
+    )
+    count = models.IntegerField(default=0, verbose_name='Quantidade')
+    latitude_sum = models.FloatField(default=0)
+    longitude_sum = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name = 'Célula de Agrupamento'
+        verbose_name_plural = 'Células de Agrupamento'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['zoom', 'cell_x', 'cell_y', 'location_type'],
+                name='unique_map_cluster_cell'
+            ),
+        ]
+
+    def __str__(self):
+        return f"z{self.zoom} ({self.cell_x}, {self.cell_y}) {self.location_type}: {self.count}"
+
+
+class MapClusterMember(models.Model):
+    """
+    The position and type each location currently contributes to the cluster
+    grid, so that a later change can be subtracted from the right cells.
+    """
+    location = models.OneToOneField(
+        Location,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='cluster_member'
+    )
+    location_type = models.CharField(max_length=10, choices=Location.LocationType.choices)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    # Z-order key of the point's cell at the finest zoom level: the points of
+    # a cell at any zoom level are one range of it (see clustering.quadkey).
+    quadkey = models.BigIntegerField(db_index=True)
+
+    class Meta:
+        verbose_name = 'Membro de Agrupamento'
+        verbose_name_plural = 'Membros de Agrupamento'
+
+    def __str__(self):
+        return f"{self.location_id} ({self.latitude}, {self.longitude})"
+
+
+class MapMarker(models.Model):
+    """
+    Denormalized read model for the map and location lists: one flat row per
+    active location with the pre-rendered LocationListSerializer payload.
+    Maintained by signals (see apps.locations.snapshot).
+    """
+    location = models.OneToOneField(
+        Location,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='map_marker'
+    )
+    producer = models.ForeignKey(
+        ProducerProfile,
+        on_delete=models.CASCADE,
+        related_name='map_markers'
+    )
+    producer_name = models.CharField(max_length=200)
+    name = models.CharField(max_length=200)
+    location_type = models.CharField(max_length=10, choices=Location.LocationType.choices)
+    is_verified = models.BooleanField(default=False)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    product_ids = models.JSONField(default=list, blank=True)
+    payload = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Marcador do Mapa'
+        verbose_name_plural = 'Marcadores do Mapa'
+        indexes = [
+            models.Index(fields=['latitude', 'longitude']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.latitude}, {self.longitude})"
+
+
+class LocationSearchTerm(models.Model):
+    """
+    Inverted index for location search: one row per (term, location) with
+    the summed weight of the fields the term appears in. Maintained by
+    signals (see apps.locations.search).
+    """
+    term = models.CharField(max_length=50)
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+    weight = models.FloatField()
+
+    class Meta:
+        verbose_name = 'Termo de Busca'
+        verbose_name_plural = 'Termos de Busca'
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'location'], name='unique_location_search_term'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} → {self.location_id} ({self.weight})"
+
+
+class ProductPosting(models.Model):
+    """
+    Product -> location posting lists for "where can I buy X" queries: one
+    row per product sold at an active, geocoded location, carrying the
+    category and the coordinates so that product and spatial lookups hit a
+    single composite index. Maintained by signals (see apps.locations.postings).
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='postings'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='postings'
+    )
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        related_name='product_postings'
+    )
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+
+    class Meta:
+        verbose_name = 'Posting de Produto'
+        verbose_name_plural = 'Postings de Produtos'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'location'], name='unique_product_posting'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'latitude', 'longitude']),
+            models.Index(fields=['category', 'latitude', 'longitude']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} → {self.location_id}"
+
+
+class LocationOpeningHours(models.Model):
+    """
+    Weekly schedule parsed from Location.operation_days/operation_hours: one
+    row per weekday and opening interval, in minutes after midnight (local
+    time, America/Sao_Paulo). Intervals that cross midnight are split over
+    the two days. Maintained by signals (see apps.locations.opening_hours).
+    """
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        related_name='opening_hours'
+    )
+    weekday = models.PositiveSmallIntegerField(help_text='0 = segunda-feira, 6 = domingo')
+    opens_at = models.PositiveSmallIntegerField(help_text='Minutos após a meia-noite')
+    closes_at = models.PositiveSmallIntegerField(help_text='Minutos após a meia-noite (até 1440)')
+
+    class Meta:
+        verbose_name = 'Horário de Funcionamento'
+        verbose_name_plural = 'Horários de Funcionamento'
+        ordering = ['weekday', 'opens_at']
+        indexes = [
+            models.Index(fields=['weekday', 'opens_at', 'closes_at']),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.location_id}: {self.weekday} "
+            f"{self.opens_at // 60:02d}:{self.opens_at % 60:02d}-"
+            f"{self.closes_at // 60:02d}:{self.closes_at % 60:02d}"
+        )
@@ -0,0 +1,192 @@
+"""
+Opening-hours parsing and the structured weekly schedule.
+
+Producers describe when they are open in two free-text fields, such as
+"Segunda a Sábado" / "7h às 12h". parse_schedule() turns them into
+(weekday, opens_at, closes_at) intervals, which are stored in
+LocationOpeningHours so that "open at" becomes an indexed lookup. Besides
+the formats of the seed command it understands abbreviations ("seg a sex"),
+lists ("seg, qua e sex"), "-feira" suffixes, "todos os dias", "dias úteis",
+"fim de semana", exceptions ("exceto domingo"), clock times ("07:00 - 12:00"),
+several intervals ("8h às 12h e 14h às 18h"), intervals past midnight and
+"24 horas". Text it cannot read yields no rows: the location is never
+reported as open rather than being guessed.
+"""
+import re
+from zoneinfo import ZoneInfo
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.common.text import normalize_text
+from .models import Location, LocationOpeningHours
+
+# Schedules are written in local time.
+SCHEDULE_TIME_ZONE = ZoneInfo('America/Sao_Paulo')
+
+MINUTES_PER_DAY = 24 * 60
+ALL_DAYS = frozenset(range(7))
+WEEKDAYS = frozenset(range(5))
+WEEKEND = frozenset({5, 6})
+
+REBUILD_BATCH_SIZE = 500
+
+_DAY = r'(seg(?:unda)?|ter(?:ca)?|qua(?:rta)?|qui(?:nta)?|sex(?:ta)?|sab(?:ado)?|dom(?:ingo)?)s?\b\.?'
+_DAY_NUMBERS = {'seg': 0, 'ter': 1, 'qua': 2, 'qui': 3, 'sex': 4, 'sab': 5, 'dom': 6}
+DAY_RE = re.compile(r'\b' + _DAY)
+DAY_RANGE_RE = re.compile(r'\b' + _DAY + r'\s*(?:a|ao|ate|-|–)\s*' + _DAY)
+EXCEPT_RE = re.compile(r'\b(?:exceto|menos|salvo|fechado)\b')
+
+_TIME = r'(\d{1,2})(?:\s*[:h.]\s*(\d{2}))?\s*(?:hs|hrs|horas|h)?'
+TIME_RANGE_RE = re.compile(r'\b' + _TIME + r'\s*(?:a|as|ate|-|–)\s*' + _TIME)
+ALL_DAY_RE = re.compile(r'\b24\s*(?:h|hs|horas)\b')
+
+
+def _day_number(word):
+    return _DAY_NUMBERS[word[:3]]
+
+
+def _days_in(text):
+    days = set()
+    if re.search(r'\b(?:todos os dias|todo dia|diariamente|diario|7 dias)\b', text):
+        days |= ALL_DAYS
+    if re.search(r'\bdias? ute(?:is|l)\b', text):
+        days |= WEEKDAYS
+    if re.search(r'\b(?:fins?|finais?) de semana\b', text):
+        days |= WEEKEND
+
+    def add_range(match):
+        first, last = _day_number(match.group(1)), _day_number(match.group(2))
+        day = first
+        days.add(day)
+        while day != last:
+            day = (day + 1) % 7
+            days.add(day)
+        return ' '
+
+    text = DAY_RANGE_RE.sub(add_range, text)
+    days.update(_day_number(match.group(1)) for match in DAY_RE.finditer(text))
+    return days
+
+
+def parse_days(text):
+    """Return the set of weekdays (0 = Monday) described by text."""
+    text = re.sub(r'-?\s*feiras?\b', '', normalize_text(text))
+    parts = EXCEPT_RE.split(text, maxsplit=1)
+    days = _days_in(parts[0])
+    if len(parts) > 1:
+        # "exceto domingo" on its own means every other day.
+        days = (days or set(ALL_DAYS)) - _days_in(parts[1])
+    return days
+
+
+def _minutes(hours, minutes):
+    hours, minutes = int(hours), int(minutes or 0)
+    if hours > 24 or minutes > 59 or (hours == 24 and minutes):
+        return None
+    return hours * 60 + minutes
+
+
+def parse_hours(text):
+    """Return the (opens_at, closes_at) intervals in text, in minutes."""
+    text = normalize_text(text)
+    intervals = []
+    for match in TIME_RANGE_RE.finditer(text):
+        opens_at = _minutes(match.group(1), match.group(2))
+        closes_at = _minutes(match.group(3), match.group(4))
+        if opens_at is None or closes_at is None or opens_at == closes_at:
+            continue
+        intervals.append((opens_at % MINUTES_PER_DAY, closes_at))
+    if not intervals and ALL_DAY_RE.search(text):
+        intervals.append((0, MINUTES_PER_DAY))
+    return intervals
+
+
+def parse_schedule(days_text, hours_text):
+    """
+    Return sorted (weekday, opens_at, closes_at) rows for a location. Days
+    may also be written in the hours field ("Seg a Sex 8h às 18h").
+    """
+    days = parse_days(days_text) or parse_days(hours_text)
+    rows = set()
+    for opens_at, closes_at in parse_hours(hours_text):
+        for day in days:
+            if closes_at > opens_at:
+                rows.add((day, opens_at, closes_at))
+            else:
+                # Closes after midnight: the rest belongs to the next day.
+                rows.add((day, opens_at, MINUTES_PER_DAY))
+                if closes_at:
+                    rows.add(((day + 1) % 7, 0, closes_at))
+    return sorted(rows)
+
+
+def _rows(location):
+    return [
+        LocationOpeningHours(location=location, weekday=weekday, opens_at=opens_at, closes_at=closes_at)
+        for weekday, opens_at, closes_at in parse_schedule(
+            location.operation_days, location.operation_hours
+        )
+    ]
+
+
+def sync(location):
+    """Replace the schedule rows of a location with its parsed text."""
+    with transaction.atomic():
+        LocationOpeningHours.objects.filter(location=location).delete()
+        LocationOpeningHours.objects.bulk_create(_rows(location))
+
+
+def refresh(location_ids, batch_size=REBUILD_BATCH_SIZE):
+    """Replace the schedule rows of many locations, e.g. after bulk_create."""
+    location_ids = list(set(location_ids))
+    for start in range(0, len(location_ids), batch_size):
+        batch = location_ids[start:start + batch_size]
+        locations = Location.objects.filter(pk__in=batch).only(
+            'pk', 'operation_days', 'operation_hours'
+        )
+        rows = [row for location in locations for row in _rows(location)]
+        with transaction.atomic():
+            LocationOpeningHours.objects.filter(location_id__in=batch).delete()
+            LocationOpeningHours.objects.bulk_create(rows, batch_size=batch_size)
+
+
+def rebuild(batch_size=REBUILD_BATCH_SIZE):
+    """
+    Recreate every schedule row. Returns (locations read, locations whose
+    text produced no schedule).
+    """
+    total = unparsed = 0
+    with transaction.atomic():
+        LocationOpeningHours.objects.all().delete()
+        rows = []
+        locations = Location.objects.only('pk', 'operation_days', 'operation_hours')
+        for location in locations.iterator(chunk_size=batch_size):
+            location_rows = _rows(location)
+            total += 1
+            unparsed += not location_rows
+            rows.extend(location_rows)
+            if len(rows) >= batch_size:
+                LocationOpeningHours.objects.bulk_create(rows, batch_size=batch_size)
+                rows = []
+        LocationOpeningHours.objects.bulk_create(rows, batch_size=batch_size)
+    return total, unparsed
+
+
+def local_weekday_and_minute(moment):
+    """
+    (weekday, minute of day) of a datetime in SCHEDULE_TIME_ZONE. Naive
+    datetimes are taken as already being local time.
+    """
+    if timezone.is_naive(moment):
+        moment = moment.replace(tzinfo=SCHEDULE_TIME_ZONE)
+    local = moment.astimezone(SCHEDULE_TIME_ZONE)
+    return local.weekday(), local.hour * 60 + local.minute
+
+
+def open_location_ids(moment):
+    """Subquery of the ids of the locations open at a datetime."""
+    weekday, minute = local_weekday_and_minute(moment)
+    return LocationOpeningHours.objects.filter(
+        weekday=weekday, opens_at__lte=minute, closes_at__gt=minute
+    ).values('location_id')
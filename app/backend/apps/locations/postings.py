@@ -0,0 +1,94 @@
+"""
+Product -> location posting lists for "where can I buy X near me".
+
+ProductPosting has one row per (product, active geocoded location) with the
+product category and the location coordinates copied in, indexed on
+(product, latitude, longitude) and (category, latitude, longitude). A query
+for some products near a point is then a range scan per product inside a
+bounding box, grouped by location, instead of a walk through the
+Location.products join table for every location in the city.
+"""
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Q, When
+
+from .models import Location, ProductPosting
+
+REFRESH_BATCH_SIZE = 500
+
+# Most product and category ids a single query may combine.
+MAX_TERMS = 20
+
+
+def _postings(locations):
+    rows = locations.filter(
+        is_active=True,
+        products__isnull=False,
+        address__latitude__isnull=False,
+        address__longitude__isnull=False,
+    ).values_list(
+        'pk', 'products', 'products__category', 'address__latitude', 'address__longitude'
+    ).order_by()
+    return [
+        ProductPosting(
+            location_id=location_id, product_id=product_id, category_id=category_id,
+            latitude=latitude, longitude=longitude
+        )
+        for location_id, product_id, category_id, latitude, longitude in rows
+    ]
+
+
+def refresh(location_ids):
+    """
+    Rebuild the postings of the given locations. Locations that are
+    inactive, have no coordinates or no longer exist lose their postings.
+    """
+    location_ids = list(set(location_ids))
+    for start in range(0, len(location_ids), REFRESH_BATCH_SIZE):
+        batch = location_ids[start:start + REFRESH_BATCH_SIZE]
+        postings = _postings(Location.objects.filter(pk__in=batch))
+        with transaction.atomic():
+            ProductPosting.objects.filter(location_id__in=batch).delete()
+            ProductPosting.objects.bulk_create(postings, batch_size=REFRESH_BATCH_SIZE)
+
+
+def rebuild(batch_size=REFRESH_BATCH_SIZE):
+    """Recreate every posting. Returns the number of rows written."""
+    total = 0
+    location_ids = list(Location.objects.order_by('pk').values_list('pk', flat=True))
+    with transaction.atomic():
+        ProductPosting.objects.all().delete()
+        for start in range(0, len(location_ids), batch_size):
+            postings = _postings(
+                Location.objects.filter(pk__in=location_ids[start:start + batch_size])
+            )
+            ProductPosting.objects.bulk_create(postings, batch_size=batch_size)
+            total += len(postings)
+    return total
+
+
+def matching(product_ids=(), category_ids=(), match_all=True):
+    """
+    Values queryset of {'location_id', 'latitude', 'longitude'} for the
+    locations selling the given products and products of the given
+    categories: every one of them when match_all, any of them otherwise.
+    Filter it on latitude/longitude to restrict it to an area.
+    """
+    term_qs = (
+        [Q(product_id=product_id) for product_id in product_ids] +
+        [Q(category_id=category_id) for category_id in category_ids]
+    )
+    any_term = Q()
+    for term_q in term_qs:
+        any_term |= term_q
+
+    queryset = ProductPosting.objects.filter(any_term).values('location_id').annotate(
+        location_latitude=Max('latitude'),
+        location_longitude=Max('longitude'),
+    ).order_by()
+    if match_all and len(term_qs) > 1:
+        matched = {
+            f'matched_{index}': Max(Case(When(term_q, then=1), default=0, output_field=IntegerField()))
+            for index, term_q in enumerate(term_qs)
+        }
+        queryset = queryset.annotate(**matched).filter(**{name: 1 for name in matched})
+    return queryset
@@ -0,0 +1,35 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from . import marker_feed
+
+
+class MarkerColumnsJSONRenderer(JSONRenderer):
+    """
+    Columnar JSON marker feed.
+    Accept: application/vnd.acheseuorganico.markers+json (or ?format=markers)
+    """
+    media_type = 'application/vnd.acheseuorganico.markers+json'
+    format = 'markers'
+    marker_columns = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict) and 'ids' in data:
+            data = marker_feed.to_json(data)
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class MarkerColumnsBinaryRenderer(BaseRenderer):
+    """
+    Packed binary marker feed, see marker_feed.to_binary for the layout.
+    Accept: application/vnd.acheseuorganico.markers (or ?format=markers-bin)
+    """
+    media_type = 'application/vnd.acheseuorganico.markers'
+    format = 'markers-bin'
+    charset = None
+    render_style = 'binary'
+    marker_columns = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not (isinstance(data, dict) and 'ids' in data):
+            # The view sends errors as JSON, so anything else is a bug.
+            raise TypeError('Only marker feeds can be rendered as packed binary.')
+        return marker_feed.to_binary(data)
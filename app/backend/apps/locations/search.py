@@ -0,0 +1,144 @@
+"""
+Full-text search over locations through the LocationSearchTerm inverted index.
+
+Each active location is tokenized once, when it or something it shows
+changes (its name and description, the producer name, the address and the
+products sold there), and stored as weighted (term, location) rows. A query
+then reads only the rows of its own terms through the (term, location)
+index, so its cost depends on how many locations match rather than on the
+size of the catalogue.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Q, Sum, When
+
+from apps.common.text import normalize_text
+
+from .models import Location, LocationSearchTerm
+
+REINDEX_BATCH_SIZE = 500
+
+# How much a term found in each field adds to the relevance of a location.
+FIELD_WEIGHTS = {
+    'name': 4.0,
+    'producer': 3.0,
+    'products': 2.0,
+    'neighborhood': 1.5,
+    'city': 1.0,
+    'categories': 1.0,
+    'description': 0.5,
+}
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = LocationSearchTerm._meta.get_field('term').max_length
+
+STOPWORDS = {
+    'a', 'as', 'o', 'os', 'e', 'de', 'da', 'das', 'do', 'dos', 'em', 'na', 'nas',
+    'no', 'nos', 'um', 'uma', 'com', 'para', 'por', 'the', 'and', 'of',
+}
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Split text into accent-folded, lower-cased index terms, dropping stopwords."""
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(normalize_text(text))
+        if len(token) >= MIN_TERM_LENGTH and token not in STOPWORDS
+    ]
+
+
+def _fields(location):
+    products = list(location.products.all())
+    return {
+        'name': location.name,
+        'producer': location.producer.business_name,
+        'products': ' '.join(product.name for product in products),
+        'neighborhood': location.address.neighborhood,
+        'city': location.address.city,
+        'categories': ' '.join({product.category.name for product in products if product.category}),
+        'description': location.description,
+    }
+
+
+def document_terms(location):
+    """Return {term: weight} for a location."""
+    terms = {}
+    for field, text in _fields(location).items():
+        # A term counts once per field, however often it repeats there.
+        for term in set(tokenize(text)):
+            terms[term] = terms.get(term, 0.0) + FIELD_WEIGHTS[field]
+    return terms
+
+
+def _locations():
+    return Location.objects.filter(is_active=True).select_related(
+        'producer', 'address'
+    ).prefetch_related('products__category')
+
+
+def _rows(location):
+    return [
+        LocationSearchTerm(term=term, location=location, weight=weight)
+        for term, weight in document_terms(location).items()
+    ]
+
+
+def reindex(location_ids):
+    """
+    Rebuild the index rows of the given locations. Locations that are
+    inactive or no longer exist are dropped from the index.
+    """
+    location_ids = list(set(location_ids))
+    for start in range(0, len(location_ids), REINDEX_BATCH_SIZE):
+        batch = location_ids[start:start + REINDEX_BATCH_SIZE]
+        rows = [row for location in _locations().filter(pk__in=batch) for row in _rows(location)]
+        with transaction.atomic():
+            LocationSearchTerm.objects.filter(location_id__in=batch).delete()
+            LocationSearchTerm.objects.bulk_create(rows, batch_size=REINDEX_BATCH_SIZE)
+
+
+def rebuild(batch_size=REINDEX_BATCH_SIZE):
+    """Recreate the whole index. Returns the number of locations indexed."""
+    total = 0
+    with transaction.atomic():
+        LocationSearchTerm.objects.all().delete()
+        rows = []
+        for location in _locations().iterator(chunk_size=batch_size):
+            rows.extend(_rows(location))
+            total += 1
+            if len(rows) >= batch_size:
+                LocationSearchTerm.objects.bulk_create(rows, batch_size=batch_size)
+                rows = []
+        LocationSearchTerm.objects.bulk_create(rows, batch_size=batch_size)
+    return total
+
+
+def ranked(query):
+    """
+    Return a values queryset of {'location_id', 'score'} for the locations
+    matching every term of the query, most relevant first, or None when the
+    query has no searchable terms. The last term also matches as a prefix, so
+    partially typed words find results.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return None
+
+    term_qs = [Q(term=term) for term in terms[:-1]] + [Q(term__startswith=terms[-1])]
+    matched = {
+        f'matched_{index}': Max(Case(When(term_q, then=1), default=0, output_field=IntegerField()))
+        for index, term_q in enumerate(term_qs)
+    }
+
+    any_term = Q()
+    for term_q in term_qs:
+        any_term |= term_q
+
+    return LocationSearchTerm.objects.filter(any_term).values('location_id').annotate(
+        score=Sum('weight'), **matched
+    ).filter(
+        **{name: 1 for name in matched}
+    ).order_by('-score', 'location_id')
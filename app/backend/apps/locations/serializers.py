@@ -1,11 +1,33 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Location, LocationImage
 from apps.common.models import Address
+from apps.common.serializers import ImageRenditionsField, SparseFieldsetMixin
+from apps.products.models import Product
 from apps.products.serializers import ProductListSerializer
 from apps.producers.models import ProducerProfile
+from apps.favorites.models import Favorite
 import json
 
 
+def favorited_location_ids(user):
+    """
+    Set with the ids of every location favorited by the user, in one query.
+    """
+    if user is None or not user.is_authenticated:
+        return set()
+    return set(
+        Favorite.objects.filter(user=user).order_by().values_list('location_id', flat=True)
+    )
+
+
+def is_favorited(user, location_id):
+    """Whether the user favorited the location."""
+    if user is None or not user.is_authenticated:
+        return False
+    return Favorite.objects.filter(user=user, location_id=location_id).exists()
+
+
 class ProducerMinimalSerializer(serializers.ModelSerializer):
     """Serializer mínimo para dados do produtor necessários para chat"""
     user = serializers.IntegerField(source='user.id', read_only=True)
@@ -26,27 +48,44 @@ class AddressSerializer(serializers.ModelSerializer):
 
 
 class LocationImageSerializer(serializers.ModelSerializer):
+    image_renditions = ImageRenditionsField()
+
     class Meta:
         model = LocationImage
-        fields = ('id', 'image', 'caption', 'order')
+        fields = ('id', 'image', 'image_renditions', 'caption', 'order')
+
+
+def products_prefetch():
+    return Prefetch('products', queryset=Product.objects.select_related('category'))
 
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     address = AddressSerializer()
     images = LocationImageSerializer(many=True, read_only=True)
     products = ProductListSerializer(many=True, read_only=True)
     producer_name = serializers.CharField(source='producer.business_name', read_only=True)
     producer_details = ProducerMinimalSerializer(source='producer', read_only=True)
+    main_image_renditions = ImageRenditionsField()
+    is_favorited = serializers.SerializerMethodField()
 
     class Meta:
         model = Location
         fields = (
             'id', 'producer', 'producer_name', 'producer_details', 'name', 'location_type',
-            'description', 'address', 'products', 'main_image', 'images',
+            'description', 'address', 'products', 'main_image', 'main_image_renditions', 'images',
             'operation_days', 'operation_hours', 'phone', 'whatsapp',
-            'is_active', 'is_verified', 'created_at', 'updated_at'
+            'is_active', 'is_verified', 'is_favorited', 'created_at', 'updated_at'
         )
         read_only_fields = ('id', 'producer', 'is_verified', 'created_at', 'updated_at')
+        expandable_fields = ('address', 'products', 'images', 'producer_details')
+        prefetch_fields = {
+            'products': [products_prefetch()],
+            'images': ['images'],
+        }
+
+    def get_is_favorited(self, obj):
+        request = self.context.get('request')
+        return is_favorited(request.user if request else None, obj.pk)
 
     def create(self, validated_data):
         address_data = validated_data.pop('address')
@@ -141,7 +180,7 @@ class LocationCreateUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class LocationListSerializer(serializers.ModelSerializer):
+class LocationListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Simplified serializer for location lists and map markers.
     """
@@ -161,7 +200,8 @@ class LocationListSerializer(serializers.ModelSerializer):
     )
     city = serializers.CharField(source='address.city', read_only=True)
     state = serializers.CharField(source='address.state', read_only=True)
-    product_count = serializers.IntegerField(source='products.count', read_only=True)
+    main_image_renditions = ImageRenditionsField()
+    product_count = serializers.SerializerMethodField()
     products = ProductListSerializer(many=True, read_only=True)
     is_favorited = serializers.SerializerMethodField()
 
@@ -169,15 +209,47 @@ class LocationListSerializer(serializers.ModelSerializer):
         model = Location
         fields = (
             'id', 'name', 'location_type', 'producer_name', 'producer_details', 'main_image',
-            'latitude', 'longitude', 'city', 'state', 'product_count', 'products',
+            'main_image_renditions', 'latitude', 'longitude', 'city', 'state', 'product_count', 'products',
             'is_verified', 'is_favorited'
         )
+        expandable_fields = ('products', 'producer_details')
+        prefetch_fields = {
+            'products': [products_prefetch()],
+        }
     
+    def get_product_count(self, obj):
+        """
+        Use the product_count annotation when the queryset provides one.
+        """
+        if hasattr(obj, 'product_count'):
+            return obj.product_count
+        return obj.products.count()
+
     def get_is_favorited(self, obj):
         """
         Check if current user has favorited this location.
         """
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.favorited_by.filter(user=request.user).exists()
-        return False
+        return obj.pk in self._favorited_location_ids()
+
+    def _favorited_location_ids(self):
+        """
+        Ids of the locations favorited by the current user. Loaded with a
+        single query and kept in the serializer context, which is shared by
+        every row of a list.
+        """
+        if 'favorited_location_ids' not in self.context:
+            request = self.context.get('request')
+            self.context['favorited_location_ids'] = favorited_location_ids(
+                request.user if request else None
+            )
+        return self.context['favorited_location_ids']
+
+
+class NearbyLocationSerializer(LocationListSerializer):
+    """
+    Location list item with its great-circle distance to the searched point.
+    """
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(LocationListSerializer.Meta):
+        fields = LocationListSerializer.Meta.fields + ('distance_km',)
@@ -0,0 +1,143 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from apps.common import images, versions
+from apps.common.models import Address
+from apps.producers.models import ProducerProfile
+from apps.products.models import Category, Product
+from . import clustering, detail_cache, opening_hours, postings, search, snapshot
+from .models import Location, LocationImage
+
+versions.track(Location, 'locations')
+versions.track(Location.products.through, 'locations')
+versions.track(LocationImage, 'locations')
+# Addresses are only edited through locations.
+versions.track(Address, 'addresses')
+
+images.register(Location, 'main_image')
+images.register(LocationImage, 'image')
+
+
+def refresh_read_models(location_ids):
+    """
+    Rebuild the rows derived from the given locations: their map marker,
+    their search index terms and their product postings, and outdate their
+    cached detail payloads. All of them depend on the same related data.
+    """
+    location_ids = list(location_ids)
+    snapshot.refresh(location_ids)
+    search.reindex(location_ids)
+    postings.refresh(location_ids)
+    detail_cache.bump(location_ids)
+
+
+@receiver(post_save, sender=Location)
+def update_location_clusters(sender, instance, **kwargs):
+    """Keep the map cluster grid in sync when a location changes."""
+    clustering.sync_location(instance)
+
+
+@receiver(pre_delete, sender=Location)
+def remove_location_clusters(sender, instance, **kwargs):
+    """Subtract a location from the cluster grid before it is deleted."""
+    clustering.remove_location(instance.pk)
+
+
+@receiver(post_save, sender=Address)
+def update_address_clusters(sender, instance, created, **kwargs):
+    """Moving an address moves every location that uses it."""
+    if created:
+        return
+    for location in instance.locations.select_related('address'):
+        clustering.sync_location(location)
+
+
+@receiver(post_save, sender=Location)
+def update_opening_hours(sender, instance, **kwargs):
+    """Re-parse the weekly schedule of a saved location."""
+    opening_hours.sync(instance)
+
+
+@receiver(post_save, sender=Location)
+def refresh_location_marker(sender, instance, **kwargs):
+    """Re-render the map marker and search terms of a saved location."""
+    refresh_read_models([instance.pk])
+
+
+@receiver(post_delete, sender=Location)
+def outdate_deleted_location_detail(sender, instance, **kwargs):
+    """Stop serving the cached detail of a deleted location."""
+    detail_cache.bump([instance.pk])
+
+
+@receiver(post_save, sender=LocationImage)
+@receiver(post_delete, sender=LocationImage)
+def outdate_image_location_detail(sender, instance, **kwargs):
+    """Gallery images are only part of the detail payload."""
+    detail_cache.bump([instance.location_id])
+
+
+@receiver(post_save, sender=Address)
+def refresh_address_markers(sender, instance, created, **kwargs):
+    """Re-render the markers of the locations at a changed address."""
+    if not created:
+        refresh_read_models(instance.locations.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=ProducerProfile)
+def refresh_producer_markers(sender, instance, created, **kwargs):
+    """Markers and search terms carry the producer name."""
+    if not created:
+        refresh_read_models(instance.locations.values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=Location.products.through)
+def refresh_product_set_markers(sender, instance, action, reverse, pk_set, **kwargs):
+    """Re-render markers when the products sold at a location change."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_read_models([instance.pk])
+        return
+
+    # Changed from the product side: instance is a Product.
+    if action == 'pre_clear':
+        instance._cleared_location_ids = list(instance.locations.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        refresh_read_models(getattr(instance, '_cleared_location_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        refresh_read_models(pk_set)
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_markers(sender, instance, created, **kwargs):
+    """Markers and search terms embed product names and categories."""
+    if not created:
+        refresh_read_models(instance.locations.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_markers(sender, instance, created, **kwargs):
+    """Markers embed the category name of each product."""
+    if not created:
+        refresh_read_models(
+            Location.objects.filter(products__category=instance).values_list('pk', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Product)
+@receiver(pre_delete, sender=Category)
+def remember_deleted_catalog_locations(sender, instance, **kwargs):
+    """
+    Deleting a product drops its M2M rows and deleting a category clears
+    product.category without signals, so collect the affected locations first.
+    """
+    products = [instance] if sender is Product else instance.products.all()
+    instance._affected_location_ids = list(
+        Location.objects.filter(products__in=products).values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def refresh_deleted_catalog_markers(sender, instance, **kwargs):
+    """Re-render the markers collected by remember_deleted_catalog_locations."""
+    refresh_read_models(getattr(instance, '_affected_location_ids', []))
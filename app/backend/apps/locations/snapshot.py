@@ -0,0 +1,135 @@
+"""
+Maintenance and reads of the MapMarker snapshot.
+
+Each active location has one MapMarker row holding what LocationListSerializer
+renders for it, except the per-user is_favorited flag, which is merged in at
+read time. Signal handlers call refresh() for the locations affected by a
+change; rebuild() recreates every row (run it after deploying changes to
+LocationListSerializer).
+"""
+from django.db import transaction
+from django.db.models import Prefetch
+
+from apps.products.models import Product
+from .models import Location, MapMarker
+from .serializers import LocationListSerializer, favorited_location_ids
+
+# Payload fields holding media URLs, rendered relative and made absolute on read.
+MEDIA_FIELDS = ('main_image',)
+RENDITION_FIELDS = ('main_image_renditions',)
+
+REFRESH_BATCH_SIZE = 500
+
+
+def _build(locations):
+    """
+    MapMarker rows for locations. They are serialized as one list so the
+    serializer fields are bound once rather than once per location.
+    """
+    locations = list(locations)
+    payloads = LocationListSerializer(locations, many=True).data
+    markers = []
+    for location, payload in zip(locations, payloads):
+        payload = dict(payload)
+        payload.pop('is_favorited', None)
+        address = location.address
+        markers.append(MapMarker(
+            location=location,
+            producer_id=location.producer_id,
+            producer_name=location.producer.business_name,
+            name=location.name,
+            location_type=location.location_type,
+            is_verified=location.is_verified,
+            latitude=address.latitude,
+            longitude=address.longitude,
+            product_ids=[product.pk for product in location.products.all()],
+            payload=payload,
+        ))
+    return markers
+
+
+def _locations():
+    return Location.objects.filter(is_active=True).select_related(
+        'producer', 'producer__user', 'address'
+    ).prefetch_related(
+        Prefetch('products', queryset=Product.objects.select_related('category'))
+    )
+
+
+def refresh(location_ids):
+    """
+    Rebuild the marker rows of the given locations. Rows of locations that
+    are inactive or no longer exist are removed.
+    """
+    location_ids = list(set(location_ids))
+    for start in range(0, len(location_ids), REFRESH_BATCH_SIZE):
+        batch = location_ids[start:start + REFRESH_BATCH_SIZE]
+        markers = _build(_locations().filter(pk__in=batch))
+        with transaction.atomic():
+            MapMarker.objects.filter(location_id__in=batch).delete()
+            MapMarker.objects.bulk_create(markers)
+
+
+def rebuild(batch_size=REFRESH_BATCH_SIZE):
+    """Recreate the whole snapshot. Returns the number of rows written."""
+    total = 0
+    with transaction.atomic():
+        MapMarker.objects.all().delete()
+        locations = []
+        for location in _locations().iterator(chunk_size=batch_size):
+            locations.append(location)
+            if len(locations) >= batch_size:
+                total += len(MapMarker.objects.bulk_create(_build(locations)))
+                locations = []
+        total += len(MapMarker.objects.bulk_create(_build(locations)))
+    return total
+
+
+def render(markers, request):
+    """
+    Turn marker rows into the LocationListSerializer representation for the
+    current request: absolute media URLs, the user's is_favorited flag and
+    only the fields asked for with ?fields=/?expand=.
+    """
+    fields = LocationListSerializer.requested_fields(request)
+    favorited = (
+        favorited_location_ids(request.user)
+        if fields is None or 'is_favorited' in fields else None
+    )
+    data = []
+    for marker in markers:
+        item = dict(marker.payload)
+        if fields is not None:
+            item = {name: value for name, value in item.items() if name in fields}
+        for field in MEDIA_FIELDS:
+            if item.get(field):
+                item[field] = request.build_absolute_uri(item[field])
+        for field in RENDITION_FIELDS:
+            if item.get(field):
+                item[field] = _absolute_renditions(request, item[field])
+        if 'products' in item:
+            item['products'] = [_absolute_product(request, product) for product in item['products']]
+        if favorited is not None:
+            item['is_favorited'] = marker.location_id in favorited
+        data.append(item)
+    return data
+
+
+def _absolute_renditions(request, renditions):
+    return {
+        name: dict(
+            rendition,
+            url=request.build_absolute_uri(rendition['url']),
+            webp=request.build_absolute_uri(rendition['webp']),
+        )
+        for name, rendition in renditions.items()
+    }
+
+
+def _absolute_product(request, product):
+    product = dict(product)
+    if product.get('image'):
+        product['image'] = request.build_absolute_uri(product['image'])
+    if product.get('image_renditions'):
+        product['image_renditions'] = _absolute_renditions(request, product['image_renditions'])
+    return product
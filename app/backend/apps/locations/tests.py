@@ -0,0 +1,425 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from apps.common.models import Address
+from apps.favorites.models import Favorite
+from apps.products.models import Category, Product
+from apps.users.models import User
+from . import detail_cache
+from .models import Location
+
+
+class LocationListQueryCountTests(APITestCase):
+    """
+    Listing locations must take the same number of queries however many
+    rows come back.
+    """
+
+    def setUp(self):
+        category = Category.objects.create(name='Frutas', slug='frutas')
+        self.products = [
+            Product.objects.create(name=f'Produto {i}', category=category) for i in range(3)
+        ]
+        producer_user = User.objects.create_user(
+            email='produtor@example.com', password='senha123',
+            first_name='Ana', last_name='Lima', user_type=User.UserType.PRODUCER
+        )
+        self.producer = producer_user.producer_profile
+        self.user = User.objects.create_user(
+            email='consumidor@example.com', password='senha123',
+            first_name='João', last_name='Silva'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _create_locations(self, count):
+        for i in range(count):
+            address = Address.objects.create(
+                street='Rua Verde', neighborhood='Pinheiros', city='São Paulo',
+                state='SP', zip_code='05422-000',
+                latitude=Decimal('-23.56') + Decimal(i) / 1000,
+                longitude=Decimal('-46.69')
+            )
+            location = Location.objects.create(
+                producer=self.producer, name=f'Feira {i}', address=address
+            )
+            location.products.set(self.products)
+            if i % 2:
+                Favorite.objects.create(user=self.user, location=location)
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_map_data_query_count_is_constant(self):
+        self._create_locations(2)
+        small, _ = self._count_queries('/api/locations/map_data/')
+
+        self._create_locations(10)
+        large, response = self._count_queries('/api/locations/map_data/')
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data), 12)
+        self.assertEqual(sum(row['is_favorited'] for row in response.data), 6)
+        self.assertTrue(all(row['product_count'] == 3 for row in response.data))
+
+    def test_list_query_count_is_constant(self):
+        self._create_locations(2)
+        small, _ = self._count_queries('/api/locations/')
+
+        self._create_locations(10)
+        large, response = self._count_queries('/api/locations/')
+
+        self.assertEqual(small, large)
+        self.assertEqual(response.data['count'], 12)
+
+
+class OpenAtNowConditionalTests(APITestCase):
+    """
+    map_data?open_at=now depends on the clock as well as on the data, so its
+    validators must not hold across minutes.
+    """
+
+    def setUp(self):
+        producer_user = User.objects.create_user(
+            email='produtor@example.com', password='senha123',
+            first_name='Ana', last_name='Lima', user_type=User.UserType.PRODUCER
+        )
+        address = Address.objects.create(
+            street='Rua Verde', neighborhood='Pinheiros', city='São Paulo',
+            state='SP', zip_code='05422-000',
+            latitude=Decimal('-23.56'), longitude=Decimal('-46.69')
+        )
+        Location.objects.create(
+            producer=producer_user.producer_profile, name='Feira da Manhã', address=address,
+            operation_days='Segunda a Sexta', operation_hours='8h às 12h'
+        )
+
+    def _get(self, moment, **headers):
+        with mock.patch('django.utils.timezone.now', return_value=moment):
+            return self.client.get('/api/locations/map_data/', {'open_at': 'now'}, **headers)
+
+    def test_etag_follows_the_current_minute(self):
+        # Monday 11:59 and 12:01 in São Paulo (UTC-3).
+        before_closing = datetime(2026, 10, 19, 14, 59, 10, tzinfo=dt_timezone.utc)
+        after_closing = datetime(2026, 10, 19, 15, 1, tzinfo=dt_timezone.utc)
+
+        response = self._get(before_closing)
+        self.assertEqual(len(response.data), 1)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+
+        same_minute = self._get(before_closing.replace(second=50), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(same_minute.status_code, 304)
+
+        later = self._get(after_closing, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(later.status_code, 200)
+        self.assertEqual(later.data, [])
+        self.assertNotEqual(later['ETag'], etag)
+
+
+class RadiusMapDataTests(APITestCase):
+    """
+    radius_km on map_data is answered from the bounding box of the radius
+    plus an exact distance check, in every output format.
+    """
+
+    # 0, ~1.1, ~3.3 and ~11 km north of the centre.
+    OFFSETS = ('0', '0.01', '0.03', '0.1')
+
+    def setUp(self):
+        producer_user = User.objects.create_user(
+            email='produtor@example.com', password='senha123',
+            first_name='Ana', last_name='Lima', user_type=User.UserType.PRODUCER
+        )
+        self.locations = []
+        for offset in self.OFFSETS:
+            address = Address.objects.create(
+                street='Rua Verde', neighborhood='Pinheiros', city='São Paulo',
+                state='SP', zip_code='05422-000',
+                latitude=Decimal('-23.56') + Decimal(offset), longitude=Decimal('-46.69')
+            )
+            self.locations.append(Location.objects.create(
+                producer=producer_user.producer_profile, name=f'Feira {offset}', address=address
+            ))
+        self.near = [location.pk for location in self.locations[:3]]
+        self.params = {'lat': '-23.56', 'lng': '-46.69', 'radius_km': '5'}
+
+    def test_markers_sorted_by_distance(self):
+        response = self.client.get(
+            '/api/locations/map_data/', {**self.params, 'ordering': 'distance'}
+        )
+
+        self.assertEqual([item['id'] for item in response.data], self.near)
+        self.assertEqual(response.data[0]['distance_km'], 0)
+
+    def test_ordering_by_distance_needs_a_radius(self):
+        params = {'lat': '-23.56', 'lng': '-46.69', 'ordering': 'distance'}
+        for url in ('/api/locations/', '/api/locations/map_data/'):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('radius_km', response.data)
+
+    def test_marker_feed_and_clusters_keep_the_radius(self):
+        response = self.client.get(
+            '/api/locations/map_data/', self.params,
+            HTTP_ACCEPT='application/vnd.acheseuorganico.markers+json'
+        )
+        self.assertEqual(sorted(response.json()['ids']), self.near)
+
+        for zoom in ('5', '18'):
+            response = self.client.get('/api/locations/map_data/', {**self.params, 'zoom': zoom})
+            clustered = sum(cluster['count'] for cluster in response.data['clusters'])
+            self.assertEqual(clustered + len(response.data['markers']), len(self.near))
+
+
+class MarkerFeedNegotiationTests(APITestCase):
+    """Only marker feeds are sent in the marker feed media types."""
+
+    FEEDS = ('application/vnd.acheseuorganico.markers', 'application/vnd.acheseuorganico.markers+json')
+
+    def setUp(self):
+        producer_user = User.objects.create_user(
+            email='produtor@example.com', password='senha123',
+            first_name='Ana', last_name='Lima', user_type=User.UserType.PRODUCER
+        )
+        address = Address.objects.create(
+            street='Rua Verde', neighborhood='Pinheiros', city='São Paulo',
+            state='SP', zip_code='05422-000',
+            latitude=Decimal('-23.56'), longitude=Decimal('-46.69')
+        )
+        Location.objects.create(
+            producer=producer_user.producer_profile, name='Feira', address=address
+        )
+
+    def test_zoom_is_not_acceptable_with_a_feed(self):
+        for accept in self.FEEDS:
+            response = self.client.get('/api/locations/map_data/', {'zoom': '5'}, HTTP_ACCEPT=accept)
+
+            self.assertEqual(response.status_code, 406)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('detail', response.json())
+
+    def test_errors_are_plain_json(self):
+        params = {'lat': '-23.56', 'lng': '-46.69', 'ordering': 'distance'}
+        for accept in self.FEEDS:
+            response = self.client.get('/api/locations/map_data/', params, HTTP_ACCEPT=accept)
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('radius_km', response.json())
+
+        response = self.client.get(
+            '/api/locations/map_data/', HTTP_ACCEPT='application/vnd.acheseuorganico.markers'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.acheseuorganico.markers')
+
+
+class DetailCacheVersionTests(APITestCase):
+    """
+    Cached detail payloads follow a data version per location, so a change
+    committed by another process is seen without anything deleted from this
+    cache, and changes to other locations keep the entry.
+    """
+
+    def setUp(self):
+        producer_user = User.objects.create_user(
+            email='produtor@example.com', password='senha123',
+            first_name='Ana', last_name='Lima', user_type=User.UserType.PRODUCER
+        )
+        self.producer = producer_user.producer_profile
+        category = Category.objects.create(name='Frutas', slug='frutas')
+        self.sold = Product.objects.create(name='Banana', category=category)
+        self.other_product = Product.objects.create(name='Maçã', category=category)
+        self.location = self._create('Feira da Manhã')
+        self.location.products.set([self.sold])
+        self.other_location = self._create('Feira da Noite')
+        self.other_location.products.set([self.other_product])
+        self.url = f'/api/locations/{self.location.pk}/'
+
+    def _create(self, name):
+        address = Address.objects.create(
+            street='Rua Verde', neighborhood='Pinheiros', city='São Paulo',
+            state='SP', zip_code='05422-000',
+            latitude=Decimal('-23.56'), longitude=Decimal('-46.69')
+        )
+        return Location.objects.create(producer=self.producer, name=name, address=address)
+
+    def _rename_without_signals(self, name):
+        """What another worker's save leaves behind before its version bump."""
+        Location.objects.filter(pk=self.location.pk).update(name=name)
+
+    def test_version_bump_from_elsewhere_refreshes_the_payload(self):
+        self.assertEqual(self.client.get(self.url).data['name'], 'Feira da Manhã')
+
+        self._rename_without_signals('Feira da Tarde')
+        self.assertEqual(self.client.get(self.url).data['name'], 'Feira da Manhã')
+        with self.captureOnCommitCallbacks(execute=True):
+            detail_cache.bump([self.location.pk])
+
+        self.assertEqual(self.client.get(self.url).data['name'], 'Feira da Tarde')
+
+    def test_unrelated_changes_keep_the_entry(self):
+        self.client.get(self.url)
+        self._rename_without_signals('Feira da Tarde')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_location.name = 'Feira da Madrugada'
+            self.other_location.save()
+            self.other_product.name = 'Pera'
+            self.other_product.save()
+        self.assertEqual(self.client.get(self.url).data['name'], 'Feira da Manhã')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sold.name = 'Banana Prata'
+            self.sold.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['name'], 'Feira da Tarde')
+        self.assertEqual([product['name'] for product in response.data['products']], ['Banana Prata'])
+
+
+def walk_cursor_pages(test, url, params, limit=50):
+    """Ids of every keyset page of url, in order, following the next links."""
+    ids = []
+    response = test.client.get(url, {**params, 'cursor': ''})
+    for _ in range(limit):
+        test.assertEqual(response.status_code, 200, response.data)
+        ids.extend(item['id'] for item in response.data['results'])
+        if response.data['next'] is None:
+            return ids
+        response = test.client.get(response.data['next'])
+    test.fail(f'{url} still had a next page after {limit} pages: {ids}')
+
+
+class WhereToBuyCursorTests(APITestCase):
+    """Keyset pages of where_to_buy with only a viewport."""
+
+    def setUp(self):
+        category = Category.objects.create(name='Frutas', slug='frutas')
+        self.product = Product.objects.create(name='Banana', category=category)
+        other = Product.objects.create(name='Maçã', category=category)
+        producer_user = User.objects.create_user(
+            email='produtor@example.com', password='senha123',
+            first_name='Ana', last_name='Lima', user_type=User.UserType.PRODUCER
+        )
+        self.selling = []
+        for i in range(7):
+            address = Address.objects.create(
+                street='Rua Verde', neighborhood='Pinheiros', city='São Paulo',
+                state='SP', zip_code='05422-000',
+                latitude=Decimal('-23.56') + Decimal(i) / 1000, longitude=Decimal('-46.69')
+            )
+            location = Location.objects.create(
+                producer=producer_user.producer_profile, name=f'Feira {i}', address=address
+            )
+            # Every other location sells a second product, so each location
+            # has several postings.
+            location.products.set([self.product, other] if i % 2 else [self.product])
+            self.selling.append(location.pk)
+        self.params = {
+            'products': str(self.product.pk), 'page_size': '2',
+            'sw_lat': '-23.6', 'sw_lng': '-46.7', 'ne_lat': '-23.5', 'ne_lng': '-46.6',
+        }
+
+    def test_walks_every_page_once(self):
+        ids = walk_cursor_pages(self, '/api/locations/where_to_buy/', self.params)
+
+        self.assertEqual(ids, sorted(self.selling))
+
+
+class KeysetCursorWalkTests(APITestCase):
+    """
+    Following the next links of keyset pages returns every row exactly once,
+    rows sharing created_at included, and stops after the last page.
+    """
+
+    def setUp(self):
+        producer_user = User.objects.create_user(
+            email='produtor@example.com', password='senha123',
+            first_name='Ana', last_name='Lima', user_type=User.UserType.PRODUCER
+        )
+        for i in range(8):
+            address = Address.objects.create(
+                street='Rua Verde', neighborhood='Pinheiros', city='São Paulo',
+                state='SP', zip_code='05422-000',
+                latitude=Decimal('-23.56'), longitude=Decimal('-46.69')
+            )
+            Location.objects.create(
+                producer=producer_user.producer_profile, name=f'Feira {i % 3}', address=address
+            )
+        category = Category.objects.create(name='Frutas', slug='frutas')
+        for i in range(8):
+            Product.objects.create(name=f'Produto {i % 3}', category=category)
+
+        # Two timestamps for eight rows: most pages end inside a tie.
+        may = datetime(2024, 5, 1, tzinfo=dt_timezone.utc)
+        june = datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+        for model in (Location, Product):
+            pks = sorted(model.objects.values_list('pk', flat=True))
+            model.objects.filter(pk__in=pks[::2]).update(created_at=may)
+            model.objects.filter(pk__in=pks[1::2]).update(created_at=june)
+
+    def _assert_walks_every_row(self, url, model, ordering):
+        expected = sorted(model.objects.values_list('pk', flat=True))
+        for page_size in ('1', '3', '8'):
+            ids = walk_cursor_pages(self, url, {'page_size': page_size, **ordering})
+            self.assertEqual(sorted(ids), expected, (page_size, ordering))
+            self.assertEqual(len(ids), len(set(ids)), (page_size, ordering))
+
+    def test_locations(self):
+        for ordering in ({}, {'ordering': 'created_at'}, {'ordering': '-created_at'}, {'ordering': 'name'}):
+            self._assert_walks_every_row('/api/locations/', Location, ordering)
+
+    def test_products(self):
+        for ordering in ({}, {'ordering': 'created_at'}, {'ordering': '-created_at'}):
+            self._assert_walks_every_row('/api/products/', Product, ordering)
+
+
+class ClusterMarkerLookupTests(APITestCase):
+    """
+    The markers of small cells are read cell by cell, so cells far apart do
+    not read the dense area between them.
+    """
+
+    def setUp(self):
+        producer_user = User.objects.create_user(
+            email='produtor@example.com', password='senha123',
+            first_name='Ana', last_name='Lima', user_type=User.UserType.PRODUCER
+        )
+        self.producer = producer_user.producer_profile
+        # São Paulo, between Manaus and Porto Alegre.
+        for i in range(20):
+            self._create(Decimal('-23.56') + Decimal(i) / 1000, Decimal('-46.69'))
+        self.scattered = [
+            self._create(Decimal('-3.1'), Decimal('-60.02')),
+            self._create(Decimal('-30.03'), Decimal('-51.23')),
+        ]
+
+    def _create(self, latitude, longitude):
+        address = Address.objects.create(
+            street='Rua Verde', neighborhood='Centro', city='São Paulo',
+            state='SP', zip_code='01000-000', latitude=latitude, longitude=longitude
+        )
+        return Location.objects.create(
+            producer=self.producer, name='Feira', address=address
+        ).pk
+
+    def test_scattered_cells_read_only_their_members(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/locations/map_data/', {'zoom': '4'})
+
+        self.assertEqual([cluster['count'] for cluster in response.data['clusters']], [20])
+        self.assertEqual(sorted(item['id'] for item in response.data['markers']), self.scattered)
+        member_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'locations_mapclustermember' in query['sql']
+        ]
+        self.assertEqual(len(member_queries), 1)
+        with connection.cursor() as cursor:
+            cursor.execute(member_queries[0])
+            self.assertEqual(len(cursor.fetchall()), len(self.scattered))
@@ -1,15 +1,39 @@
 from rest_framework import viewsets, filters, status, serializers
+from rest_framework.exceptions import NotAcceptable
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
-from .models import Location, LocationImage
+from django.db.models import Count, Q
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from apps.common.pagination import KeysetPagination
+from apps.common.text import normalize_text
+from apps.common.versions import condition_on_versions
+from .models import Location, LocationImage, MapMarker
+from .filters import (
+    LocationFilter,
+    LocationSearchFilter,
+    OpenAtFilter,
+    ViewportFilter,
+    open_at_now_key,
+    parse_point,
+    parse_viewport,
+    viewport_q
+)
+from . import autocomplete, clustering, detail_cache, export, geo, marker_feed, postings, search, snapshot
+from .bulk_import import LocationImporter, detect_format, read_rows
+from .renderers import MarkerColumnsBinaryRenderer, MarkerColumnsJSONRenderer
 from .serializers import (
     LocationSerializer,
     LocationCreateUpdateSerializer,
     LocationListSerializer,
-    LocationImageSerializer
+    LocationImageSerializer,
+    NearbyLocationSerializer,
+    products_prefetch
 )
 
 
@@ -20,16 +44,185 @@ class LocationViewSet(viewsets.ModelViewSet):
     """
     queryset = Location.objects.select_related(
         'producer', 'producer__user', 'address'
-    ).prefetch_related('products', 'images', 'favorited_by').filter(is_active=True)
+    ).filter(is_active=True)
     
     serializer_class = LocationSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['location_type', 'is_verified', 'address__city', 'address__state']
-    search_fields = ['name', 'description', 'address__city', 'address__neighborhood', 'producer__business_name']
+    pagination_class = KeysetPagination
+    filter_backends = [
+        DjangoFilterBackend, ViewportFilter, OpenAtFilter, LocationSearchFilter,
+        filters.OrderingFilter
+    ]
+    filterset_class = LocationFilter
     ordering_fields = ['created_at', 'name']
     ordering = ['-created_at']
 
+    # Actions that only write or check ownership and never serialize
+    # related rows.
+    WRITE_ACTIONS = ('create', 'update', 'partial_update', 'destroy', 'add_image')
+
+    # Actions whose queryset is only serialized, so its joins, prefetches and
+    # columns can follow ?fields=/?expand= (see SparseFieldsetMixin).
+    SPARSE_ACTIONS = ('list', 'retrieve', 'my_locations', 'nearest', 'search', 'where_to_buy')
+
+    def get_queryset(self):
+        """
+        Load only what each action serializes. Favorites are never loaded as
+        rows: lists resolve is_favorited from the user's favorite ids (see
+        LocationListSerializer) and the detail view does not use them.
+        """
+        queryset = super().get_queryset()
+        if self.action in self.WRITE_ACTIONS:
+            return queryset
+
+        serializer_class = LocationSerializer if self.action == 'retrieve' else LocationListSerializer
+        if self.action in self.SPARSE_ACTIONS:
+            return serializer_class.sparse_queryset(queryset, self.request)
+        return queryset.prefetch_related(products_prefetch())
+
+    @staticmethod
+    def with_list_data(queryset):
+        """
+        Annotations read by LocationListSerializer, so that serializing a list
+        takes a fixed number of queries.
+        """
+        return queryset.annotate(product_count=Count('products', distinct=True))
+
+    def list(self, request, *args, **kwargs):
+        """
+        Filter and paginate location ids, then read the rows of the page from
+        the MapMarker snapshot instead of joining and serializing them.
+
+        GET /api/locations/?lat=-23.55&lng=-46.63&ordering=distance&radius_km=5
+        limits to (and sorts by) the distance to the point and adds
+        distance_km to each item; ordering=distance needs radius_km. See
+        _nearby.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        distances = None
+        nearby = self._nearby(request, queryset)
+        if nearby is None:
+            location_ids = queryset.values_list('pk', flat=True)
+        else:
+            if KeysetPagination.cursor_query_param in request.query_params:
+                raise serializers.ValidationError(
+                    {'cursor': 'cursor não pode ser usado com lat/lng, ordering=distance ou radius_km.'}
+                )
+            location_ids, distances = nearby
+            distances = dict(zip(location_ids.tolist(), distances.tolist()))
+            location_ids = location_ids.tolist()
+
+        page = self.paginate_queryset(location_ids)
+        data = self._marker_data(request, list(location_ids if page is None else page), distances)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    DISTANCE_ORDERING = 'distance'
+
+    def _around(self, request):
+        """
+        (latitude, longitude, radius_km) from lat/lng and radius_km when
+        ordering=distance or radius_km was asked for, else None. Sorting by
+        distance needs a radius, so the candidates always come from its
+        bounding box instead of the whole table.
+        """
+        params = request.query_params
+        if not self._sort_by_distance(request) and 'radius_km' not in params:
+            return None
+        latitude, longitude = parse_point(params, required=True)
+        radius_km = self._radius_param(params)
+        if radius_km is None:
+            raise serializers.ValidationError(
+                {'radius_km': 'Informe radius_km para ordenar por distância.'}
+            )
+        return latitude, longitude, radius_km
+
+    def _sort_by_distance(self, request):
+        return request.query_params.get(filters.OrderingFilter.ordering_param) == self.DISTANCE_ORDERING
+
+    def _nearby(self, request, queryset):
+        """
+        With ordering=distance or radius_km, the (ids, distances) arrays of
+        the queryset locations within radius_km of lat/lng from
+        geo.by_distance: sorted by distance for ordering=distance, otherwise
+        kept in the queryset ordering. None when neither was asked for.
+
+        One query reads the id and coordinates of the candidates in the
+        bounding box of the radius, through the Address coordinate index;
+        distances, the radius cut and the sort are done on arrays.
+        """
+        around = self._around(request)
+        if around is None:
+            return None
+        latitude, longitude, radius_km = around
+        candidates = queryset.filter(
+            viewport_q(*geo.bounding_box(*around), prefix='address__'),
+            address__latitude__isnull=False,
+            address__longitude__isnull=False
+        )
+        return geo.by_distance(
+            latitude, longitude,
+            candidates.values_list('pk', 'address__latitude', 'address__longitude'),
+            radius_km,
+            sort=self._sort_by_distance(request)
+        )
+
+    @staticmethod
+    def _radius_param(params):
+        """The optional radius_km query param."""
+        if 'radius_km' not in params:
+            return None
+        try:
+            radius_km = float(params['radius_km'])
+        except ValueError:
+            raise serializers.ValidationError({'radius_km': 'radius_km inválido.'})
+        if not 0 < radius_km <= geo.NEAREST_MAX_RADIUS_KM:
+            raise serializers.ValidationError(
+                {'radius_km': f'radius_km deve estar entre 0 e {geo.NEAREST_MAX_RADIUS_KM:g}.'}
+            )
+        return radius_km
+
+    def _marker_data(self, request, location_ids, distances=None):
+        """
+        LocationListSerializer data for the given ids, in order. Locations
+        missing from the snapshot are serialized directly. With distances
+        ({id: km}) each item also gets its distance_km.
+        """
+        markers = list(MapMarker.objects.filter(location_id__in=location_ids))
+        data = dict(zip(
+            (marker.location_id for marker in markers),
+            snapshot.render(markers, request)
+        ))
+
+        missing = [pk for pk in location_ids if pk not in data]
+        if missing:
+            serializer = LocationListSerializer(
+                self.with_list_data(self.get_queryset().filter(pk__in=missing)),
+                many=True,
+                context=self.get_serializer_context()
+            )
+            data.update((item['id'], item) for item in serializer.data)
+
+        if distances is not None:
+            for pk, item in data.items():
+                item['distance_km'] = round(distances[pk], 3)
+        return [data[pk] for pk in location_ids if pk in data]
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Location detail, read from the per-location payload cache (see
+        apps.locations.detail_cache) with is_favorited merged in.
+        """
+        try:
+            location_id = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            raise Http404
+        payload = detail_cache.get(location_id)
+        if payload is None:
+            raise Http404
+        return Response(detail_cache.render(payload, request))
+
     def get_serializer_class(self):
         if self.action == 'list':
             return LocationListSerializer
@@ -45,6 +238,19 @@ class LocationViewSet(viewsets.ModelViewSet):
             return [IsAuthenticated()]
         return [IsAuthenticatedOrReadOnly()]
 
+    def finalize_response(self, request, response, *args, **kwargs):
+        if response.status_code >= 400 and getattr(
+            getattr(request, 'accepted_renderer', None), 'marker_columns', False
+        ):
+            # Only marker feeds go out in the feed media types; errors are JSON.
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.action == 'map_data':
+            # JSON and the marker feeds share the URL: caches must key on Accept.
+            patch_vary_headers(response, ['Accept'])
+        return response
+
     def perform_create(self, serializer):
         """
         Create location for current user's producer profile.
@@ -80,15 +286,45 @@ class LocationViewSet(viewsets.ModelViewSet):
             )
         
         producer_profile = request.user.producer_profile
-        locations = self.queryset.filter(producer=producer_profile)
+        locations = self.with_list_data(self.get_queryset().filter(producer=producer_profile))
         serializer = LocationListSerializer(locations, many=True, context={'request': request})
         return Response(serializer.data)
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], renderer_classes=[
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        MarkerColumnsJSONRenderer,
+        MarkerColumnsBinaryRenderer,
+    ])
+    @condition_on_versions(
+        'locations', 'addresses', 'producers', 'products', 'categories',
+        user_scopes=('favorites',), extra_key=open_at_now_key
+    )
     def map_data(self, request):
         """
         Get simplified location data for map display.
         GET /api/locations/map_data/
+        GET /api/locations/map_data/?sw_lat=..&sw_lng=..&ne_lat=..&ne_lng=..
+        GET /api/locations/map_data/?zoom=10&sw_lat=..&sw_lng=..&ne_lat=..&ne_lng=..
+
+        When a viewport is given only the locations inside it are returned.
+        With lat/lng, radius_km keeps the locations within that distance and
+        ordering=distance (which needs radius_km) sorts the markers by it,
+        adding distance_km to each (clustered responses and the columnar feed
+        only take the radius).
+        With a zoom level the response is clustered: grid cells with more than
+        a few points come back as clusters and the rest as individual markers.
+
+        Clients drawing large marker sets can ask for a compact columnar feed
+        (ids, scaled coordinates, type codes, verified flags) through Accept:
+        application/vnd.acheseuorganico.markers+json for JSON arrays or
+        application/vnd.acheseuorganico.markers for packed binary. The feeds
+        have no clustered form, so zoom with either of them gets 406 Not
+        Acceptable; errors always come back as plain JSON.
+
+        Responses carry ETag/Last-Modified validators; unchanged data is
+        answered with 304 Not Modified before any query on locations. With
+        open_at=now the ETag also follows the current minute and there is no
+        Last-Modified, since the open set changes without any write.
         """
         queryset = self.filter_queryset(self.get_queryset())
         
@@ -96,10 +332,408 @@ class LocationViewSet(viewsets.ModelViewSet):
             address__latitude__isnull=False,
             address__longitude__isnull=False
         )
-        
-        serializer = LocationListSerializer(queryset, many=True, context={'request': request})
+
+        zoom = request.query_params.get('zoom')
+        marker_columns = getattr(request.accepted_renderer, 'marker_columns', False)
+        around = self._around(request)
+        within = None
+        if around is not None:
+            # The box of the radius in SQL, the exact circle on the rows read.
+            queryset = queryset.filter(viewport_q(*geo.bounding_box(*around), prefix='address__'))
+            within = geo.within(*around)
+
+        if zoom is not None:
+            if marker_columns:
+                raise NotAcceptable('O feed de marcadores não tem versão agrupada; envie sem zoom.')
+            return self._clustered_map_data(request, queryset, zoom, within)
+
+        if marker_columns:
+            return Response(marker_feed.encode(queryset, within))
+
+        markers = self._map_markers(request, queryset, around)
+        if around is None:
+            return Response(snapshot.render(markers, request))
+        return Response(self._markers_by_distance(request, markers, around))
+
+    # Query params the precomputed map tables (cluster grid and marker
+    # snapshot) can answer on their own, without joining Location.
+    DIRECT_MAP_PARAMS = {'zoom', 'location_type', 'format', *ViewportFilter.params}
+
+    # Query params of the distance filter and sort.
+    NEARBY_PARAMS = {'lat', 'lng', 'radius_km', 'ordering'}
+
+    def _map_markers(self, request, queryset, around=None):
+        """
+        MapMarker rows for map_data. Viewport, type and radius filters are
+        read straight from the snapshot and its coordinate index (the radius
+        as its bounding box); any other filter goes through the regular
+        Location pipeline as a subquery.
+        """
+        if not set(request.query_params) <= self.DIRECT_MAP_PARAMS | self.NEARBY_PARAMS:
+            return MapMarker.objects.filter(location__in=queryset.values('pk'))
+
+        markers = MapMarker.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        viewport = parse_viewport(request.query_params)
+        if viewport:
+            markers = markers.filter(viewport_q(*viewport))
+        if around is not None:
+            markers = markers.filter(viewport_q(*geo.bounding_box(*around)))
+        location_type = request.query_params.get('location_type')
+        if location_type:
+            markers = markers.filter(location_type=location_type)
+        return markers
+
+    def _markers_by_distance(self, request, markers, around):
+        """
+        Rendered markers within the radius, sorted by distance for
+        ordering=distance, each with its distance_km.
+        """
+        latitude, longitude, radius_km = around
+        markers = {
+            marker.location_id: marker
+            for marker in markers.filter(latitude__isnull=False, longitude__isnull=False)
+        }
+        location_ids, distances = geo.by_distance(
+            latitude, longitude,
+            ((pk, marker.latitude, marker.longitude) for pk, marker in markers.items()),
+            radius_km,
+            sort=self._sort_by_distance(request)
+        )
+        data = snapshot.render([markers[pk] for pk in location_ids.tolist()], request)
+        for item, distance in zip(data, distances.tolist()):
+            item['distance_km'] = round(distance, 3)
+        return data
+
+    def _clustered_map_data(self, request, queryset, zoom, within=None):
+        try:
+            zoom = int(zoom)
+        except ValueError:
+            raise serializers.ValidationError({'zoom': 'Zoom inválido.'})
+        if not 0 <= zoom <= 22:
+            raise serializers.ValidationError({'zoom': 'Zoom deve estar entre 0 e 22.'})
+
+        if zoom > clustering.MAX_CLUSTER_ZOOM:
+            clusters, markers = [], self.with_list_data(queryset)
+            if within is not None:
+                markers = [
+                    location for location in markers
+                    if within(location.address.latitude, location.address.longitude)
+                ]
+        else:
+            if set(request.query_params) <= self.DIRECT_MAP_PARAMS:
+                cells = clustering.precomputed_cells(
+                    zoom,
+                    viewport=parse_viewport(request.query_params),
+                    location_type=request.query_params.get('location_type')
+                )
+            else:
+                cells = clustering.cells_from_queryset(queryset, zoom, within)
+            clusters, small_cells = clustering.split_cells(cells, zoom)
+            location_ids = clustering.location_ids_in_cells(small_cells, zoom, within)
+            markers = [
+                location
+                for start in range(0, len(location_ids), clustering.ID_BATCH_SIZE)
+                for location in self.with_list_data(
+                    queryset.filter(pk__in=location_ids[start:start + clustering.ID_BATCH_SIZE])
+                )
+            ]
+
+        serializer = LocationListSerializer(markers, many=True, context={'request': request})
+        return Response({
+            'zoom': zoom,
+            'clusters': clusters,
+            'markers': serializer.data,
+        })
+
+    @action(detail=False, methods=['get'])
+    def nearest(self, request):
+        """
+        Get the k active locations closest to a point, sorted by distance.
+        GET /api/locations/nearest/?lat=-23.55&lng=-46.63&k=10&radius_km=50
+
+        Candidates come from growing bounding boxes over the Address
+        coordinate index, so distances are only computed near the point.
+        """
+        latitude, longitude = parse_point(request.query_params, required=True)
+        k, radius_km = self._nearest_params(request)
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def candidates_in_box(box):
+            return queryset.filter(viewport_q(*box, prefix='address__')).values_list(
+                'pk', 'address__latitude', 'address__longitude'
+            )
+
+        return self._nearby_response(
+            request, geo.nearest(latitude, longitude, k, candidates_in_box, radius_km)
+        )
+
+    def _nearest_params(self, request):
+        try:
+            k = int(request.query_params.get('k', 10))
+            radius_km = float(request.query_params.get('radius_km', geo.NEAREST_MAX_RADIUS_KM))
+        except ValueError:
+            raise serializers.ValidationError({'detail': 'Parâmetros k ou radius_km inválidos.'})
+        if not 1 <= k <= 100:
+            raise serializers.ValidationError({'k': 'k deve estar entre 1 e 100.'})
+        if not 0 < radius_km <= geo.NEAREST_MAX_RADIUS_KM:
+            raise serializers.ValidationError(
+                {'radius_km': f'radius_km deve estar entre 0 e {geo.NEAREST_MAX_RADIUS_KM:g}.'}
+            )
+        return k, radius_km
+
+    def _nearby_response(self, request, nearest):
+        """Serialize the (location id, distance) pairs from geo.nearest."""
+        distances = dict(nearest)
+        locations = self.with_list_data(self.get_queryset().filter(pk__in=distances))
+        for location in locations:
+            location.distance_km = round(distances[location.pk], 3)
+
+        serializer = NearbyLocationSerializer(
+            sorted(locations, key=lambda location: location.distance_km),
+            many=True,
+            context={'request': request}
+        )
         return Response(serializer.data)
 
+    # Query params of where_to_buy that do not filter locations.
+    WHERE_TO_BUY_PARAMS = {'products', 'categories', 'match', 'lat', 'lng', 'k', 'radius_km'}
+
+    @action(detail=False, methods=['get'])
+    def where_to_buy(self, request):
+        """
+        Active locations selling the given products and/or categories.
+        GET /api/locations/where_to_buy/?products=12,15&match=all&lat=-23.55&lng=-46.63&k=10
+        GET /api/locations/where_to_buy/?categories=3&match=any&sw_lat=..&sw_lng=..&ne_lat=..&ne_lng=..
+
+        match=all (default) keeps the locations selling every product and at
+        least one product of every category; match=any keeps those selling
+        any of them. With lat/lng the k nearest come back with their distance
+        (inside the viewport, if one is also given); with only a viewport
+        every match inside it is returned, paginated. Answered from the
+        product posting lists (see apps.locations.postings).
+        """
+        params = request.query_params
+        product_ids = self._parse_ids(params, 'products')
+        category_ids = self._parse_ids(params, 'categories')
+        if not product_ids and not category_ids:
+            raise serializers.ValidationError({'products': 'Informe products ou categories.'})
+        if len(product_ids) + len(category_ids) > postings.MAX_TERMS:
+            raise serializers.ValidationError(
+                {'products': f'Informe no máximo {postings.MAX_TERMS} produtos e categorias.'}
+            )
+        match = params.get('match', 'all')
+        if match not in ('all', 'any'):
+            raise serializers.ValidationError({'match': 'match deve ser all ou any.'})
+
+        point = parse_point(params)
+        viewport = parse_viewport(params)
+        if point is None and viewport is None:
+            raise serializers.ValidationError({'point': 'Informe lat e lng ou o viewport.'})
+
+        matches = postings.matching(product_ids, category_ids, match_all=match == 'all')
+        if viewport:
+            matches = matches.filter(viewport_q(*viewport))
+        if not set(params) <= self.PAGE_PARAMS | self.WHERE_TO_BUY_PARAMS | set(ViewportFilter.params):
+            matches = matches.filter(
+                location__in=self.filter_queryset(self.get_queryset()).values('pk')
+            )
+
+        if point is None:
+            # Paginated as Location primary keys so cursors follow Location pks.
+            location_ids = Location.objects.filter(
+                pk__in=matches.values('location_id')
+            ).order_by('pk').values_list('pk', flat=True)
+            page = self.paginate_queryset(location_ids)
+            data = self._marker_data(request, list(location_ids if page is None else page))
+            if page is not None:
+                return self.get_paginated_response(data)
+            return Response(data)
+
+        k, radius_km = self._nearest_params(request)
+
+        def candidates_in_box(box):
+            return matches.filter(viewport_q(*box)).values_list(
+                'location_id', 'location_latitude', 'location_longitude'
+            )
+
+        return self._nearby_response(request, geo.nearest(*point, k, candidates_in_box, radius_km))
+
+    @staticmethod
+    def _parse_ids(params, name):
+        try:
+            return sorted({int(value) for value in params.get(name, '').split(',') if value.strip()})
+        except ValueError:
+            raise serializers.ValidationError({name: f'{name} deve ser uma lista de ids.'})
+
+    # Query params that do not filter locations.
+    PAGE_PARAMS = {'page', 'page_size', 'cursor', 'format'}
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Full-text search, most relevant locations first.
+        GET /api/locations/search/?q=feira organica pinheiros
+
+        Matches location names and descriptions, producer names, neighborhoods,
+        cities and the products sold at each location through the search
+        index (see apps.locations.search). The other list filters still apply.
+        """
+        ranked = search.ranked(request.query_params.get('q', ''))
+        if ranked is None:
+            raise serializers.ValidationError({'q': 'Informe o termo de busca.'})
+
+        if not set(request.query_params) <= self.PAGE_PARAMS | {'q'}:
+            ranked = ranked.filter(
+                location__in=self.filter_queryset(self.get_queryset()).values('pk')
+            )
+
+        location_ids = ranked.values_list('location_id', flat=True)
+        page = self.paginate_queryset(location_ids)
+        data = self._marker_data(request, list(location_ids if page is None else page))
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Counts for the filter sidebar under the current filters.
+        GET /api/locations/facets/?search=feira&sw_lat=..&sw_lng=..&ne_lat=..&ne_lng=..
+
+        Accepts every list filter. Type, city, state and verification counts
+        come from one grouped query over the filtered locations; category
+        counts need a second one because they go through the products M2M.
+        Facet keys are the query params that filter on them.
+        """
+        # Filters through M2M joins (category, search) can repeat rows, so
+        # group over the matching ids instead of the filtered join.
+        queryset = Location.objects.filter(
+            pk__in=self.filter_queryset(self.get_queryset()).values('pk')
+        ).order_by()
+
+        type_labels = dict(Location.LocationType.choices)
+        counts = {
+            'location_type': {},
+            'address__city': {},
+            'address__state': {},
+            'is_verified': {},
+        }
+        cities = {}
+        total = 0
+        for location_type, city, state, is_verified, count in queryset.values_list(
+            'location_type', 'address__city', 'address__state', 'is_verified'
+        ).annotate(count=Count('pk')):
+            total += count
+            # Spellings that only differ in accents or case are one city.
+            city = cities.setdefault(normalize_text(city), city)
+            for facet, value in (
+                ('location_type', location_type),
+                ('address__city', city),
+                ('address__state', state),
+                ('is_verified', is_verified),
+            ):
+                counts[facet][value] = counts[facet].get(value, 0) + count
+
+        facets = {
+            facet: [
+                {'value': value, 'count': count}
+                for value, count in sorted(values.items(), key=lambda item: (-item[1], str(item[0])))
+            ]
+            for facet, values in counts.items()
+        }
+        for item in facets['location_type']:
+            item['label'] = type_labels.get(item['value'], item['value'])
+
+        facets['category'] = [
+            {'value': category_id, 'label': name, 'count': count}
+            for category_id, name, count in queryset.filter(
+                products__category__isnull=False
+            ).values_list(
+                'products__category', 'products__category__name'
+            ).annotate(
+                count=Count('pk', distinct=True)
+            ).order_by('-count', 'products__category__name')
+        ]
+
+        return Response({'count': total, 'facets': facets})
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Typeahead suggestions for the search box.
+        GET /api/locations/autocomplete/?q=pinh&limit=10
+
+        Returns cities, neighborhoods, producers, products and categories
+        whose words start with q, most used first. Served from an in-memory
+        index (see apps.locations.autocomplete).
+        """
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise serializers.ValidationError({'limit': 'limit inválido.'})
+        if not 1 <= limit <= autocomplete.MAX_LIMIT:
+            raise serializers.ValidationError(
+                {'limit': f'limit deve estar entre 1 e {autocomplete.MAX_LIMIT}.'}
+            )
+
+        return Response(autocomplete.complete(request.query_params.get('q', ''), limit))
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export_catalogue(self, request):
+        """
+        Stream every active location as NDJSON or CSV, optionally gzipped
+        (see apps.locations.export). Unlike paging through the list, memory
+        and per-query cost stay the same however many locations exist.
+        GET /api/locations/export/?file_format=csv&compress=gzip
+        """
+        file_format = request.query_params.get('file_format', 'ndjson')
+        if file_format not in export.FORMATS:
+            raise serializers.ValidationError(
+                {'file_format': 'Formato não suportado. Use ndjson ou csv.'}
+            )
+        compress = request.query_params.get('compress')
+        if compress not in (None, '', 'gzip'):
+            raise serializers.ValidationError({'compress': 'Compressão não suportada. Use gzip.'})
+        compress = compress == 'gzip'
+
+        response = StreamingHttpResponse(
+            export.stream(file_format, compress),
+            content_type='application/gzip' if compress else export.CONTENT_TYPES[file_format]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{export.filename(file_format, compress)}"'
+        )
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def bulk_import(self, request):
+        """
+        Create many locations of the current producer from a CSV or NDJSON
+        file (see apps.locations.bulk_import). Invalid rows are skipped and
+        listed in the response with their line numbers.
+        POST /api/locations/import/   file=<arquivo>, format=csv|ndjson, dry_run=true
+        """
+        if not hasattr(request.user, 'producer_profile'):
+            raise serializers.ValidationError(
+                "Você precisa ter um perfil de produtor para criar localizações."
+            )
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise serializers.ValidationError({'file': 'Envie um arquivo CSV ou NDJSON.'})
+        file_format = detect_format(upload.name, request.data.get('format'))
+        if file_format is None:
+            raise serializers.ValidationError({'format': 'Formato não suportado. Use csv ou ndjson.'})
+
+        importer = LocationImporter(
+            request.user.producer_profile,
+            dry_run=request.data.get('dry_run', '').lower() in ('1', 'true')
+        )
+        report = importer.run(read_rows(upload.file, file_format))
+        created = report['created'] and not report['dry_run']
+        return Response(report, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'])
     def add_image(self, request, pk=None):
         """
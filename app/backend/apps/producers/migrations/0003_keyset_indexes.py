@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('producers', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producerprofile',
+            index=models.Index(fields=['is_active', 'id'], name='producers_p_is_acti_6bab8e_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('producers', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producerprofile',
+            name='cover_image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -22,6 +22,8 @@ class ProducerProfile(TimeStampedModel):
         null=True,
         verbose_name='Imagem de capa'
     )
+    # Resized copies of cover_image (see apps.common.images).
+    cover_image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     
     has_organic_certification = models.BooleanField(
         default=False,
@@ -43,6 +45,9 @@ class ProducerProfile(TimeStampedModel):
     class Meta:
         verbose_name = 'Perfil de Produtor'
         verbose_name_plural = 'Perfis de Produtores'
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.business_name} - {self.user.email}"
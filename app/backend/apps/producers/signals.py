@@ -1,8 +1,13 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from apps.common import images, versions
 from apps.users.models import User
 from .models import ProducerProfile
 
+versions.track(ProducerProfile, 'producers')
+
+images.register(ProducerProfile, 'cover_image')
+
 
 @receiver(post_save, sender=User)
 def create_producer_profile(sender, instance, created, **kwargs):
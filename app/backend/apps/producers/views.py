@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from django.shortcuts import get_object_or_404
+from apps.common.pagination import KeysetPagination
 from .models import ProducerProfile
 from .serializers import (
     ProducerProfileSerializer,
@@ -19,6 +20,17 @@ class ProducerProfileViewSet(viewsets.ModelViewSet):
     queryset = ProducerProfile.objects.select_related('user').filter(is_active=True)
     serializer_class = ProducerProfileSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        """
+        Reads load only what the requested fields need (?fields=, see
+        SparseFieldsetMixin).
+        """
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return self.get_serializer_class().sparse_queryset(queryset, self.request)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from apps.products import search
+
+
+class Command(BaseCommand):
+    help = 'Recria o índice de palavras usado na busca de produtos e categorias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=search.REINDEX_BATCH_SIZE,
+            help=f'Tamanho dos lotes de leitura e inserção (padrão: {search.REINDEX_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        total = search.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ {total} produtos indexados para busca'))
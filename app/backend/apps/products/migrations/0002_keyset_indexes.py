@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'name', 'id'], name='products_pr_is_acti_632c77_idx'),
+        ),
+    ]
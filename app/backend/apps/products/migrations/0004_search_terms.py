@@ -0,0 +1,86 @@
+# Generated by Django 5.0.1 on 2026-10-17 21:29
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.common.text import normalize_text
+
+
+def _words(*texts):
+    return {
+        token[:50]
+        for text in texts
+        for token in re.findall(r'\w+', normalize_text(text))
+    }
+
+
+def fill_search_terms(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    CategorySearchTerm = apps.get_model('products', 'CategorySearchTerm')
+    CategorySearchTerm.objects.bulk_create(
+        [
+            CategorySearchTerm(term=term, category_id=category.pk)
+            for category in Category.objects.only('pk', 'name')
+            for term in _words(category.name)
+        ],
+        batch_size=1000
+    )
+
+    Product = apps.get_model('products', 'Product')
+    ProductSearchTerm = apps.get_model('products', 'ProductSearchTerm')
+    batch = []
+    for product in Product.objects.select_related('category').iterator(chunk_size=1000):
+        category_name = product.category.name if product.category else ''
+        batch.extend(
+            ProductSearchTerm(term=term, product_id=product.pk)
+            for term in _words(product.name, category_name)
+        )
+        if len(batch) >= 1000:
+            ProductSearchTerm.objects.bulk_create(batch)
+            batch = []
+    ProductSearchTerm.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='products.category')),
+            ],
+            options={
+                'verbose_name': 'Termo de Busca de Categoria',
+                'verbose_name_plural': 'Termos de Busca de Categorias',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Termo de Busca de Produto',
+                'verbose_name_plural': 'Termos de Busca de Produtos',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='categorysearchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'category'), name='unique_category_search_term'),
+        ),
+        migrations.AddConstraint(
+            model_name='productsearchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'product'), name='unique_product_search_term'),
+        ),
+        migrations.RunPython(fill_search_terms, migrations.RunPython.noop),
+    ]
@@ -34,6 +34,8 @@ class Product(TimeStampedModel):
     )
     description = models.TextField(blank=True, verbose_name='Descrição')
     image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name='Imagem')
+    # Resized copies of image (see apps.common.images).
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     
     is_active = models.BooleanField(default=True, verbose_name='Ativo')
 
@@ -41,6 +43,56 @@ class Product(TimeStampedModel):
         verbose_name = 'Produto'
         verbose_name_plural = 'Produtos'
         ordering = ['category', 'name']
+        indexes = [
+            models.Index(fields=['is_active', 'name', 'id']),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class CategorySearchTerm(models.Model):
+    """
+    Word index for category search: one row per accent-folded word of a
+    category name. Maintained by signals (see apps.products.search).
+    """
+    term = models.CharField(max_length=50)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+
+    class Meta:
+        verbose_name = 'Termo de Busca de Categoria'
+        verbose_name_plural = 'Termos de Busca de Categorias'
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'category'], name='unique_category_search_term'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} → {self.category_id}"
+
+
+class ProductSearchTerm(models.Model):
+    """
+    Word index for product search: one row per accent-folded word of the
+    product name and of its category name. Maintained by signals (see
+    apps.products.search).
+    """
+    term = models.CharField(max_length=50)
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+
+    class Meta:
+        verbose_name = 'Termo de Busca de Produto'
+        verbose_name_plural = 'Termos de Busca de Produtos'
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'product'], name='unique_product_search_term'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} → {self.product_id}"
@@ -0,0 +1,87 @@
+"""
+Word indexes for product and category search.
+
+Every accent-folded word of a category name is stored as a CategorySearchTerm
+row, and every word of a product name and of its category name as a
+ProductSearchTerm row. NormalizedSearchFilter then matches each search term
+as a prefix of the indexed term column, so "acai" or "org" find "Açaí
+Orgânico" through the (term, ...) index instead of scanning the names.
+"""
+import re
+
+from django.db import transaction
+
+from apps.common.text import normalize_text
+
+from .models import Category, CategorySearchTerm, Product, ProductSearchTerm
+
+REINDEX_BATCH_SIZE = 500
+
+MAX_TERM_LENGTH = ProductSearchTerm._meta.get_field('term').max_length
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def words(*texts):
+    """The distinct accent-folded, lower-cased words of the texts."""
+    return {
+        token[:MAX_TERM_LENGTH]
+        for text in texts
+        for token in TOKEN_RE.findall(normalize_text(text))
+    }
+
+
+def _product_rows(product):
+    category_name = product.category.name if product.category else ''
+    return [
+        ProductSearchTerm(term=term, product=product)
+        for term in words(product.name, category_name)
+    ]
+
+
+def _category_rows(category):
+    return [CategorySearchTerm(term=term, category=category) for term in words(category.name)]
+
+
+def reindex_products(product_ids):
+    """Rebuild the index rows of the given products."""
+    product_ids = list(set(product_ids))
+    for start in range(0, len(product_ids), REINDEX_BATCH_SIZE):
+        batch = product_ids[start:start + REINDEX_BATCH_SIZE]
+        rows = [
+            row
+            for product in Product.objects.filter(pk__in=batch).select_related('category')
+            for row in _product_rows(product)
+        ]
+        with transaction.atomic():
+            ProductSearchTerm.objects.filter(product_id__in=batch).delete()
+            ProductSearchTerm.objects.bulk_create(rows, batch_size=REINDEX_BATCH_SIZE)
+
+
+def reindex_category(category):
+    """Rebuild the index rows of a category and of its products."""
+    with transaction.atomic():
+        CategorySearchTerm.objects.filter(category=category).delete()
+        CategorySearchTerm.objects.bulk_create(_category_rows(category))
+    reindex_products(category.products.values_list('pk', flat=True))
+
+
+def rebuild(batch_size=REINDEX_BATCH_SIZE):
+    """Recreate both indexes. Returns the number of products indexed."""
+    total = 0
+    with transaction.atomic():
+        CategorySearchTerm.objects.all().delete()
+        CategorySearchTerm.objects.bulk_create(
+            [row for category in Category.objects.all() for row in _category_rows(category)],
+            batch_size=batch_size
+        )
+        ProductSearchTerm.objects.all().delete()
+        rows = []
+        for product in Product.objects.select_related('category').iterator(chunk_size=batch_size):
+            rows.extend(_product_rows(product))
+            total += 1
+            if len(rows) >= batch_size:
+                ProductSearchTerm.objects.bulk_create(rows, batch_size=batch_size)
+                rows = []
+        ProductSearchTerm.objects.bulk_create(rows, batch_size=batch_size)
+    return total
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.common.serializers import ImageRenditionsField, SparseFieldsetMixin
 from .models import Category, Product
 
 
@@ -9,24 +10,26 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
+    image_renditions = ImageRenditionsField()
 
     class Meta:
         model = Product
         fields = (
             'id', 'name', 'category', 'category_name', 'description',
-            'image', 'is_active', 'created_at', 'updated_at'
+            'image', 'image_renditions', 'is_active', 'created_at', 'updated_at'
         )
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Simplified serializer for product lists.
     """
     category_name = serializers.CharField(source='category.name', read_only=True)
+    image_renditions = ImageRenditionsField()
 
     class Meta:
         model = Product
-        fields = ('id', 'name', 'category_name', 'image')
+        fields = ('id', 'name', 'category_name', 'image', 'image_renditions')
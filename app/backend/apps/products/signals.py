@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from apps.common import images, versions
+from . import search
+from .models import Category, Product
+
+versions.track(Product, 'products')
+versions.track(Category, 'categories')
+
+images.register(Product, 'image')
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    """Keep the product search index in line with the product and category names."""
+    search.reindex_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def index_category(sender, instance, **kwargs):
+    """Reindex a category and its products, which carry its name too."""
+    search.reindex_category(instance)
@@ -1,6 +1,9 @@
 from rest_framework import viewsets, filters, permissions
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.common.filters import NormalizedSearchFilter
+from apps.common.pagination import KeysetPagination
+from apps.common.versions import condition_on_versions
 from .models import Category, Product
 from .serializers import (
     CategorySerializer,
@@ -16,11 +19,15 @@ class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'description']
+    filter_backends = [NormalizedSearchFilter, filters.OrderingFilter]
+    search_terms_relation = 'search_terms'
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
 
+    @condition_on_versions('categories')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def get_permissions(self):
         """
         Only admins can create/update/delete categories.
@@ -37,12 +44,27 @@ class ProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.filter(is_active=True).select_related('category')
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, NormalizedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'is_active']
-    search_fields = ['name', 'description', 'category__name']
+    search_terms_relation = 'search_terms'
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
 
+    @condition_on_versions('products', 'categories')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        """
+        Reads load only what the requested fields need (?fields=, see
+        SparseFieldsetMixin).
+        """
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return self.get_serializer_class().sparse_queryset(queryset, self.request)
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'list':
             return ProductListSerializer
@@ -51,6 +51,8 @@ class User(AbstractUser):
     
     phone = models.CharField(max_length=20, blank=True, verbose_name='Telefone')
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, verbose_name='Avatar')
+    # Resized copies of avatar (see apps.common.images).
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.common.serializers import ImageRenditionsField
 from .models import User
 
 
@@ -8,12 +9,13 @@ class UserSerializer(serializers.ModelSerializer):
     """
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
     full_name = serializers.ReadOnlyField()
+    avatar_renditions = ImageRenditionsField()
 
     class Meta:
         model = User
         fields = (
             'id', 'email', 'password', 'first_name', 'last_name', 'full_name',
-            'user_type', 'phone', 'avatar', 'is_active', 'created_at', 'updated_at'
+            'user_type', 'phone', 'avatar', 'avatar_renditions', 'is_active', 'created_at', 'updated_at'
         )
         read_only_fields = ('id', 'created_at', 'updated_at', 'is_active')
 
@@ -66,11 +68,12 @@ class UserProfileSerializer(serializers.ModelSerializer):
     Serializer for user profile (read-only, more detailed).
     """
     full_name = serializers.ReadOnlyField()
+    avatar_renditions = ImageRenditionsField()
 
     class Meta:
         model = User
         fields = (
             'id', 'email', 'first_name', 'last_name', 'full_name',
-            'user_type', 'phone', 'avatar', 'created_at'
+            'user_type', 'phone', 'avatar', 'avatar_renditions', 'created_at'
         )
         read_only_fields = fields
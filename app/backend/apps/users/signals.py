@@ -0,0 +1,4 @@
+from apps.common import images
+from .models import User
+
+images.register(User, 'avatar')
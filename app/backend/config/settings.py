@@ -143,6 +143,31 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resize uploaded images in a background thread (see apps.common.images).
+# When off, renditions are made during the request that saved the image.
+IMAGE_RENDITIONS_ASYNC = config('IMAGE_RENDITIONS_ASYNC', default=True, cast=bool)
+
+# Write activity logs and producer statistics in batches from a background
+# thread (see apps.analytics.ingestion). When off, each event is written
+# during its request.
+ACTIVITY_LOG_ASYNC = config('ACTIVITY_LOG_ASYNC', default=True, cast=bool)
+
+
+# Cache: local memory by default. Set CACHE_BACKEND/CACHE_LOCATION to a
+# file (django.core.cache.backends.filebased.FileBasedCache, /var/tmp/cache)
+# or Redis (django.core.cache.backends.redis.RedisCache, redis://127.0.0.1:6379)
+# cache to share it between processes.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Location detail payloads (see apps.locations.detail_cache).
+LOCATION_DETAIL_CACHE = 'default'
+LOCATION_DETAIL_CACHE_TIMEOUT = config('LOCATION_DETAIL_CACHE_TIMEOUT', default=3600, cast=int)
+
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'